@@ -1,15 +1,41 @@
 import os
 import sys
+import time
+_STARTUP_T0 = time.perf_counter()
+import atexit
+import copy
 import json
+import pickle
 import hashlib
+import threading
+import weakref
+import importlib
 import re
 import random
 import string
+from collections import deque
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
+class LazyModule:
+    """Module proxy that imports on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            _lazy_import_times[self._name] = time.perf_counter() - start
+        return getattr(self._module, attr)
+
+# Charts only: matplotlib costs more to import than everything else combined,
+# so it loads on the first chart instead of at startup
+_lazy_import_times = {}
+plt = LazyModule('matplotlib.pyplot')
+
 # ==========================================
 # SECTION 1: CONFIGURATION & CONSTANTS
 # ==========================================
@@ -17,6 +43,9 @@ from datetime import datetime, timedelta
 # Database File
 DB_FILE = 'bank_database.csv'
 BACKUP_DIR = 'backups/'
+CACHE_FILE = 'bank_database.cache.pkl'  # parsed tables, valid only for a matching DB_FILE fingerprint
+SAVE_COALESCE_SECONDS = 0.25  # background writer waits this long to fold a burst of saves into one
+EXIT_FLUSH_TIMEOUT = 30  # seconds the exit hook waits for pending saves
 
 # System Configuration
 FINE_PER_DAY = 2.0  # Rupees per day for overdue
@@ -52,9 +81,99 @@ CREDIT_CARD_LIMIT_DEFAULT = 50000
 # Cheque Configuration
 CHEQUE_CLEARANCE_DAYS = 3
 
+# Interest Crediting
+INTEREST_ACCOUNT_TYPES = ['Savings', 'Fixed Deposit']
+
+# Transaction Monitoring (AML)
+AML_WINDOW_HOURS = 24
+AML_STRUCTURING_BAND = 0.10       # Fraction just below LARGE_TRANSACTION_THRESHOLD
+AML_STRUCTURING_COUNT = 3
+AML_RAPID_MOVEMENT_RATIO = 0.8    # Outflow vs inflow within the window
+AML_RAPID_MOVEMENT_MIN = 50000
+AML_COUNTERPARTY_LIMIT = 5        # New counterparties within the window
+AML_EXEMPT_TYPES = ['Interest Credit', 'EMI Payment']
+
+# Headless Chart Rendering
+CHART_DIR = 'charts/'
+CHART_FORMATS = ['png', 'svg']
+CHART_WORKERS = min(4, os.cpu_count() or 1)
+
+# Background Reports (run in a worker against a snapshot taken at request time)
+REPORT_DIR = 'reports/'
+
+# Account Statements
+STATEMENT_DIR = 'statements/'
+STATEMENT_FORMATS = ['csv', 'txt']
+
+# Reconciliation
+RECON_DIR = 'reconciliation/'
+RECON_TOLERANCE = 0.01
+
+# Transaction Timeline: postings queue in an unsorted tail until this many accumulate
+TIMELINE_TAIL_LIMIT = 4096
+
+# Event Log Checkpoints (balances are replayed from the newest one at startup)
+CHECKPOINT_DIR = 'checkpoints/'
+CHECKPOINT_EVERY = 1000  # postings between automatic checkpoints
+
+# Hot/Cold Tiering: whole months older than this move to read-only partitions
+ARCHIVE_DIR = 'archive/transactions/'
+ARCHIVE_AFTER_DAYS = 365
+
+# Referential Integrity: (table, column) values must exist in (table, column)
+PRIMARY_KEYS = {
+    'customers': 'CustomerID', 'accounts': 'AccountNumber', 'transactions': 'TransactionID',
+    'transfers': 'TransferID', 'loans': 'LoanID', 'loan_payments': 'PaymentID',
+    'cards': 'CardNumber', 'cheques': 'ChequeNumber'
+}
+FOREIGN_KEYS = [
+    ('accounts', 'CustomerID', 'customers', 'CustomerID'),
+    ('transactions', 'AccountNumber', 'accounts', 'AccountNumber'),
+    ('loans', 'CustomerID', 'customers', 'CustomerID'),
+    ('loans', 'LinkedAccount', 'accounts', 'AccountNumber'),
+    ('cards', 'CustomerID', 'customers', 'CustomerID'),
+    ('cards', 'LinkedAccount', 'accounts', 'AccountNumber'),
+    ('cheques', 'AccountNumber', 'accounts', 'AccountNumber'),
+    ('cheques', 'DepositAccount', 'accounts', 'AccountNumber'),
+    ('loan_payments', 'LoanID', 'loans', 'LoanID'),
+    ('transfers', 'FromAccount', 'accounts', 'AccountNumber'),
+    ('transfers', 'ToAccount', 'accounts', 'AccountNumber')
+]
+# Parents nothing refers to
+ORPHAN_CHECKS = [
+    ('customers', 'CustomerID', 'accounts', 'CustomerID'),
+    ('accounts', 'AccountNumber', 'transactions', 'AccountNumber')
+]
+INTEGRITY_CHUNK = 1_000_000
+INTEGRITY_WORKERS = min(4, os.cpu_count() or 1)
+
+# Average monthly balance requirement by account type
+AMB_REQUIREMENTS = {'Savings': MIN_SAVINGS, 'Current': MIN_CURRENT}
+
+# Columns rebuilt at load time and never written to DB_FILE
+DERIVED_COLUMNS = {'transactions': ['Timestamp']}
+
+# Typed Views: columns parsed once per table version and shared by analytics
+TYPED_COLUMNS = {
+    'customers': {'dates': ['RegistrationDate'], 'numbers': []},
+    'accounts': {'dates': ['OpeningDate'], 'numbers': ['Balance', 'MinBalance', 'InterestRate']},
+    'transactions': {'dates': ['Date'], 'numbers': ['Amount']},
+    'loans': {'dates': ['StartDate'], 'numbers': ['PrincipalAmount', 'InterestRate', 'Tenure_Months', 'EMI', 'OutstandingAmount']},
+    'daily_rollup': {'dates': ['Date'], 'numbers': ['Count', 'Amount']},
+    'monthly_rollup': {'dates': [], 'numbers': ['Count', 'Amount']}
+}
+TYPED_VIEW_CHECK = sys.flags.dev_mode  # python -X dev: verify cached views against a fresh parse
+
+# Startup Budget (seconds from launch to the first menu prompt)
+STARTUP_BUDGET = 1.5
+
 # EMI Calculation
 EMI_PRECISION = 2
 
+# Loan Book Projection
+LOAN_PROJECTION_MONTHS = 12     # default horizon
+LOAN_PROJECTION_CHUNK = 100_000  # loans per block; bounds the (loans x months) working set
+
 # Table Schemas (for initialization)
 SCHEMAS = {
     'customers': ['CustomerID', 'Name', 'DOB', 'Gender', 'PAN', 'Aadhar', 'Address', 'City', 'State', 'PIN', 'Phone', 'Email', 'RegistrationDate', 'Status', 'KYC_Status'],
@@ -64,9 +183,11 @@ SCHEMAS = {
     'loans': ['LoanID', 'CustomerID', 'LinkedAccount', 'LoanType', 'PrincipalAmount', 'InterestRate', 'Tenure_Months', 'EMI', 'StartDate', 'MaturityDate', 'OutstandingAmount', 'Status', 'ApprovalDate'],
     'loan_payments': ['PaymentID', 'LoanID', 'PaymentDate', 'AmountPaid', 'PrincipalPart', 'InterestPart', 'OutstandingAfter', 'PaymentMethod', 'Status'],
     'cards': ['CardNumber', 'CustomerID', 'LinkedAccount', 'CardType', 'CreditLimit', 'IssueDate', 'ExpiryDate', 'CVV', 'PIN_Hash', 'Status'],
-    'cheques': ['ChequeNumber', 'AccountNumber', 'IssuedTo', 'Amount', 'IssueDate', 'ClearanceDate', 'Status', 'Remarks'],
+    'cheques': ['ChequeNumber', 'AccountNumber', 'IssuedTo', 'Amount', 'IssueDate', 'ClearanceDate', 'Status', 'Remarks', 'DepositAccount', 'DepositDate'],
     'users': ['UserID', 'Username', 'Password_Hash', 'Role', 'EmployeeID', 'Email', 'Status', 'LastLogin'],
-    'audit': ['LogID', 'UserID', 'Action', 'Details', 'Timestamp', 'IPAddress', 'Status']
+    'audit': ['LogID', 'UserID', 'Action', 'Details', 'Timestamp', 'IPAddress', 'Status'],
+    'daily_rollup': ['Date', 'TransactionType', 'DebitCredit', 'Count', 'Amount'],
+    'monthly_rollup': ['Month', 'TransactionType', 'DebitCredit', 'Count', 'Amount']
 }
 
 # Message Colors for Better UX
@@ -204,6 +325,113 @@ def calculate_amortization_schedule(principal, annual_rate, tenure_months):
     
     return schedule
 
+def calculate_emi_vectorized(principal, annual_rate, tenure_months):
+    """calculate_emi over arrays of (principal, rate, tenure); invalid rows give 0"""
+    principal = np.asarray(principal, dtype=float)
+    annual_rate = np.asarray(annual_rate, dtype=float)
+    tenure = np.asarray(tenure_months, dtype=float)
+    valid = (principal > 0) & (annual_rate >= 0) & (tenure > 0)
+
+    monthly_rate = annual_rate / (12 * 100)
+    growth = (1 + monthly_rate) ** np.where(valid, tenure, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = np.where(monthly_rate == 0,
+                       principal / np.where(valid, tenure, 1),
+                       principal * monthly_rate * growth / (growth - 1))
+    return np.where(valid, np.round(emi, EMI_PRECISION), 0.0)
+
+def calculate_amortization_matrix(principal, annual_rate, tenure_months):
+    """Amortization schedules for many loans at once.
+
+    Returns a dict of (n_loans x max_tenure) arrays: 'EMI', 'Principal',
+    'Interest', 'Outstanding' (rounded exactly like
+    calculate_amortization_schedule) plus a boolean 'Mask' marking months
+    that fall within each loan's tenure. Months are stepped in lockstep so
+    every loan goes through the same float operations as the scalar version.
+    """
+    principal = np.atleast_1d(np.asarray(principal, dtype=float))
+    annual_rate = np.atleast_1d(np.asarray(annual_rate, dtype=float))
+    tenure = np.atleast_1d(np.nan_to_num(np.asarray(tenure_months, dtype=float))).astype(int)
+
+    n_loans = len(principal)
+    n_months = int(tenure.max()) if n_loans and tenure.max() > 0 else 0
+    monthly_rate = annual_rate / (12 * 100)
+    emi = calculate_emi_vectorized(principal, annual_rate, tenure)
+
+    interest = np.zeros((n_loans, n_months))
+    principal_part = np.zeros((n_loans, n_months))
+    outstanding = np.zeros((n_loans, n_months))
+    balance = principal.copy()
+
+    for month in range(n_months):
+        interest[:, month] = balance * monthly_rate
+        principal_part[:, month] = emi - interest[:, month]
+        balance = balance - principal_part[:, month]
+        outstanding[:, month] = balance
+
+    mask = np.arange(1, n_months + 1) <= tenure[:, None]
+    return {
+        'EMI': np.where(mask, np.round(emi, 2)[:, None], 0.0),
+        'Principal': np.where(mask, np.round(principal_part, 2), 0.0),
+        'Interest': np.where(mask, np.round(interest, 2), 0.0),
+        'Outstanding': np.where(mask, np.round(np.maximum(0, outstanding), 2), 0.0),
+        'Mask': mask
+    }
+
+def amortization_frame(principal, annual_rate, tenure_months, loan_ids=None):
+    """Long-format amortization DataFrame (LoanID, Month, EMI, Principal, Interest, Outstanding)"""
+    matrix = calculate_amortization_matrix(principal, annual_rate, tenure_months)
+    mask = matrix['Mask']
+    loan_idx, month_idx = np.nonzero(mask)
+    if loan_ids is None:
+        loan_ids = np.arange(mask.shape[0])
+
+    return pd.DataFrame({
+        'LoanID': np.asarray(loan_ids)[loan_idx],
+        'Month': month_idx + 1,
+        'EMI': matrix['EMI'][mask],
+        'Principal': matrix['Principal'][mask],
+        'Interest': matrix['Interest'][mask],
+        'Outstanding': matrix['Outstanding'][mask]
+    })
+
+def project_loan_cashflows(outstanding, annual_rate, emi, horizon):
+    """Expected monthly cash flows for many loans from their current outstanding.
+
+    Returns (n_loans x horizon) arrays 'Payment', 'Interest', 'Principal' and
+    'Outstanding' (month-end). Balances use the annuity closed form
+    O_k = O_0(1+i)^k - EMI((1+i)^k - 1)/i floored at zero, so there is no loop
+    over months; the final month collects only what is left, the same split as
+    pay_loan_emi (principal = min(EMI - interest, outstanding)).
+    """
+    outstanding = np.nan_to_num(np.atleast_1d(np.asarray(outstanding, dtype=float)))
+    monthly_rate = np.nan_to_num(np.atleast_1d(np.asarray(annual_rate, dtype=float))) / (12 * 100)
+    emi = np.nan_to_num(np.atleast_1d(np.asarray(emi, dtype=float)))
+
+    k = np.arange(horizon + 1)
+    rate = monthly_rate[:, None]
+    growth = np.exp(np.log1p(rate) * k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(rate > 0, (growth - 1) / rate, k)
+    balance = np.maximum(outstanding[:, None] * growth - emi[:, None] * annuity, 0)
+
+    opening, closing = balance[:, :-1], balance[:, 1:]
+    interest = opening * rate
+    principal = opening - closing
+    return {
+        'Payment': interest + principal,
+        'Interest': interest,
+        'Principal': principal,
+        'Outstanding': closing
+    }
+
+def loan_tenure(loans):
+    """Tenure in months per loan (Tenure_Months, falling back to legacy Tenure)"""
+    tenure = pd.to_numeric(loans['Tenure_Months'], errors='coerce')
+    if 'Tenure' in loans.columns:
+        tenure = tenure.fillna(pd.to_numeric(loans['Tenure'], errors='coerce'))
+    return tenure.fillna(0).astype(int)
+
 def generate_card_number():
     """Generate a 16-digit card number"""
     return ''.join([str(random.randint(0, 9)) for _ in range(16)])
@@ -257,6 +485,25 @@ def calculate_credit_score(total_balance, num_loans, num_transactions):
     final_score = base_score + balance_score + txn_score + loan_score
     return max(300, min(900, final_score))
 
+def get_credit_score_vectorized(account_age_days, total_transactions, total_balance, defaulted_loans=0):
+    """get_credit_score over arrays (one entry per customer)"""
+    age_score = np.minimum(100, np.asarray(account_age_days) // 30 * 5)
+    txn_score = np.minimum(100, np.asarray(total_transactions) * 2)
+    balance_score = np.minimum(100, np.trunc(np.asarray(total_balance, dtype=float) / 10000) * 10)
+    default_penalty = np.asarray(defaulted_loans) * 100
+    
+    final_score = 600 + age_score + txn_score + balance_score - default_penalty
+    return np.clip(final_score, 300, 900).astype(int)
+
+def calculate_credit_score_vectorized(total_balance, num_loans, num_transactions):
+    """calculate_credit_score over arrays (one entry per customer)"""
+    balance_score = np.minimum(150, np.trunc(np.asarray(total_balance, dtype=float) / 10000) * 5)
+    txn_score = np.minimum(100, np.asarray(num_transactions) * 3)
+    loan_score = np.minimum(50, np.asarray(num_loans) * 10)
+    
+    final_score = 600 + balance_score + txn_score + loan_score
+    return np.clip(final_score, 300, 900).astype(int)
+
 def log_audit(data, action, details, status='Success'):
     """Log an action to audit trail"""
     log_entry = {
@@ -271,6 +518,22 @@ def log_audit(data, action, details, status='Success'):
     data['audit'] = pd.concat([data['audit'], pd.DataFrame([log_entry])], ignore_index=True)
     return data
 
+def log_audit_batch(data, action, details, status='Success'):
+    """Log many entries for one action to the audit trail in a single concat"""
+    if len(details) == 0:
+        return data
+    log_entries = pd.DataFrame({
+        'LogID': generate_ids('LOG', len(data['audit']) + 1, len(details), width=6),
+        'UserID': 'SYSTEM',
+        'Action': action,
+        'Details': list(details),
+        'Timestamp': get_timestamp(),
+        'IPAddress': '127.0.0.1',
+        'Status': status
+    })
+    data['audit'] = pd.concat([data['audit'], log_entries], ignore_index=True)
+    return data
+
 # ==========================================
 # SECTION 3: DATA MANAGEMENT
 # ==========================================
@@ -299,11 +562,58 @@ def initialize_data():
         data['users'] = pd.DataFrame([admin_user])
         save_data(data)
 
+def db_fingerprint(sha256=None):
+    """Size, mtime and content hash of the database file (pass sha256 if already known)"""
+    stat = os.stat(DB_FILE)
+    if sha256 is None:
+        digest = hashlib.sha256()
+        with open(DB_FILE, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': sha256,
+            'schema': hashlib.sha256(json.dumps(SCHEMAS, sort_keys=True).encode()).hexdigest()}
+
+def load_cached_state():
+    """Parsed tables from the sidecar cache, or None when missing or stale"""
+    try:
+        if not os.path.exists(CACHE_FILE):
+            return None
+        with open(CACHE_FILE, 'rb') as f:
+            cached = pickle.load(f)
+        stat = os.stat(DB_FILE)
+        stored = cached['fingerprint']
+        # Size/mtime reject cheaply; the hash catches edits that keep both
+        if (stored['size'], stored['mtime']) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        if stored != db_fingerprint():
+            return None
+        return cached['tables']
+    except Exception:
+        return None
+
+def save_cached_state(data, fingerprint=None):
+    """Write the tables next to the database, stamped with the fingerprint of the file they match"""
+    try:
+        tmp_path = CACHE_FILE + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint or db_fingerprint(),
+                         'tables': {table: data[table] for table in SCHEMAS}},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, CACHE_FILE)
+    except Exception as e:
+        print(f"{Colors.YELLOW}Could not write state cache: {str(e)}{Colors.END}")
+
 def load_data():
     """Load data from single CSV into dictionary of DataFrames"""
     try:
         if not os.path.exists(DB_FILE):
             initialize_data()
+        
+        # Warm restart: reuse the parsed tables if the file is unchanged
+        cached = load_cached_state()
+        if cached is not None:
+            return cached
             
         df = pd.read_csv(DB_FILE)
         data = {}
@@ -339,6 +649,7 @@ def load_data():
         
         # Fix data integrity issues
         data = fix_data_integrity(data)
+        save_cached_state(data)
         return data
     except Exception as e:
         print(f"{Colors.RED}Error loading data: {str(e)}{Colors.END}")
@@ -386,7 +697,10 @@ def save_data(data_dict):
     """Save dictionary of DataFrames to single CSV (JSON-in-CSV format)"""
     try:
         all_rows = []
+        written = {}
         for table, df in data_dict.items():
+            df = df.drop(columns=DERIVED_COLUMNS.get(table, []), errors='ignore')
+            written[table] = df
             if not df.empty:
                 # Convert DataFrame to list of records
                 records = df.to_dict(orient='records')
@@ -408,15 +722,164 @@ def save_data(data_dict):
                     'Data': json.dumps({})
                 })
         
-        pd.DataFrame(all_rows).to_csv(DB_FILE, index=False)
+        # Hash the exact bytes written, then swap the file in atomically; the
+        # cache pickles the same frames, so it can never disagree with the file
+        payload = pd.DataFrame(all_rows).to_csv(index=False).encode('utf-8')
+        tmp_path = DB_FILE + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, DB_FILE)
+        save_cached_state(written, db_fingerprint(hashlib.sha256(payload).hexdigest()))
         return True
     except Exception as e:
         print(f"{Colors.RED}Error saving data: {str(e)}{Colors.END}")
         return False
 
+# --- Background Writer ---
+# Menu actions call request_save(), which hands a snapshot of the tables to a
+# writer thread and returns at once. Saves that arrive while one is pending or
+# being written replace the pending snapshot, so a burst costs a single
+# save_data().
+#
+# Durability window: a requested save is not on disk yet. A crash (not a
+# normal exit, which flushes) loses the actions of the last
+# SAVE_COALESCE_SECONDS plus the write in progress; the file on disk is
+# always a complete earlier state. Anything that must not run ahead of the
+# file (checkpoints, archive commits, backups) waits on flush_saves() or runs
+# in the writer after a successful save. 'written' counts requests handled,
+# 'durable' the ones that actually reached disk.
+
+# Copy-on-write pandas (always on from 3.0) makes a shallow copy a frozen
+# snapshot at O(columns) cost; older versions need the full copy
+SNAPSHOT_DEEP = int(pd.__version__.split('.')[0]) < 3
+
+_writer = {
+    'thread': None, 'cond': threading.Condition(), 'pending': None,
+    'requested': 0, 'written': 0, 'durable': 0, 'depth': 0, 'max_depth': 0,
+    'writes': 0, 'coalesced': 0, 'errors': 0, 'checkpoint_errors': 0, 'first_request': None,
+    'latency': deque(maxlen=100), 'lag': deque(maxlen=100)
+}
+
+def start_writer():
+    """Start the background writer thread (idempotent)"""
+    with _writer['cond']:
+        if _writer['thread'] is not None and _writer['thread'].is_alive():
+            return
+        _writer['thread'] = threading.Thread(target=writer_loop, name='save-writer', daemon=True)
+        _writer['thread'].start()
+
+def writer_loop():
+    """Writer thread: wait for a request, let the burst settle, write the latest copy"""
+    cond = _writer['cond']
+    while True:
+        with cond:
+            while _writer['pending'] is None:
+                cond.wait()
+            # Give follow-up saves a moment to land on the same pending copy
+            deadline = time.monotonic() + SAVE_COALESCE_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                cond.wait(remaining)
+            snapshot, generation = _writer['pending'], _writer['requested']
+            first, batch = _writer['first_request'], _writer['depth']
+            _writer['pending'], _writer['first_request'], _writer['depth'] = None, None, 0
+
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            ok = save_data(snapshot)
+            if ok:
+                # The save itself succeeded; a failed checkpoint only delays the next one
+                try:
+                    checkpoint_after_save(snapshot)
+                except Exception as e:
+                    print(f"{Colors.YELLOW}Checkpoint after save failed: {str(e)}{Colors.END}")
+                    with cond:
+                        _writer['checkpoint_errors'] += 1
+        finally:
+            # Even if the thread is dying, waiters must learn this request was handled
+            with cond:
+                _writer['written'] = generation
+                if ok:
+                    _writer['durable'] = generation
+                _writer['writes'] += 1
+                _writer['coalesced'] += batch - 1
+                _writer['errors'] += not ok
+                _writer['latency'].append(time.perf_counter() - t0)
+                _writer['lag'].append(time.perf_counter() - first)
+                cond.notify_all()
+
+def request_save(data):
+    """Queue the current tables for writing; returns immediately"""
+    start_writer()
+    snapshot = {table: df.copy(deep=SNAPSHOT_DEEP) for table, df in data.items()}
+    with _writer['cond']:
+        _writer['pending'] = snapshot
+        _writer['requested'] += 1
+        _writer['depth'] += 1
+        _writer['max_depth'] = max(_writer['max_depth'], _writer['depth'])
+        if _writer['first_request'] is None:
+            _writer['first_request'] = time.perf_counter()
+        _writer['cond'].notify_all()
+
+def flush_saves(timeout=None):
+    """Barrier: block until every save requested so far is handled; True if it reached disk"""
+    cond = _writer['cond']
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with cond:
+        target = _writer['requested']
+        # Re-check the thread on every wake-up: a writer that died mid-wait never notifies again
+        while _writer['written'] < target and _writer['thread'] is not None and _writer['thread'].is_alive():
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            cond.wait(remaining)
+        return _writer['durable'] >= target
+
+# Registered once: a normal exit never leaves a requested save behind (bounded,
+# so a stuck disk cannot hang interpreter shutdown)
+atexit.register(flush_saves, EXIT_FLUSH_TIMEOUT)
+
+def writer_metrics():
+    """Queue depth, coalescing and write latency of the background writer"""
+    with _writer['cond']:
+        latency, lag = list(_writer['latency']), list(_writer['lag'])
+        return {
+            'queue_depth': _writer['depth'],
+            'max_queue_depth': _writer['max_depth'],
+            'in_flight': _writer['requested'] - _writer['durable'],
+            'requests': _writer['requested'],
+            'writes': _writer['writes'],
+            'coalesced': _writer['coalesced'],
+            'errors': _writer['errors'],
+            'checkpoint_errors': _writer['checkpoint_errors'],
+            'last_write': latency[-1] if latency else None,
+            'avg_write': sum(latency) / len(latency) if latency else None,
+            'max_write': max(latency) if latency else None,
+            'avg_lag': sum(lag) / len(lag) if lag else None
+        }
+
+def show_writer_status(data=None):
+    """Background writer metrics"""
+    m = writer_metrics()
+    fmt = lambda v: f"{v * 1000:,.1f} ms" if v is not None else '-'
+    print(f"\n{Colors.CYAN}--- Save Writer Status ---{Colors.END}")
+    print(f"Queue depth:        {m['queue_depth']} (max {m['max_queue_depth']})")
+    print(f"Saves not on disk:  {m['in_flight']}")
+    print(f"Requests / Writes:  {m['requests']} / {m['writes']}  ({m['coalesced']} coalesced)")
+    print(f"Write latency:      last {fmt(m['last_write'])}, avg {fmt(m['avg_write'])}, max {fmt(m['max_write'])}")
+    print(f"Request to disk:    avg {fmt(m['avg_lag'])}")
+    color = Colors.RED if m['errors'] else Colors.GREEN
+    print(f"Failed writes:      {color}{m['errors']}{Colors.END}")
+    color = Colors.YELLOW if m['checkpoint_errors'] else Colors.GREEN
+    print(f"Failed checkpoints: {color}{m['checkpoint_errors']}{Colors.END}")
+    return data
+
 def backup_data():
     """Create backup of the database file"""
     print(f"\n{Colors.CYAN}--- Creating Data Backup ---{Colors.END}")
+    flush_saves()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     os.makedirs(BACKUP_DIR, exist_ok=True)
     backup_path = os.path.join(BACKUP_DIR, f"bank_database_{timestamp}.csv")
@@ -432,6 +895,1073 @@ def backup_data():
         print(f"{Colors.RED}✗ Backup failed: {str(e)}{Colors.END}")
         return False
 
+# --- Typed Views ---
+# Analytics read dates and amounts through typed_view() instead of copying a
+# table and re-running to_datetime/to_numeric. A view is rebuilt only when the
+# table object is replaced, its row count changes, or touch_tables() bumps its
+# version after an in-place edit. Views are shared: treat them as read-only.
+# Code that writes a typed column in place (.loc/.at) must call touch_tables();
+# with TYPED_VIEW_CHECK on, every cache hit is compared against a fresh parse.
+
+_table_versions = {}
+_typed_views = {}
+
+def touch_tables(*tables):
+    """Bump version counters after in-place edits so their typed views are rebuilt"""
+    for table in tables:
+        _table_versions[table] = _table_versions.get(table, 0) + 1
+
+def typed_view(data, table):
+    """Parsed date (datetime64) and numeric (float, NaN if invalid) columns of a table"""
+    df = data[table]
+    version = _table_versions.get(table, 0)
+    entry = _typed_views.get(table)
+    if entry and entry['source']() is df and entry['rows'] == len(df) and entry['version'] == version:
+        if TYPED_VIEW_CHECK:
+            assert entry['view'].equals(parse_typed_columns(df, table)), \
+                f"stale typed view of {table}: an in-place edit did not call touch_tables('{table}')"
+        return entry['view']
+
+    view = parse_typed_columns(df, table)
+    # Weak reference: a replaced table is freed rather than pinned by its old view
+    _typed_views[table] = {'source': weakref.ref(df), 'rows': len(df), 'version': version, 'view': view}
+    return view
+
+def parse_typed_columns(df, table):
+    """Fresh parse of a table's TYPED_COLUMNS"""
+    spec = TYPED_COLUMNS[table]
+    columns = {col: parse_dates(df[col]) for col in spec['dates'] if col in df.columns}
+    columns.update({col: pd.to_numeric(df[col], errors='coerce').astype(float)
+                    for col in spec['numbers'] if col in df.columns})
+    return pd.DataFrame(columns, index=df.index)
+
+# ==========================================
+# SECTION 3A: LEDGER POSTING
+# ==========================================
+
+def generate_ids(prefix, start, count, width=5):
+    """Generate a block of sequential IDs (e.g. TXN00042, TXN00043, ...)"""
+    return [f"{prefix}{i:0{width}d}" for i in range(start, start + count)]
+
+POSTING_HOOKS = []
+
+def post_transactions(data, txns):
+    """Append a batch of transaction rows to the ledger in a single concat"""
+    if txns.empty:
+        return data
+
+    txns = txns.reindex(columns=SCHEMAS['transactions'])
+    txns['TransactionID'] = generate_ids('TXN', len(data['transactions']) + archived_row_count() + 1, len(txns))
+    txns['Status'] = txns['Status'].fillna('Success')
+
+    data['transactions'] = pd.concat([data['transactions'], txns], ignore_index=True)
+    for hook in POSTING_HOOKS:
+        data = hook(data, txns)
+    return data
+
+def register_posting_hook(hook):
+    """Register hook(data, txns) -> data, called for every batch written to the ledger"""
+    if hook not in POSTING_HOOKS:
+        POSTING_HOOKS.append(hook)
+
+# --- Event-Sourced Balances ---
+
+# Postings are the source of truth: accounts.Balance is a projection kept
+# current by the first posting hook, never written directly. Checkpoints
+# snapshot every balance at a ledger sequence number (the TXN number), so
+# startup replays only the postings after the newest checkpoint, and any
+# past checkpoint can be reloaded for audit. A checkpoint is only written from
+# tables that are already on disk (by the save writer, right after a save),
+# so it can never describe postings the database file does not have.
+_checkpoints = {'index': None, 'lock': threading.Lock()}
+
+def project_balances(data, txns):
+    """Posting hook: apply each batch's net signed amount per account to its balance"""
+    return apply_balance_changes(data, signed_amounts(txns).groupby(txns['AccountNumber']).sum())
+
+register_posting_hook(project_balances)
+
+def event_seq(txn_ids):
+    """Ledger sequence numbers from TXN ids (TXN00042 -> 42)"""
+    return pd.to_numeric(pd.Series(txn_ids).astype(str).str[3:], errors='coerce').values
+
+def ledger_head(data):
+    """Sequence number of the newest posting"""
+    return len(data['transactions']) + archived_row_count()
+
+def checkpoint_index():
+    """Checkpoint list, oldest first"""
+    if _checkpoints['index'] is None:
+        path = os.path.join(CHECKPOINT_DIR, 'index.json')
+        _checkpoints['index'] = []
+        if os.path.exists(path):
+            with open(path) as f:
+                _checkpoints['index'] = json.load(f)
+    return _checkpoints['index']
+
+def snapshot_head(snapshot):
+    """Ledger head of a saved snapshot, read from its own newest TXN id"""
+    txn_ids = snapshot['transactions']['TransactionID']
+    seq = event_seq(txn_ids.iloc[-1:])
+    return int(seq[0]) if len(seq) and not np.isnan(seq[0]) else ledger_head(snapshot)
+
+def write_checkpoint(data, note='periodic', seq=None):
+    """Snapshot every account balance at the current ledger head (or at `seq`)"""
+    with _checkpoints['lock']:
+        return store_checkpoint(data, note, ledger_head(data) if seq is None else seq)
+
+def store_checkpoint(data, note, seq):
+    """Write one checkpoint file and its index entry"""
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    name = f"ckpt_{seq:08d}.csv"
+    balances = data['accounts'][['AccountNumber', 'Balance']]
+    balances.to_csv(os.path.join(CHECKPOINT_DIR, name + '.tmp'), index=False)
+    os.replace(os.path.join(CHECKPOINT_DIR, name + '.tmp'), os.path.join(CHECKPOINT_DIR, name))
+
+    index = [c for c in checkpoint_index() if c['seq'] != seq]
+    entry = {'seq': seq, 'timestamp': get_timestamp(), 'file': name, 'note': note,
+             'accounts': len(balances), 'total': round(float(pd.to_numeric(balances['Balance'], errors='coerce').sum()), 2)}
+    index.append(entry)
+    with open(os.path.join(CHECKPOINT_DIR, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=2)
+    _checkpoints['index'] = index
+    return entry
+
+def checkpoint_balances(entry):
+    """Balances stored in one checkpoint, by AccountNumber"""
+    snap = pd.read_csv(os.path.join(CHECKPOINT_DIR, entry['file']), dtype={'AccountNumber': str})
+    return pd.to_numeric(snap.drop_duplicates('AccountNumber').set_index('AccountNumber')['Balance'], errors='coerce').astype(float)
+
+def usable_checkpoints(data):
+    """Checkpoints the loaded ledger can back (seq at or below its head)"""
+    head = ledger_head(data)
+    return [c for c in checkpoint_index() if c['seq'] <= head]
+
+def replay_balances(data, checkpoint=None, upto=None):
+    """Balances rebuilt from a checkpoint plus the postings after it (through seq `upto`)"""
+    usable = usable_checkpoints(data)
+    checkpoint = checkpoint or (usable[-1] if usable else None)
+    base = checkpoint_balances(checkpoint) if checkpoint else pd.Series(dtype=float)
+    after = checkpoint['seq'] if checkpoint else 0
+
+    ledger = data['transactions']
+    seq = event_seq(ledger['TransactionID'])
+    if len(seq) and np.nanmin(seq) > after + 1 and archived_row_count():
+        ledger = ledger_since(data)
+        seq = event_seq(ledger['TransactionID'])
+    events = (seq > after) & (seq <= (upto if upto is not None else np.inf))
+    deltas = signed_amounts(ledger[events]).groupby(ledger.loc[events, 'AccountNumber']).sum()
+
+    accounts = data['accounts']['AccountNumber'].drop_duplicates()
+    if upto is not None:
+        accounts = pd.Series(base.index.union(deltas.index))
+    balances = base.reindex(accounts).fillna(0).values + deltas.reindex(accounts).fillna(0).values
+    return pd.Series(balances, index=pd.Index(accounts.values, name='AccountNumber')).round(2)
+
+def recover_balances(data):
+    """Startup: re-derive balances from the newest checkpoint and the postings since it"""
+    usable = usable_checkpoints(data)
+    if len(usable) < len(checkpoint_index()):
+        # Ahead of the saved ledger (older builds checkpointed before saving): nothing backs them
+        with _checkpoints['lock']:
+            stale = len(checkpoint_index()) - len(usable)
+            with open(os.path.join(CHECKPOINT_DIR, 'index.json'), 'w') as f:
+                json.dump(usable, f, indent=2)
+            _checkpoints['index'] = usable
+        print(f"{Colors.YELLOW}Discarded {stale} checkpoints ahead of the saved ledger{Colors.END}")
+        data = log_audit(data, 'CHECKPOINT_DISCARDED', f"{stale} checkpoints beyond ledger head {ledger_head(data)}", status='Failed')
+    if not usable:
+        # First run in event-sourced mode: the existing balances become the genesis state
+        write_checkpoint(data, note='genesis')
+        return data
+
+    derived = replay_balances(data)
+    current = data['accounts']['AccountNumber'].map(derived)
+    stored = pd.to_numeric(data['accounts']['Balance'], errors='coerce').fillna(0)
+    drift = current.notna() & ((stored - current).abs() > 0.005)
+    if drift.any():
+        data['accounts'].loc[drift, 'Balance'] = current[drift]
+        touch_tables('accounts')
+        print(f"{Colors.YELLOW}Replayed event log: corrected {int(drift.sum())} account balances{Colors.END}")
+        data = log_audit(data, 'EVENT_REPLAY', f"{int(drift.sum())} balances re-derived from checkpoint {checkpoint_index()[-1]['seq']}")
+    return data
+
+def checkpoint_after_save(snapshot):
+    """Save writer: checkpoint a just-saved snapshot once CHECKPOINT_EVERY postings have accrued"""
+    seq = snapshot_head(snapshot)
+    last = checkpoint_index()[-1]['seq'] if checkpoint_index() else 0
+    if seq - last >= CHECKPOINT_EVERY:
+        write_checkpoint(snapshot, seq=seq)
+
+# --- Daily Limit Counters ---
+
+# Running per-account debit totals for the current day, so limit checks are
+# a dict lookup instead of a scan over today's transactions
+DAILY_LIMIT_TYPES = {
+    'withdrawal': ['Withdrawal'],
+    'transfer': ['Fund Transfer', 'Transfer Debit']
+}
+_daily_usage = {'date': None, 'withdrawal': {}, 'transfer': {}}
+
+def _roll_daily_usage(today):
+    """Reset the counters when the calendar day changes"""
+    if _daily_usage['date'] != today:
+        _daily_usage['date'] = today
+        for kind in DAILY_LIMIT_TYPES:
+            _daily_usage[kind] = {}
+
+def record_daily_usage(data, txns):
+    """Posting hook: add today's debits from a transaction batch to the counters"""
+    today = get_date()
+    _roll_daily_usage(today)
+    debits = txns[(txns['Date'] == today) & (txns['DebitCredit'] == 'Debit')]
+    if debits.empty:
+        return data
+
+    for kind, txn_types in DAILY_LIMIT_TYPES.items():
+        rows = debits[debits['TransactionType'].isin(txn_types)]
+        if rows.empty:
+            continue
+        counters = _daily_usage[kind]
+        amounts = pd.to_numeric(rows['Amount'], errors='coerce').fillna(0)
+        for acc_num, total in amounts.groupby(rows['AccountNumber']).sum().items():
+            counters[acc_num] = counters.get(acc_num, 0.0) + total
+    return data
+
+def rebuild_daily_usage(data):
+    """Rebuild today's counters from the ledger (called once at startup)"""
+    _daily_usage['date'] = None
+    _roll_daily_usage(get_date())
+    if not data['transactions'].empty:
+        record_daily_usage(data, data['transactions'])
+
+def get_daily_usage(kind, acc_num):
+    """Amount already debited today from an account for 'withdrawal' or 'transfer'"""
+    _roll_daily_usage(get_date())
+    return _daily_usage[kind].get(acc_num, 0.0)
+
+register_posting_hook(record_daily_usage)
+
+# --- Bank-Wide Aggregates ---
+
+# Dashboard and bank summary figures. Balances only ever change through
+# postings (see Event-Sourced Balances), so deposits and volumes live in a
+# store that a single posting hook keeps current, read in O(1). Counts are
+# table lengths and the loan figures are summed from the loans typed view on
+# read, so customer/account/card/loan edits need no bookkeeping here.
+# verify_bank_totals recomputes the store from scratch.
+_bank_totals = {}
+
+def compute_ledger_totals(data):
+    """Full recompute of the posting-driven aggregates"""
+    txns = data['transactions']
+    amounts = pd.to_numeric(txns['Amount'], errors='coerce').fillna(0)
+    return {
+        'TotalDeposits': float(pd.to_numeric(data['accounts']['Balance'], errors='coerce').sum()),
+        'CreditVolume': float(amounts[txns['DebitCredit'] == 'Credit'].sum()) + archive_manifest()['credit'],
+        'DebitVolume': float(amounts[txns['DebitCredit'] == 'Debit'].sum()) + archive_manifest()['debit']
+    }
+
+def compute_table_totals(data):
+    """Counts and loan figures, read straight from the tables"""
+    return {
+        'OutstandingLoans': float(typed_view(data, 'loans')['OutstandingAmount'].sum()),
+        'Customers': len(data['customers']),
+        'Accounts': len(data['accounts']),
+        'Cards': len(data['cards']),
+        'Loans': len(data['loans']),
+        'LoanStatus': data['loans']['Status'].value_counts().to_dict()
+    }
+
+def compute_bank_totals(data):
+    """Full recompute of every bank-wide aggregate"""
+    return {**compute_ledger_totals(data), **compute_table_totals(data)}
+
+def rebuild_bank_totals(data):
+    """Reset the posting-driven store from the tables (startup)"""
+    _bank_totals.clear()
+    _bank_totals.update(compute_ledger_totals(data))
+
+def get_bank_totals(data):
+    """Every bank-wide aggregate: the posting-driven store plus the table figures"""
+    if not _bank_totals:
+        rebuild_bank_totals(data)
+    return {**_bank_totals, **compute_table_totals(data)}
+
+def track_bank_totals(data, txns):
+    """Posting hook: every balance change is posted, so deposits move by the batch's net flow"""
+    if not _bank_totals:
+        # Not built yet: the first read computes everything from the tables
+        return data
+    amounts = pd.to_numeric(txns['Amount'], errors='coerce').fillna(0)
+    credits = float(amounts[txns['DebitCredit'] == 'Credit'].sum())
+    debits = float(amounts[txns['DebitCredit'] == 'Debit'].sum())
+    _bank_totals['CreditVolume'] += credits
+    _bank_totals['DebitVolume'] += debits
+    _bank_totals['TotalDeposits'] += credits - debits
+    return data
+
+def verify_bank_totals(data):
+    """Compare the posting-driven store against a full recompute and report drift"""
+    print(f"\n{Colors.CYAN}--- Verify Bank Aggregates ---{Colors.END}")
+    expected = compute_ledger_totals(data)
+    mismatches = 0
+    for key, value in expected.items():
+        current = _bank_totals.get(key)
+        if current is None or abs(current - value) >= 0.01:
+            mismatches += 1
+            print(f"{Colors.RED}  {key}: store={current} recomputed={value}{Colors.END}")
+    if mismatches:
+        print(f"{Colors.YELLOW}{mismatches} aggregates drifted; store rebuilt from tables{Colors.END}")
+        rebuild_bank_totals(data)
+    else:
+        print(f"{Colors.GREEN}✓ All {len(expected)} aggregates match a full recompute{Colors.END}")
+    return mismatches == 0
+
+register_posting_hook(track_bank_totals)
+
+# --- Transaction Rollups ---
+
+# Persistent per-day and per-month totals by TransactionType and DebitCredit,
+# kept current by a posting hook so time-series reports never scan the ledger
+ROLLUP_KEYS = {'daily_rollup': 'Date', 'monthly_rollup': 'Month'}
+
+def summarize_transactions(txns):
+    """Aggregate ledger rows into (daily, monthly) rollup frames"""
+    dates = parse_dates(txns['Date'])
+    amounts = pd.to_numeric(txns['Amount'], errors='coerce')
+    valid = dates.notna() & amounts.notna()
+
+    rows = pd.DataFrame({
+        'Date': np.datetime_as_string(dates[valid].values, unit='D'),
+        'TransactionType': txns.loc[valid, 'TransactionType'].fillna('N/A').astype(str),
+        'DebitCredit': txns.loc[valid, 'DebitCredit'].fillna('N/A').astype(str),
+        'Amount': amounts[valid]
+    })
+    rows['Month'] = rows['Date'].str[:7]
+
+    rollups = {}
+    for table, period in ROLLUP_KEYS.items():
+        keys = [period, 'TransactionType', 'DebitCredit']
+        rollups[table] = (rows.groupby(keys)['Amount'].agg(Count='count', Amount='sum')
+                          .reset_index())
+    return rollups
+
+def merge_rollup(existing, increment, period):
+    """Add an increment into a rollup table (cost grows with rollup rows, not ledger rows)"""
+    keys = [period, 'TransactionType', 'DebitCredit']
+    if existing.empty:
+        return increment.sort_values(keys).reset_index(drop=True)
+    combined = pd.concat([existing[keys + ['Count', 'Amount']], increment], ignore_index=True)
+    combined['Count'] = pd.to_numeric(combined['Count'])
+    combined['Amount'] = pd.to_numeric(combined['Amount'])
+    return combined.groupby(keys, as_index=False)[['Count', 'Amount']].sum()
+
+def update_rollups(data, txns):
+    """Posting hook: fold a new batch into the daily and monthly rollups"""
+    for table, increment in summarize_transactions(txns).items():
+        if not increment.empty:
+            data[table] = merge_rollup(data[table], increment, ROLLUP_KEYS[table])
+    return data
+
+def rebuild_rollups(data):
+    """Recompute both rollups from the full ledger (archived months included)"""
+    ledger = ledger_since(data)
+    for table, rollup in summarize_transactions(ledger).items():
+        data[table] = rollup if not rollup.empty else pd.DataFrame(columns=SCHEMAS[table])
+    return data
+
+def rollups_in_sync(data):
+    """Cheap startup check: rollup counts and credit/debit amounts must match the (valid) ledger"""
+    rollup = typed_view(data, 'daily_rollup')
+    ledger = typed_view(data, 'transactions')
+    manifest = archive_manifest()
+    valid = ledger['Date'].notna() & ledger['Amount'].notna()
+    if rollup['Count'].sum() != valid.sum() + manifest['valid_rows']:
+        return False
+
+    for side, archived in (('Credit', manifest['credit']), ('Debit', manifest['debit'])):
+        expected = ledger['Amount'][valid & (data['transactions']['DebitCredit'] == side)].sum() + archived
+        counted = rollup['Amount'][data['daily_rollup']['DebitCredit'] == side].sum()
+        if abs(counted - expected) > RECON_TOLERANCE + 1e-9 * abs(expected):
+            return False
+    return True
+
+register_posting_hook(update_rollups)
+
+# --- Transaction Timeline ---
+
+# Typed Timestamp column on the ledger plus two sorted views of it: bank-wide
+# by time, and by (account, time). Range queries binary-search these views,
+# so "between t1 and t2" costs O(log n + k). NaT (legacy rows without a
+# usable date) sorts first and only appears in queries with no start bound.
+# Postings are queued in a small unsorted tail rather than inserted into the
+# sorted arrays; queries scan the tail, and it is merged in one pass once it
+# passes TIMELINE_TAIL_LIMIT rows or a caller needs the fully sorted view.
+# The views follow the 'transactions' version, so code that edits Date/Time
+# in place must call touch_tables('transactions').
+_txn_timeline = {'rows': -1, 'version': None, 'generation': 0}
+
+def transaction_timestamps(txns):
+    """Combined Date + Time as datetime64[ns] (missing/bad Time -> midnight)"""
+    day = txns['Date'].astype(str).str[:10]
+    stamps = pd.to_datetime(day + ' ' + txns['Time'].fillna('').astype(str).str[:8],
+                            format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    return stamps.fillna(parse_dates(day)).astype('datetime64[ns]')
+
+def rebuild_transaction_timeline(data):
+    """Recompute the Timestamp column and both sorted views from the ledger"""
+    txns = data['transactions']
+    txns['Timestamp'] = transaction_timestamps(txns)
+    ts = txns['Timestamp'].values.view('int64')
+    acc = txns['AccountNumber'].astype(str).values.astype(object)
+    by_time = np.argsort(ts, kind='stable')
+    by_acc = np.lexsort((ts, pd.factorize(acc, sort=True)[0]))
+    _txn_timeline.update({
+        'rows': len(txns), 'merged': len(txns), 'tail': [],
+        'version': _table_versions.get('transactions', 0),
+        'generation': _txn_timeline['generation'] + 1,
+        'ts': ts[by_time], 'pos': by_time,
+        'acc': acc[by_acc], 'acc_ts': ts[by_acc], 'acc_pos': by_acc
+    })
+    return data
+
+def timeline_stale(data, rows=None):
+    """True if the views no longer describe the ledger (row count or version moved)"""
+    rows = len(data['transactions']) if rows is None else rows
+    return _txn_timeline['rows'] != rows or _txn_timeline['version'] != _table_versions.get('transactions', 0)
+
+def timeline_tail():
+    """Queued (account, ts, pos) arrays not yet merged into the sorted views"""
+    if not _txn_timeline['tail']:
+        return np.zeros(0, dtype=object), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return tuple(np.concatenate(parts) for parts in zip(*_txn_timeline['tail']))
+
+def merge_timeline_tail():
+    """Fold the queued postings into both sorted views in one pass"""
+    tl = _txn_timeline
+    acc, ts, pos = timeline_tail()
+    order = np.argsort(ts, kind='stable')
+    at = np.searchsorted(tl['ts'], ts[order], side='right')
+    tl['ts'] = np.insert(tl['ts'], at, ts[order])
+    tl['pos'] = np.insert(tl['pos'], at, pos[order])
+
+    order = np.lexsort((ts, pd.factorize(acc, sort=True)[0]))
+    lo = np.searchsorted(tl['acc'], acc[order], side='left')
+    hi = np.searchsorted(tl['acc'], acc[order], side='right')
+    at = [l + np.searchsorted(tl['acc_ts'][l:h], t, side='right') for l, h, t in zip(lo, hi, ts[order])]
+    tl['acc'] = np.insert(tl['acc'], at, acc[order])
+    tl['acc_ts'] = np.insert(tl['acc_ts'], at, ts[order])
+    tl['acc_pos'] = np.insert(tl['acc_pos'], at, pos[order])
+    tl.update({'merged': tl['rows'], 'tail': [], 'generation': tl['generation'] + 1})
+
+def current_timeline(data, merged=False):
+    """Timeline for the ledger as it stands; merged=True folds the tail in first"""
+    if timeline_stale(data):
+        rebuild_transaction_timeline(data)
+    if merged and _txn_timeline['tail']:
+        merge_timeline_tail()
+    return _txn_timeline
+
+def index_transaction_times(data, txns):
+    """Posting hook: stamp the new rows and queue them on the timeline tail"""
+    ledger = data['transactions']
+    first = len(ledger) - len(txns)
+    if timeline_stale(data, rows=first):
+        return rebuild_transaction_timeline(data)
+
+    stamps = transaction_timestamps(txns)
+    ledger.loc[ledger.index[first:], 'Timestamp'] = stamps.values
+    tl = _txn_timeline
+    tl['tail'].append((txns['AccountNumber'].astype(str).values.astype(object),
+                       stamps.values.view('int64'), np.arange(first, len(ledger))))
+    tl['rows'] = len(ledger)
+    if tl['rows'] - tl['merged'] > TIMELINE_TAIL_LIMIT:
+        merge_timeline_tail()
+    return data
+
+register_posting_hook(index_transaction_times)
+
+def time_bound(value, end_of_day=False):
+    """Timestamp/date as int64 ns; a date-only end bound covers the whole day"""
+    bound = pd.Timestamp(value)
+    if end_of_day and len(str(value)) <= 10:
+        bound += pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    return bound.value
+
+def transactions_between(data, start=None, end=None, account=None):
+    """Ledger rows with start <= Timestamp <= end, oldest first, for one account or all.
+
+    Bounds are inclusive; a date-only end covers that whole day. None leaves
+    the side open.
+    """
+    tl = current_timeline(data)
+    lo_t = np.iinfo(np.int64).min if start is None else time_bound(start)
+    hi_t = np.iinfo(np.int64).max if end is None else time_bound(end, end_of_day=True)
+
+    if account is None:
+        ts, pos = tl['ts'], tl['pos']
+    else:
+        lo = np.searchsorted(tl['acc'], account, side='left')
+        hi = np.searchsorted(tl['acc'], account, side='right')
+        ts, pos = tl['acc_ts'][lo:hi], tl['acc_pos'][lo:hi]
+
+    i = np.searchsorted(ts, lo_t, side='left')
+    j = np.searchsorted(ts, hi_t, side='right')
+    ts, pos = ts[i:j], pos[i:j]
+
+    # Unmerged postings: a linear scan of the (short) tail, then one ordering pass
+    tail_acc, tail_ts, tail_pos = timeline_tail()
+    if len(tail_pos):
+        keep = (tail_ts >= lo_t) & (tail_ts <= hi_t)
+        if account is not None:
+            keep &= tail_acc == account
+        ts, pos = np.r_[ts, tail_ts[keep]], np.r_[pos, tail_pos[keep]]
+        pos = pos[np.lexsort((pos, ts))]
+    result = data['transactions'].iloc[pos]
+
+    # Reaches back past the hot window: pull only the overlapping cold months
+    hot_start = archive_manifest()['hot_start']
+    if hot_start is not None and lo_t < time_bound(hot_start):
+        cold_end = end if end is not None and hi_t < time_bound(hot_start) else hot_start
+        cold = archived_transactions(start, cold_end, account)
+        if not cold.empty:
+            result = pd.concat([cold, result], ignore_index=True)
+    return result
+
+# --- Point-in-Time Balances ---
+
+# Prefix sums of signed amounts over the (account, time) view, plus an int64
+# composite key (account rank * span + seconds) so one searchsorted finds
+# "last entry of account A at or before T" for any number of accounts.
+# Balances are anchored to accounts.Balance and rolled back through the ledger:
+#   as_of(A, T) = Balance(A) - (net movement of A after T)
+# Rebuilt lazily after postings; undated legacy rows count as before any T.
+_balance_index = {'generation': -1}
+
+def signed_amounts(txns):
+    """Ledger amounts signed by DebitCredit (credit +, debit -, other 0)"""
+    amount = pd.to_numeric(txns['Amount'], errors='coerce').fillna(0)
+    return pd.Series(np.select([txns['DebitCredit'] == 'Credit', txns['DebitCredit'] == 'Debit'],
+                               [amount, -amount], 0.0), index=txns.index)
+
+def balance_index(data):
+    """Prefix-sum index over the account/time view, rebuilt if the ledger moved"""
+    tl = current_timeline(data, merged=True)
+    if _balance_index['generation'] == tl['generation']:
+        return _balance_index
+
+    acc, ts = tl['acc'], tl['acc_ts']
+    signed = signed_amounts(data['transactions']).values[tl['acc_pos']]
+    codes = np.r_[0, np.cumsum(acc[1:] != acc[:-1])] if len(acc) else np.zeros(0, dtype=np.int64)
+
+    dated = ts != np.iinfo(np.int64).min
+    seconds = ts // 10**9
+    base = seconds[dated].min() - 1 if dated.any() else 0
+    span = (seconds[dated].max() - base + 1) if dated.any() else 1
+    _balance_index.update({
+        'generation': tl['generation'], 'base': base, 'span': span, 'codes': codes,
+        'key': codes * span + np.where(dated, seconds - base, 0),
+        'cum': np.r_[0.0, np.cumsum(signed)]
+    })
+    return _balance_index
+
+def balances_as_of_many(data, whens, accounts=None):
+    """Balances of every account (or the given ones) at each of `whens`.
+
+    Returns a frame indexed by AccountNumber with one column per `when`; a
+    date-only `when` means end of that day. O(log n) per account per column.
+    """
+    idx = balance_index(data)
+    tl = _txn_timeline
+    accs = data['accounts'].drop_duplicates('AccountNumber')
+    if accounts is not None:
+        accs = accs[accs['AccountNumber'].isin(accounts)]
+    names = accs['AccountNumber'].astype(str).values.astype(object)
+    balance = pd.to_numeric(accs['Balance'], errors='coerce').fillna(0).values
+
+    # Account block lookup is shared by every column
+    lo = np.searchsorted(tl['acc'], names, side='left')
+    hi = np.searchsorted(tl['acc'], names, side='right')
+    found = hi > lo
+    code = idx['codes'][np.minimum(lo, len(idx['codes']) - 1)] if len(idx['codes']) else np.zeros(len(names), dtype=np.int64)
+
+    # Cold movement between a `when` and the hot window also has to be rolled
+    # back: read the archive once, from the earliest `when` onwards
+    bounds = [time_bound(when, end_of_day=True) for when in whens]
+    hot_start = archive_manifest()['hot_start']
+    cold = None
+    if hot_start is not None and bounds and min(bounds) < time_bound(hot_start):
+        cold = archived_transactions(pd.Timestamp(min(bounds) + 1), hot_start)
+        cold_ts, cold_signed = cold['Timestamp'].values.view('int64'), signed_amounts(cold)
+
+    columns = {}
+    for when, bound in zip(whens, bounds):
+        offset = np.clip(bound // 10**9 - idx['base'], 0, idx['span'] - 1)
+        upto = np.searchsorted(idx['key'], code * idx['span'] + offset, side='right')
+        columns[when] = balance - np.where(found, idx['cum'][hi] - idx['cum'][np.clip(upto, lo, hi)], 0.0)
+        if cold is not None and bound < time_bound(hot_start):
+            after = cold_ts > bound
+            moved = cold_signed[after].groupby(cold.loc[after, 'AccountNumber']).sum()
+            columns[when] = columns[when] - pd.Series(names).map(moved).fillna(0).values
+    return pd.DataFrame(columns, index=pd.Index(names, name='AccountNumber'))
+
+def balances_as_of(data, when, accounts=None):
+    """Balance of every account (or the given ones) at `when`"""
+    return balances_as_of_many(data, [when], accounts).iloc[:, 0]
+
+def balance_as_of(data, account, when):
+    """Balance of one account at `when` (None if the account does not exist)"""
+    balances = balances_as_of(data, when, [account])
+    return float(balances.iloc[0]) if not balances.empty else None
+
+def average_balances(data, start, end, accounts=None):
+    """Average end-of-day balance per account over [start, end]"""
+    days = pd.date_range(start, end, freq='D').strftime('%Y-%m-%d')
+    return balances_as_of_many(data, list(days), accounts).mean(axis=1)
+
+# ==========================================
+# SECTION 3C: TRANSACTION ARCHIVE (HOT/COLD)
+# ==========================================
+
+# Old months of the ledger live in read-only CSV partitions under
+# ARCHIVE_DIR/<YYYY-MM>/part-*.csv; only the hot window stays in
+# data['transactions']. The manifest records per-month row counts and
+# volumes, plus hot_start (everything dated before it is cold). A carry file
+# holds each account's archived net movement and row count so balance
+# checks and scores don't need to open the partitions.
+#
+# A run writes partitions and a new carry file, then swaps in a manifest that
+# lists them under 'pending', then saves the trimmed hot ledger. The saved
+# trim is the commit point: until it is on disk the run stays pending, and
+# startup drops any hot rows the pending partitions already hold, so a crash
+# at any step neither loses nor double-counts rows.
+_archive = {'manifest': None, 'carry': None, 'partitions': {}}
+
+def archive_manifest():
+    """Archive manifest (empty defaults when nothing has been archived)"""
+    if _archive['manifest'] is None:
+        path = os.path.join(ARCHIVE_DIR, 'manifest.json')
+        manifest = {'partitions': {}, 'rows': 0, 'valid_rows': 0, 'credit': 0.0, 'debit': 0.0, 'hot_start': None}
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest.update(json.load(f))
+        _archive['manifest'] = manifest
+    return _archive['manifest']
+
+def archive_carry():
+    """Archived net movement and row count per account"""
+    if _archive['carry'] is None:
+        path = os.path.join(ARCHIVE_DIR, archive_manifest().get('carry', 'accounts.csv'))
+        if os.path.exists(path):
+            _archive['carry'] = pd.read_csv(path, dtype={'AccountNumber': str}).set_index('AccountNumber')
+        else:
+            _archive['carry'] = pd.DataFrame({'Net': pd.Series(dtype=float), 'Count': pd.Series(dtype=int)},
+                                             index=pd.Index([], name='AccountNumber', dtype=str))
+    return _archive['carry']
+
+def load_archive_partition(month):
+    """All rows of one archived month with their Timestamp (cached; partitions never change)"""
+    if month not in _archive['partitions']:
+        parts = [pd.read_csv(os.path.join(ARCHIVE_DIR, part), dtype={'TransactionID': str, 'AccountNumber': str})
+                 for part in archive_manifest()['partitions'][month]['parts']]
+        rows = pd.concat(parts, ignore_index=True).reindex(columns=SCHEMAS['transactions'])
+        rows['Timestamp'] = transaction_timestamps(rows)
+        _archive['partitions'][month] = rows
+    return _archive['partitions'][month]
+
+def archived_transactions(start=None, end=None, account=None):
+    """Archived rows with start <= Timestamp <= end (same bounds as transactions_between)"""
+    months = sorted(archive_manifest()['partitions'])
+    if start is not None:
+        months = [m for m in months if m >= pd.Timestamp(start).strftime('%Y-%m')]
+    if end is not None:
+        months = [m for m in months if m <= pd.Timestamp(end).strftime('%Y-%m')]
+    if not months:
+        return pd.DataFrame(columns=SCHEMAS['transactions'] + ['Timestamp'])
+
+    rows = pd.concat([load_archive_partition(m) for m in months], ignore_index=True)
+    ts = rows['Timestamp'].values.view('int64')
+    keep = np.ones(len(rows), dtype=bool)
+    if start is not None:
+        keep &= ts >= time_bound(start)
+    if end is not None:
+        keep &= ts <= time_bound(end, end_of_day=True)
+    if account is not None:
+        keep &= (rows['AccountNumber'] == account).values
+    return rows[keep].sort_values('Timestamp', kind='stable').reset_index(drop=True)
+
+def ledger_since(data, start=None):
+    """Hot ledger plus any archived rows dated on/after `start` (None: full history)"""
+    hot_start = archive_manifest()['hot_start']
+    if hot_start is None or (start is not None and start >= hot_start):
+        return data['transactions']
+    return pd.concat([archived_transactions(start), data['transactions']], ignore_index=True)
+
+def archived_row_count():
+    """Rows moved out of the hot ledger (keeps TXN numbering continuous)"""
+    return archive_manifest()['rows']
+
+def write_archive_manifest(manifest):
+    """Atomically replace the manifest (the switch that makes new partitions visible)"""
+    path = os.path.join(ARCHIVE_DIR, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+    _archive['manifest'] = manifest
+
+def commit_archive_run(manifest):
+    """The trimmed ledger is on disk: clear the pending run and drop the superseded carry file"""
+    pending = manifest.pop('pending', None)
+    write_archive_manifest(manifest)
+    if pending and pending.get('replaced') not in (None, manifest.get('carry')):
+        path = os.path.join(ARCHIVE_DIR, pending['replaced'])
+        if os.path.exists(path):
+            os.remove(path)
+
+def reconcile_archive(data):
+    """Startup: finish an archive run whose trimmed ledger never reached disk"""
+    manifest = archive_manifest()
+    if not manifest.get('pending'):
+        return data
+
+    archived = pd.concat([pd.read_csv(os.path.join(ARCHIVE_DIR, part), usecols=['TransactionID'], dtype=str)
+                          for part in manifest['pending']['parts']], ignore_index=True)['TransactionID']
+    overlap = data['transactions']['TransactionID'].astype(str).isin(archived)
+    if overlap.any():
+        data['transactions'] = data['transactions'][~overlap].reset_index(drop=True)
+        print(f"{Colors.YELLOW}Interrupted archive run: dropped {int(overlap.sum())} hot rows already archived{Colors.END}")
+        data = log_audit(data, 'ARCHIVE_RECOVERED', f"{int(overlap.sum())} archived rows removed from the hot ledger")
+        request_save(data)
+        if not flush_saves():
+            return data
+    commit_archive_run(manifest)
+    return data
+
+def archive_transactions(data, days=ARCHIVE_AFTER_DAYS):
+    """Move whole months older than `days` into read-only monthly partitions"""
+    print(f"\n{Colors.CYAN}--- Archive Old Transactions ---{Colors.END}")
+    cutoff = (pd.Timestamp(get_date()) - pd.Timedelta(days=days)).replace(day=1)
+    txns = data['transactions']
+    stamps = transaction_timestamps(txns)
+    cold = stamps.notna() & (stamps < cutoff)
+    if not cold.any():
+        print(f"No transactions before {cutoff.date()} to archive.")
+        return data
+
+    rows = txns[cold].drop(columns=DERIVED_COLUMNS['transactions'], errors='ignore')
+    months = stamps[cold].dt.strftime('%Y-%m')
+    manifest = copy.deepcopy(archive_manifest())
+    pending = manifest.setdefault('pending', {'parts': [], 'replaced': manifest.get('carry', 'accounts.csv')})
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # New files first; nothing refers to them until the manifest is swapped in
+    for month, group in rows.groupby(months.values):
+        os.makedirs(os.path.join(ARCHIVE_DIR, month), exist_ok=True)
+        part = os.path.join(month, f"part-{stamp}.csv")
+        group.to_csv(os.path.join(ARCHIVE_DIR, part), index=False)
+        os.chmod(os.path.join(ARCHIVE_DIR, part), 0o444)
+        entry = manifest['partitions'].setdefault(month, {'parts': [], 'rows': 0})
+        entry['parts'].append(part)
+        entry['rows'] += len(group)
+        pending['parts'].append(part)
+        _archive['partitions'].pop(month, None)
+
+    amounts = pd.to_numeric(rows['Amount'], errors='coerce')
+    signed = signed_amounts(rows)
+    moved = pd.DataFrame({'Net': signed.groupby(rows['AccountNumber']).sum(),
+                          'Count': rows['AccountNumber'].value_counts()})
+    carry = archive_carry().add(moved, fill_value=0)
+    carry.index.name = 'AccountNumber'
+    manifest['carry'] = f"accounts-{stamp}.csv"
+    carry.reset_index().to_csv(os.path.join(ARCHIVE_DIR, manifest['carry']), index=False)
+
+    manifest['rows'] += len(rows)
+    manifest['valid_rows'] += int(amounts.notna().sum())
+    manifest['credit'] += float(amounts[rows['DebitCredit'] == 'Credit'].sum())
+    manifest['debit'] += float(amounts[rows['DebitCredit'] == 'Debit'].sum())
+    manifest['hot_start'] = max(manifest['hot_start'] or '', cutoff.strftime('%Y-%m-%d'))
+    write_archive_manifest(manifest)
+    _archive['carry'] = carry
+
+    data['transactions'] = txns[~cold].reset_index(drop=True)
+    rebuild_transaction_timeline(data)
+    print(f"{Colors.GREEN}✓ Archived {len(rows)} transactions from {months.nunique()} months (before {cutoff.date()}){Colors.END}")
+    print(f"  Hot ledger: {len(data['transactions'])} transactions")
+    data = log_audit(data, 'ARCHIVE', f"{len(rows)} transactions before {cutoff.date()} archived")
+
+    # Commit point: the run only completes once the trimmed ledger is on disk
+    request_save(data)
+    if flush_saves():
+        commit_archive_run(manifest)
+    else:
+        print(f"{Colors.YELLOW}Trimmed ledger not saved yet; the archive run completes at next startup{Colors.END}")
+    return data
+
+# ==========================================
+# SECTION 3B: TRANSACTION MONITORING (AML)
+# ==========================================
+
+# Each rule is written once against a row of window features and works both
+# on a single posting (dict of scalars) and on the backfill frame (Series)
+
+def aml_large_transaction(e):
+    """Single posting at or above the reporting threshold"""
+    return e['Amount'] >= LARGE_TRANSACTION_THRESHOLD
+
+def aml_structuring(e):
+    """Repeated amounts just under the threshold within the window"""
+    return e['Near'] & (e['NearCount'] >= AML_STRUCTURING_COUNT)
+
+def aml_rapid_movement(e):
+    """Debit that moves most of the window's inflow straight back out"""
+    return (e['IsDebit'] & (e['CreditTotal'] >= AML_RAPID_MOVEMENT_MIN)
+            & (e['DebitTotal'] >= AML_RAPID_MOVEMENT_RATIO * e['CreditTotal']))
+
+def aml_counterparty_fanout(e):
+    """Too many first-time counterparties within the window"""
+    return e['NewCounterparty'] & (e['NewCounterparties'] >= AML_COUNTERPARTY_LIMIT)
+
+AML_RULES = {
+    'LARGE_TRANSACTION': aml_large_transaction,
+    'STRUCTURING': aml_structuring,
+    'RAPID_MOVEMENT': aml_rapid_movement,
+    'COUNTERPARTY_FANOUT': aml_counterparty_fanout
+}
+
+def register_aml_rule(name, rule):
+    """Add a monitoring rule: rule(features) -> bool (scalar or Series)"""
+    AML_RULES[name] = rule
+
+class AccountWindow:
+    """Sliding AML_WINDOW_HOURS of activity for one account with running totals"""
+
+    def __init__(self):
+        self.events = deque()
+        self.last_seen = {}
+        self.credit_total = 0.0
+        self.debit_total = 0.0
+        self.near_count = 0
+        self.new_counterparties = 0
+
+    def add(self, ts, amount, is_debit, counterparty):
+        """Slide the window to ts, add one posting and return its features"""
+        horizon = ts - AML_WINDOW_HOURS * 3600
+        while self.events and self.events[0][0] <= horizon:
+            old_ts, old_amount, old_debit, old_near, old_new, old_cp = self.events.popleft()
+            if old_debit:
+                self.debit_total -= old_amount
+            else:
+                self.credit_total -= old_amount
+            self.near_count -= old_near
+            self.new_counterparties -= old_new
+            if old_cp and self.last_seen.get(old_cp) == old_ts:
+                del self.last_seen[old_cp]
+
+        near = is_near_threshold(amount)
+        new_cp = False
+        if counterparty:
+            last = self.last_seen.get(counterparty)
+            new_cp = last is None or last <= horizon
+            self.last_seen[counterparty] = ts
+
+        self.events.append((ts, amount, is_debit, near, new_cp, counterparty))
+        if is_debit:
+            self.debit_total += amount
+        else:
+            self.credit_total += amount
+        self.near_count += near
+        self.new_counterparties += new_cp
+
+        return {
+            'Amount': amount, 'IsDebit': is_debit, 'Near': near, 'NewCounterparty': new_cp,
+            'CreditTotal': self.credit_total, 'DebitTotal': self.debit_total,
+            'NearCount': self.near_count, 'NewCounterparties': self.new_counterparties
+        }
+
+    def reset(self, features):
+        """Reload from one account's compute_aml_features rows (oldest first)"""
+        self.__init__()
+        if features.empty:
+            return
+        kept = features[features['Seconds'] > features['Seconds'].iloc[-1] - AML_WINDOW_HOURS * 3600]
+        for ts, amount, is_debit, near, new_cp, cp in zip(
+                kept['Seconds'], kept['Amount'], kept['IsDebit'], kept['Near'],
+                kept['NewCounterparty'], kept['Counterparty']):
+            cp = cp if isinstance(cp, str) else None
+            self.events.append((ts, amount, bool(is_debit), bool(near), bool(new_cp), cp))
+            if is_debit:
+                self.debit_total += amount
+            else:
+                self.credit_total += amount
+            self.near_count += bool(near)
+            self.new_counterparties += bool(new_cp)
+            if cp:
+                self.last_seen[cp] = ts
+
+# Windows only slide forward. A posting dated before its account's newest
+# window entry, or before 'since' (older ledger rows were not loaded at
+# startup), is screened by replaying that account's recent ledger instead.
+_aml_windows = {}
+_aml_warm = {'since': None}
+
+def is_near_threshold(amount):
+    """Amount just under LARGE_TRANSACTION_THRESHOLD (possible structuring)"""
+    return (amount >= LARGE_TRANSACTION_THRESHOLD * (1 - AML_STRUCTURING_BAND)) & (amount < LARGE_TRANSACTION_THRESHOLD)
+
+def prepare_aml_frame(txns):
+    """Normalize ledger rows for monitoring: epoch seconds, amount, direction, counterparty"""
+    txns = txns[~txns['TransactionType'].isin(AML_EXEMPT_TYPES)]
+    stamp = txns['Date'].astype(str) + ' ' + txns['Time'].fillna('00:00:00').astype(str)
+    ts = pd.to_datetime(stamp, format='%Y-%m-%d %H:%M:%S', errors='coerce')
+
+    frame = pd.DataFrame({
+        'TransactionID': txns['TransactionID'].astype(str),
+        'AccountNumber': txns['AccountNumber'].astype(str),
+        'Seconds': ts,
+        'Amount': pd.to_numeric(txns['Amount'], errors='coerce'),
+        'IsDebit': txns['DebitCredit'].eq('Debit'),
+        'Counterparty': txns['Remarks'].astype(str).str.extract(r'(?:to|from) (ACC\d+)', expand=False)
+    }).dropna(subset=['Seconds', 'Amount'])
+    frame['Seconds'] = frame['Seconds'].values.astype('datetime64[s]').astype('int64')
+    return frame
+
+def format_aml_alerts(rule, alerts):
+    """Audit details for alerted rows (stable text, used to de-duplicate re-runs)"""
+    return ('[' + rule + '] ' + alerts['TransactionID'] + ' ' + alerts['AccountNumber']
+            + ' ₹' + alerts['Amount'].map('{:,.2f}'.format))
+
+def stream_aml_features(data, txns):
+    """Window features of each new posting in O(1) per row; out-of-order accounts are replayed"""
+    frame = prepare_aml_frame(txns)
+    since = _aml_warm['since']
+    late = set(frame.loc[frame.groupby('AccountNumber')['Seconds'].diff() < 0, 'AccountNumber'])
+
+    rows = []
+    for txn_id, acc_num, ts, amount, is_debit, cp in zip(
+            frame['TransactionID'], frame['AccountNumber'], frame['Seconds'],
+            frame['Amount'], frame['IsDebit'], frame['Counterparty']):
+        if acc_num in late:
+            continue
+        window = _aml_windows.setdefault(acc_num, AccountWindow())
+        if (since is not None and ts < since) or (window.events and ts < window.events[-1][0]):
+            late.add(acc_num)
+            continue
+        features = window.add(ts, amount, bool(is_debit), cp if isinstance(cp, str) else None)
+        rows.append({'TransactionID': txn_id, 'AccountNumber': acc_num, **features})
+
+    features = pd.DataFrame(rows)
+    if late:
+        replayed = replay_aml_windows(data, frame[frame['AccountNumber'].isin(late)])
+        features = pd.concat([features, replayed], ignore_index=True) if rows else replayed
+    return features
+
+def replay_aml_windows(data, batch):
+    """Features of out-of-order postings from their accounts' recent ledger; resets those windows"""
+    start = pd.Timestamp(int(batch['Seconds'].min()) - 2 * AML_WINDOW_HOURS * 3600, unit='s')
+    history = pd.concat([transactions_between(data, start, account=acc)
+                         for acc in batch['AccountNumber'].unique()], ignore_index=True)
+    features = compute_aml_features(prepare_aml_frame(history))
+    load_aml_windows(features)
+    return features[features['TransactionID'].isin(batch['TransactionID'])].reset_index(drop=True)
+
+def load_aml_windows(features):
+    """Reset each account's window from its compute_aml_features rows"""
+    for acc_num, rows in features.groupby('AccountNumber', sort=False):
+        _aml_windows.setdefault(acc_num, AccountWindow()).reset(rows)
+
+def screen_postings(data, txns):
+    """Posting hook: run every AML rule over each new posting's window features"""
+    features = stream_aml_features(data, txns)
+    if features.empty:
+        return data
+
+    for rule, check in AML_RULES.items():
+        flagged = features[check(features)]
+        if not flagged.empty:
+            data = log_audit_batch(data, 'AML_ALERT', format_aml_alerts(rule, flagged), status='Flagged')
+    return data
+
+def rebuild_aml_state(data):
+    """Warm the sliding windows from recent ledger (startup)"""
+    _aml_windows.clear()
+    _aml_warm['since'] = None
+    if data['transactions'].empty:
+        return
+    # Window features need one window of history, counterparty sightings a second
+    reach = 2 * AML_WINDOW_HOURS * 3600
+    frame = prepare_aml_frame(data['transactions'])
+    older = frame['Seconds'] <= int(datetime.now().timestamp()) - reach
+    latest_unloaded = [int(frame.loc[older, 'Seconds'].max())] if older.any() else []
+    hot_start = archive_manifest()['hot_start']
+    if hot_start is not None:
+        latest_unloaded.append(int(pd.Timestamp(hot_start).timestamp()))
+    if latest_unloaded:
+        _aml_warm['since'] = max(latest_unloaded) + reach
+    load_aml_windows(compute_aml_features(frame[~older]))
+
+def compute_aml_features(frame):
+    """Vectorized window features for the whole ledger (same semantics as AccountWindow)"""
+    window = AML_WINDOW_HOURS * 3600
+    frame = frame.sort_values(['AccountNumber', 'Seconds'], kind='stable').reset_index(drop=True)
+    if frame.empty:
+        return frame.assign(NewCounterparty=False, Near=False, DebitTotal=0.0, CreditTotal=0.0,
+                            NearCount=0, NewCounterparties=0)
+
+    # Previous sighting of the same counterparty by the same account
+    prev_seen = frame.groupby(['AccountNumber', 'Counterparty'])['Seconds'].shift()
+    frame['NewCounterparty'] = frame['Counterparty'].notna() & (
+        prev_seen.isna() | (prev_seen <= frame['Seconds'] - window))
+    frame['Near'] = is_near_threshold(frame['Amount'])
+
+    # Window start per row via binary search on a composite (account, time) key
+    acc_code = pd.factorize(frame['AccountNumber'])[0].astype('int64')
+    rel = (frame['Seconds'] - frame['Seconds'].min()).to_numpy()
+    span = int(rel.max()) + window + 1
+    key = acc_code * span + rel
+    start = np.searchsorted(key, key - window, side='right')
+
+    def window_sum(values):
+        cs = np.concatenate([[0], np.cumsum(values)])
+        return cs[np.arange(1, len(values) + 1)] - cs[start]
+
+    amount = frame['Amount'].to_numpy(dtype=float)
+    is_debit = frame['IsDebit'].to_numpy(dtype=bool)
+    frame['DebitTotal'] = window_sum(np.where(is_debit, amount, 0.0))
+    frame['CreditTotal'] = window_sum(np.where(is_debit, 0.0, amount))
+    frame['NearCount'] = window_sum(frame['Near'].to_numpy(dtype='int64'))
+    frame['NewCounterparties'] = window_sum(frame['NewCounterparty'].to_numpy(dtype='int64'))
+    return frame
+
+def run_aml_backfill(data):
+    """Run every AML rule over the full transaction history (archive included) in one vectorized pass"""
+    print(f"\n{Colors.CYAN}--- AML Backfill Scan ---{Colors.END}")
+    ledger = ledger_since(data)
+    if ledger.empty:
+        print("No transactions to scan.")
+        return data
+
+    frame = prepare_aml_frame(ledger)
+    if frame.empty:
+        print("No transactions to scan.")
+        return data
+    frame = compute_aml_features(frame)
+
+    existing = set(data['audit'].loc[data['audit']['Action'] == 'AML_ALERT', 'Details'].astype(str))
+    archived = len(ledger) - len(data['transactions'])
+    print(f"Scanned: {len(frame)} transactions" + (f" (incl. {archived} archived)" if archived else ""))
+    for rule, check in AML_RULES.items():
+        flagged = frame[check(frame)]
+        details = format_aml_alerts(rule, flagged) if not flagged.empty else pd.Series(dtype=str)
+        new_details = details[~details.isin(existing)]
+        data = log_audit_batch(data, 'AML_ALERT', new_details, status='Flagged')
+        print(f"  {rule:<22} {len(flagged):>6} alerts ({len(new_details)} new)")
+    return data
+
+register_posting_hook(screen_postings)
+
 # ==========================================
 # SECTION 4: CORE FEATURES
 # ==========================================
@@ -537,7 +2067,7 @@ def open_account(data):
     
     new_acc = {
         'AccountNumber': acc_num, 'CustomerID': customer_id, 'AccountType': acc_type,
-        'Balance': amount, 'MinBalance': min_bal, 'InterestRate': rate,
+        'Balance': 0.0, 'MinBalance': min_bal, 'InterestRate': rate,  # credited by the opening posting
         'OpeningDate': get_date(), 'MaturityDate': '', 'Status': 'Active',
         'LastInterestCredited': get_date()
     }
@@ -546,13 +2076,12 @@ def open_account(data):
     
     # Log Transaction
     txn = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
         'AccountNumber': acc_num, 'TransactionType': 'Account Opening',
         'Amount': amount, 'DebitCredit': 'Credit', 'Balance_After': amount,
         'Date': get_date(), 'Time': datetime.now().strftime("%H:%M:%S"),
         'Remarks': 'Initial Deposit', 'Status': 'Success'
     }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn])], ignore_index=True)
+    data = post_transactions(data, pd.DataFrame([txn]))
     
     print(f"{Colors.GREEN}✓ Account {acc_num} opened!{Colors.END}")
     return data
@@ -583,16 +2112,14 @@ def deposit_money(data):
     
     idx = acc.index[0]
     new_bal = data['accounts'].at[idx, 'Balance'] + amount
-    data['accounts'].at[idx, 'Balance'] = new_bal
     
     txn = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
         'AccountNumber': acc_num, 'TransactionType': 'Deposit',
         'Amount': amount, 'DebitCredit': 'Credit', 'Balance_After': new_bal,
         'Date': get_date(), 'Time': datetime.now().strftime("%H:%M:%S"),
         'Remarks': 'Cash Deposit', 'Status': 'Success'
     }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn])], ignore_index=True)
+    data = post_transactions(data, pd.DataFrame([txn]))
     print(f"{Colors.GREEN}✓ Deposited ₹{amount}. New Balance: ₹{new_bal:.2f}{Colors.END}")
     return data
 
@@ -613,18 +2140,21 @@ def withdraw_money(data):
     if current_bal - amount < min_bal:
         print(f"{Colors.RED}Insufficient balance (Min: ₹{min_bal}){Colors.END}")
         return data
+    
+    used_today = get_daily_usage('withdrawal', acc_num)
+    if used_today + amount > DAILY_WITHDRAWAL_LIMIT:
+        print(f"{Colors.RED}Exceeds daily withdrawal limit of ₹{DAILY_WITHDRAWAL_LIMIT:,} (used today: ₹{used_today:,.2f}){Colors.END}")
+        return data
         
     new_bal = current_bal - amount
-    data['accounts'].at[idx, 'Balance'] = new_bal
     
     txn = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
         'AccountNumber': acc_num, 'TransactionType': 'Withdrawal',
         'Amount': amount, 'DebitCredit': 'Debit', 'Balance_After': new_bal,
         'Date': get_date(), 'Time': datetime.now().strftime("%H:%M:%S"),
         'Remarks': 'Cash Withdrawal', 'Status': 'Success'
     }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn])], ignore_index=True)
+    data = post_transactions(data, pd.DataFrame([txn]))
     print(f"{Colors.GREEN}✓ Withdrawn ₹{amount}. New Balance: ₹{new_bal:.2f}{Colors.END}")
     return data
 
@@ -657,6 +2187,7 @@ def apply_loan(data):
     }
     
     data['loans'] = pd.concat([data['loans'], pd.DataFrame([new_loan])], ignore_index=True)
+    invalidate_credit_scores([cust_id])
     data = log_audit(data, 'LOAN_APPLIED', f'Loan {loan_id} for ₹{amount}')
     print(f"{Colors.GREEN}✓ Loan {loan_id} approved! EMI: ₹{emi:.2f}{Colors.END}")
     return data
@@ -693,6 +2224,13 @@ def pay_loan_emi(data):
     interest_part = outstanding * monthly_rate
     principal_part = min(emi - interest_part, outstanding)
     
+    # An EMI that does not cover the month's interest would grow the loan
+    if principal_part <= 0:
+        print(f"{Colors.RED}EMI ₹{emi:.2f} does not cover this month's interest (₹{interest_part:.2f}); "
+              f"restructure the loan before collecting{Colors.END}")
+        data = log_audit(data, 'EMI_REJECTED', f'EMI ₹{emi} below interest ₹{interest_part:.2f} for {loan_id}', status='Failed')
+        return data
+    
     new_outstanding = outstanding - principal_part
     
     # Record payment
@@ -712,6 +2250,7 @@ def pay_loan_emi(data):
     # Update loan outstanding
     idx = loan.index[0]
     data['loans'].at[idx, 'OutstandingAmount'] = round(new_outstanding, 2)
+    touch_tables('loans')
     
     # Close loan if fully paid
     if new_outstanding <= 0:
@@ -720,6 +2259,7 @@ def pay_loan_emi(data):
     else:
         print(f"{Colors.GREEN}✓ EMI paid! Outstanding: ₹{new_outstanding:.2f}{Colors.END}")
     
+    invalidate_credit_scores([loan_row['CustomerID']])
     data = log_audit(data, 'EMI_PAID', f'EMI ₹{emi} for {loan_id}')
     return data
 
@@ -785,6 +2325,29 @@ def view_loan_details(data):
     else:
         print("\nNo payments recorded yet.")
 
+def view_amortization_schedule(data):
+    """Show the full amortization schedule for a loan"""
+    print(f"\n{Colors.CYAN}--- Amortization Schedule ---{Colors.END}")
+    loan_id = input("Enter Loan ID: ").strip()
+    
+    loan = data['loans'][data['loans']['LoanID'] == loan_id]
+    if loan.empty:
+        print("Loan not found.")
+        return
+    
+    schedule = amortization_frame(
+        pd.to_numeric(loan['PrincipalAmount'], errors='coerce').fillna(0),
+        pd.to_numeric(loan['InterestRate'], errors='coerce').fillna(0),
+        loan_tenure(loan),
+        loan_ids=loan['LoanID']
+    )
+    if schedule.empty:
+        print("No tenure recorded for this loan.")
+        return
+    
+    print(schedule.drop(columns=['LoanID']).to_string(index=False))
+    print(f"\nTotal Interest: ₹{schedule['Interest'].sum():,.2f}")
+
 # ==========================================
 # SECTION 5: FUND TRANSFER SYSTEM
 # ==========================================
@@ -825,8 +2388,9 @@ def transfer_funds(data):
         print(f"{Colors.RED}Insufficient balance. Min balance: ₹{min_bal}{Colors.END}")
         return data
     
-    if amount > DAILY_TRANSFER_LIMIT:
-        print(f"{Colors.RED}Exceeds daily transfer limit of ₹{DAILY_TRANSFER_LIMIT:,}{Colors.END}")
+    used_today = get_daily_usage('transfer', from_acc)
+    if used_today + amount > DAILY_TRANSFER_LIMIT:
+        print(f"{Colors.RED}Exceeds daily transfer limit of ₹{DAILY_TRANSFER_LIMIT:,} (used today: ₹{used_today:,.2f}){Colors.END}")
         return data
     
     # Process transfer
@@ -835,9 +2399,6 @@ def transfer_funds(data):
     new_from_bal = from_bal - amount
     new_to_bal = data['accounts'].at[to_idx, 'Balance'] + amount
     
-    data['accounts'].at[from_idx, 'Balance'] = new_from_bal
-    data['accounts'].at[to_idx, 'Balance'] = new_to_bal
-    
     # Generate transfer reference
     transfer_ref = f"TRF{datetime.now().strftime('%Y%m%d%H%M%S')}"
     
@@ -856,9 +2417,8 @@ def transfer_funds(data):
     }
     data['transfers'] = pd.concat([data['transfers'], pd.DataFrame([transfer_record])], ignore_index=True)
     
-    # Create debit transaction for sender
+    # Create debit transaction for sender and credit transaction for receiver
     txn_debit = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
         'AccountNumber': from_acc,
         'TransactionType': 'Fund Transfer',
         'Amount': amount,
@@ -869,11 +2429,7 @@ def transfer_funds(data):
         'Remarks': f'Transfer to {to_acc} Ref:{transfer_ref}',
         'Status': 'Success'
     }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn_debit])], ignore_index=True)
-    
-    # Create credit transaction for receiver
     txn_credit = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
         'AccountNumber': to_acc,
         'TransactionType': 'Fund Transfer',
         'Amount': amount,
@@ -884,7 +2440,7 @@ def transfer_funds(data):
         'Remarks': f'Transfer from {from_acc} Ref:{transfer_ref}',
         'Status': 'Success'
     }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn_credit])], ignore_index=True)
+    data = post_transactions(data, pd.DataFrame([txn_debit, txn_credit]))
     
     print(f"{Colors.GREEN}✓ Transfer Successful!{Colors.END}")
     print(f"Reference: {transfer_ref}")
@@ -1185,8 +2741,13 @@ def issue_cheque(data):
     data = log_audit(data, 'CHEQUE_ISSUED', f'Cheque {cheque_num} for ₹{amount}')
     return data
 
+def get_clearance_date(deposit_date):
+    """Due date for a deposited cheque: CHEQUE_CLEARANCE_DAYS business days later"""
+    due = np.busday_offset(np.datetime64(deposit_date, 'D'), CHEQUE_CLEARANCE_DAYS, roll='forward')
+    return str(due)
+
 def deposit_cheque(data):
-    """Deposit/Clear a cheque"""
+    """Deposit a cheque into the clearing queue"""
     print(f"\n{Colors.CYAN}--- Deposit Cheque ---{Colors.END}")
     
     cheque_num = input("Cheque Number: ").strip()
@@ -1209,72 +2770,22 @@ def deposit_cheque(data):
         print(f"{Colors.RED}Destination account not found{Colors.END}")
         return data
     
-    # Check if source account has sufficient balance
-    from_acc = cheque_row['AccountNumber']
-    from_account = data['accounts'][data['accounts']['AccountNumber'] == from_acc]
-    from_idx = from_account.index[0]
-    from_bal = data['accounts'].at[from_idx, 'Balance']
-    min_bal = data['accounts'].at[from_idx, 'MinBalance']
-    amount = cheque_row['Amount']
-    
-    if from_bal - amount < min_bal:
-        # Bounce the cheque
-        idx = cheque.index[0]
-        data['cheques'].at[idx, 'Status'] = 'Bounced'
-        data['cheques'].at[idx, 'Remarks'] = 'Insufficient funds'
-        print(f"{Colors.RED}Cheque bounced! Insufficient funds in issuer account.{Colors.END}")
-        data = log_audit(data, 'CHEQUE_BOUNCED', f'Cheque {cheque_num} bounced')
-        return data
-    
-    # Process cheque clearance
-    # Debit from source
-    new_from_bal = from_bal - amount
-    data['accounts'].at[from_idx, 'Balance'] = new_from_bal
+    # Queue for the clearing cycle; funds move when run_cheque_clearing processes the due date
+    deposit_date = get_date()
+    due_date = get_clearance_date(deposit_date)
     
-    # Credit to destination
-    to_idx = to_account.index[0]
-    new_to_bal = data['accounts'].at[to_idx, 'Balance'] + amount
-    data['accounts'].at[to_idx, 'Balance'] = new_to_bal
-    
-    # Update cheque status
     idx = cheque.index[0]
-    data['cheques'].at[idx, 'Status'] = 'Cleared'
-    data['cheques'].at[idx, 'ClearanceDate'] = get_date()
-    
-    # Create transactions
-    txn_debit = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
-        'AccountNumber': from_acc,
-        'TransactionType': 'Cheque Debit',
-        'Amount': amount,
-        'DebitCredit': 'Debit',
-        'Balance_After': new_from_bal,
-        'Date': get_date(),
-        'Time': datetime.now().strftime("%H:%M:%S"),
-        'Remarks': f'Cheque {cheque_num} cleared',
-        'Status': 'Success'
-    }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn_debit])], ignore_index=True)
+    data['cheques'].at[idx, 'Status'] = 'In Clearing'
+    data['cheques'].at[idx, 'DepositAccount'] = to_acc
+    data['cheques'].at[idx, 'DepositDate'] = deposit_date
+    data['cheques'].at[idx, 'ClearanceDate'] = due_date
     
-    txn_credit = {
-        'TransactionID': f"TXN{len(data['transactions'])+1:05d}",
-        'AccountNumber': to_acc,
-        'TransactionType': 'Cheque Credit',
-        'Amount': amount,
-        'DebitCredit': 'Credit',
-        'Balance_After': new_to_bal,
-        'Date': get_date(),
-        'Time': datetime.now().strftime("%H:%M:%S"),
-        'Remarks': f'Cheque {cheque_num} deposited',
-        'Status': 'Success'
-    }
-    data['transactions'] = pd.concat([data['transactions'], pd.DataFrame([txn_credit])], ignore_index=True)
-    
-    print(f"\n{Colors.GREEN}✓ Cheque Cleared Successfully!{Colors.END}")
-    print(f"Amount: ₹{amount:,.2f}")
+    print(f"\n{Colors.GREEN}✓ Cheque sent for clearing{Colors.END}")
+    print(f"Amount: ₹{cheque_row['Amount']:,.2f}")
     print(f"Deposited to: {to_acc}")
+    print(f"Expected clearance: {due_date}")
     
-    data = log_audit(data, 'CHEQUE_CLEARED', f'Cheque {cheque_num} for ₹{amount}')
+    data = log_audit(data, 'CHEQUE_DEPOSITED', f'Cheque {cheque_num} for ₹{cheque_row["Amount"]} due {due_date}')
     return data
 
 def check_cheque_status(data):
@@ -1295,7 +2806,9 @@ def check_cheque_status(data):
     print(f"Amount:       ₹{row['Amount']:,.2f}")
     print(f"Issue Date:   {row['IssueDate']}")
     print(f"Status:       {row['Status']}")
-    if row['ClearanceDate']:
+    if row['Status'] == 'In Clearing':
+        print(f"Clears On:    {row['ClearanceDate']}")
+    elif row['ClearanceDate']:
         print(f"Cleared On:   {row['ClearanceDate']}")
     if row['Remarks']:
         print(f"Remarks:      {row['Remarks']}")
@@ -1345,14 +2858,19 @@ def view_all_cheques(data):
 def report_transaction_history(data):
     print(f"\n{Colors.CYAN}--- Transaction History ---{Colors.END}")
     acc_num = input("Enter Account Number: ").strip()
+    start = input("From (YYYY-MM-DD, blank for all): ").strip() or None
+    end = input("To   (YYYY-MM-DD, blank for all): ").strip() or None
+    if (start and not validate_date_format(start)) or (end and not validate_date_format(end)):
+        print(f"{Colors.RED}Invalid date{Colors.END}")
+        return
     
-    txns = data['transactions'][data['transactions']['AccountNumber'] == acc_num]
+    txns = transactions_between(data, start, end, account=acc_num)
     if txns.empty:
         print("No transactions found for this account.")
         return
 
-    # Sort by date descending
-    txns = txns.sort_values('Date', ascending=False)
+    # Newest first, ordered by full timestamp so same-day order is kept
+    txns = txns.iloc[::-1]
     
     print(f"\nHistory for {acc_num}:")
     print("-" * 85)
@@ -1376,18 +2894,17 @@ def report_transaction_history(data):
 def report_bank_summary(data):
     print(f"\n{Colors.CYAN}--- Bank Financial Summary ---{Colors.END}")
     
-    total_deposits = data['accounts']['Balance'].sum()
-    total_loans = data['loans']['OutstandingAmount'].sum() if not data['loans'].empty else 0
-    total_customers = len(data['customers'])
-    total_accounts = len(data['accounts'])
-    total_cards = len(data['cards'])
+    totals = get_bank_totals(data)
+    total_deposits = totals['TotalDeposits']
+    total_loans = totals['OutstandingLoans']
+    total_customers = totals['Customers']
+    total_accounts = totals['Accounts']
+    total_cards = totals['Cards']
     
-    # Calculate total transaction volume
-    credit_txns = data['transactions'][data['transactions']['DebitCredit'] == 'Credit']['Amount'].sum() if not data['transactions'].empty else 0
-    debit_txns = data['transactions'][data['transactions']['DebitCredit'] == 'Debit']['Amount'].sum() if not data['transactions'].empty else 0
-    
-    # Loan statistics
-    active_loans = len(data['loans'][data['loans']['Status'] == 'Active']) if not data['loans'].empty else 0
+    # Transaction volume and loan statistics from the aggregate store
+    credit_txns = totals['CreditVolume']
+    debit_txns = totals['DebitVolume']
+    active_loans = totals['LoanStatus'].get('Active', 0)
     
     print(f"\n{'='*50}")
     print(f"{Colors.BOLD}FINANCIAL OVERVIEW{Colors.END}")
@@ -1410,6 +2927,38 @@ def report_bank_summary(data):
     print(f"Cards Issued:            {total_cards:>15}")
     print(f"{'='*50}")
 
+def build_customer_balance_table(data, sort_by='TotalBalance', ascending=False, top=None):
+    """Per-customer balance / account count / loan count in one grouped pass.
+
+    Accounts and loans are joined to customers by position (one hash lookup
+    per row) and aggregated with bincount, so cost is linear in table size.
+    """
+    customers = data['customers']
+    # Aggregate per distinct ID; a duplicated customer row repeats its totals
+    customer_index = pd.Index(customers['CustomerID'].drop_duplicates())
+    n_customers = len(customer_index)
+    row_pos = customer_index.get_indexer(customers['CustomerID'])
+
+    acc_pos = customer_index.get_indexer(data['accounts']['CustomerID'])
+    acc_known = acc_pos >= 0
+    balance = typed_view(data, 'accounts')['Balance'].fillna(0).to_numpy()
+    loan_pos = customer_index.get_indexer(data['loans']['CustomerID'])
+
+    table = pd.DataFrame({
+        'CustomerID': customers['CustomerID'].values,
+        'Name': customers['Name'].values,
+        'TotalBalance': np.bincount(acc_pos[acc_known], weights=balance[acc_known], minlength=n_customers)[row_pos],
+        'Accounts': np.bincount(acc_pos[acc_known], minlength=n_customers)[row_pos],
+        'Loans': np.bincount(loan_pos[loan_pos >= 0], minlength=n_customers)[row_pos]
+    })
+
+    # Top-N on a numeric column only needs a partial sort
+    if top is not None and sort_by in ('TotalBalance', 'Accounts', 'Loans'):
+        pick = table.nsmallest if ascending else table.nlargest
+        return pick(top, sort_by).reset_index(drop=True)
+    table = table.sort_values(sort_by, ascending=ascending, kind='stable').reset_index(drop=True)
+    return table.head(top) if top is not None else table
+
 def report_customer_balances(data):
     print(f"\n{Colors.CYAN}--- Customer Balances Report ---{Colors.END}")
     
@@ -1417,43 +2966,111 @@ def report_customer_balances(data):
         print("No customers.")
         return
 
-    print(f"\n{'ID':<10} {'Name':<25} {'Total Balance':<15} {'Accounts':<8} {'Loans':<6}")
-    print("-" * 70)
-    
-    for _, cust in data['customers'].iterrows():
-        cid = cust['CustomerID']
-        accounts = data['accounts'][data['accounts']['CustomerID'] == cid]
-        loans = data['loans'][data['loans']['CustomerID'] == cid] if not data['loans'].empty else pd.DataFrame()
-        total_bal = accounts['Balance'].sum()
-        acc_count = len(accounts)
-        loan_count = len(loans)
-        
-        print(f"{cid:<10} {cust['Name']:<25} ₹{total_bal:<14,.2f} {acc_count:<8} {loan_count:<6}")
+    sort_options = {'1': ('TotalBalance', False), '2': ('Accounts', False),
+                    '3': ('Loans', False), '4': ('CustomerID', True), '5': ('Name', True)}
+    print("Sort by: 1. Balance  2. Accounts  3. Loans  4. Customer ID  5. Name")
+    sort_by, ascending = sort_options.get(input("Select (default 1): ").strip(), sort_options['1'])
+    top = input("Show top N (blank for all): ").strip()
+    page_size = input("Rows per page (default 20): ").strip()
+    page_size = int(page_size) if page_size.isdigit() and int(page_size) > 0 else 20
+
+    table = build_customer_balance_table(data, sort_by, ascending, int(top) if top.isdigit() else None)
+
+    pages = max(1, -(-len(table) // page_size))
+    page = 0
+    while True:
+        rows = table.iloc[page * page_size:(page + 1) * page_size]
+        print(f"\n{'ID':<10} {'Name':<25} {'Total Balance':<15} {'Accounts':<8} {'Loans':<6}")
+        print("-" * 70)
+        for cid, name, total_bal, acc_count, loan_count in rows.itertuples(index=False):
+            print(f"{cid:<10} {str(name):<25} ₹{total_bal:<14,.2f} {acc_count:<8} {loan_count:<6}")
+        print(f"\nPage {page + 1} of {pages} ({len(table)} customers)")
+
+        if pages == 1:
+            break
+        nav = input("[n]ext, [p]revious, [q]uit: ").strip().lower()
+        if nav == 'n' and page < pages - 1:
+            page += 1
+        elif nav == 'p' and page > 0:
+            page -= 1
+        elif nav == 'q':
+            break
 
 def report_daily_transactions(data):
     """Show today's transactions summary"""
     print(f"\n{Colors.CYAN}--- Daily Transaction Summary ---{Colors.END}")
     
     today = get_date()
-    today_txns = data['transactions'][data['transactions']['Date'] == today]
+    rollup = data['daily_rollup']
+    today_rollup = rollup[rollup['Date'] == today]
     
-    if today_txns.empty:
+    if today_rollup.empty:
         print("No transactions today.")
         return
     
-    credits = today_txns[today_txns['DebitCredit'] == 'Credit']
-    debits = today_txns[today_txns['DebitCredit'] == 'Debit']
+    credits = today_rollup[today_rollup['DebitCredit'] == 'Credit']
+    debits = today_rollup[today_rollup['DebitCredit'] == 'Debit']
     
     print(f"\nDate: {today}")
     print(f"{'='*50}")
-    print(f"Total Transactions: {len(today_txns)}")
+    print(f"Total Transactions: {int(today_rollup['Count'].sum())}")
     print(f"{'='*50}")
-    print(f"Credits: {len(credits)} transactions, ₹{credits['Amount'].sum():,.2f}")
-    print(f"Debits:  {len(debits)} transactions, ₹{debits['Amount'].sum():,.2f}")
+    print(f"Credits: {int(credits['Count'].sum())} transactions, ₹{credits['Amount'].sum():,.2f}")
+    print(f"Debits:  {int(debits['Count'].sum())} transactions, ₹{debits['Amount'].sum():,.2f}")
     print(f"{'='*50}")
+    print(f"\nBy Type:")
+    print(today_rollup[['TransactionType', 'DebitCredit', 'Count', 'Amount']].to_string(index=False))
+    
+    # Row-level detail is the only part that still needs the ledger
+    today_txns = transactions_between(data, today, today)
     print(f"\nTransaction Details:")
     print(today_txns[['TransactionID', 'AccountNumber', 'TransactionType', 'Amount', 'DebitCredit']].to_string(index=False))
 
+def report_balance_snapshot(data):
+    """Month-end balance snapshot with average monthly balance (AMB) checks"""
+    print(f"\n{Colors.CYAN}--- Month-End Balance Snapshot ---{Colors.END}")
+    if data['accounts'].empty:
+        print("No accounts.")
+        return
+    
+    month = input(f"Month (YYYY-MM) [{get_date()[:7]}]: ").strip() or get_date()[:7]
+    if not validate_date_format(f"{month}-01"):
+        print(f"{Colors.RED}Invalid month{Colors.END}")
+        return
+    start = f"{month}-01"
+    month_end = (pd.Timestamp(start) + pd.offsets.MonthEnd(0)).strftime('%Y-%m-%d')
+    end = min(month_end, get_date())
+    if start > end:
+        print(f"{Colors.RED}Month has not started yet{Colors.END}")
+        return
+    
+    accs = data['accounts'].drop_duplicates('AccountNumber').set_index('AccountNumber')
+    snapshot = pd.DataFrame({
+        'AccountType': accs['AccountType'],
+        'MonthEnd': balances_as_of(data, end),
+        'AMB': average_balances(data, start, end)
+    })
+    snapshot['Required'] = snapshot['AccountType'].map(AMB_REQUIREMENTS)
+    snapshot['Shortfall'] = (snapshot['Required'] - snapshot['AMB']).clip(lower=0).where(snapshot['Required'].notna(), 0)
+    breaches = snapshot[snapshot['Shortfall'] > 0]
+    
+    print(f"\nPeriod: {start} to {end} ({len(pd.date_range(start, end))} days)")
+    print(f"{'='*50}")
+    print(f"Accounts:            {len(snapshot)}")
+    print(f"Total Balance ({end}): ₹{snapshot['MonthEnd'].sum():,.2f}")
+    for acc_type, group in snapshot.groupby('AccountType'):
+        print(f"  {acc_type:<16} ₹{group['MonthEnd'].sum():>18,.2f}  AMB ₹{group['AMB'].mean():>14,.2f}")
+    print(f"{'='*50}")
+    
+    if breaches.empty:
+        print(f"{Colors.GREEN}✓ All accounts meet their average monthly balance{Colors.END}")
+        return
+    print(f"\n{Colors.YELLOW}AMB below requirement: {len(breaches)} accounts{Colors.END}")
+    print(f"{'Account':<12} {'Type':<10} {'AMB':>14} {'Required':>10} {'Shortfall':>12}")
+    print("-" * 62)
+    for acc_num, row in breaches.sort_values('Shortfall', ascending=False).head(50).iterrows():
+        print(f"{acc_num:<12} {row['AccountType']:<10} ₹{row['AMB']:>12,.2f} ₹{row['Required']:>8,.0f} ₹{row['Shortfall']:>10,.2f}")
+
 def report_loan_portfolio(data):
     """Detailed loan portfolio analysis"""
     print(f"\n{Colors.CYAN}--- Loan Portfolio Analysis ---{Colors.END}")
@@ -1486,6 +3103,80 @@ def report_loan_portfolio(data):
     }).rename(columns={'LoanID': 'Count', 'InterestRate': 'Avg Rate'})
     print(type_summary.to_string())
 
+    active = data['loans']['Status'] == 'Active'
+    if active.any():
+        inflows = project_loan_book(data, LOAN_PROJECTION_MONTHS)['Payment'].sum()
+        print(f"\nExpected inflows, next {LOAN_PROJECTION_MONTHS} months: ₹{inflows:,.2f} from {int(active.sum())} active loans")
+
+def project_loan_book(data, horizon=LOAN_PROJECTION_MONTHS, group_by=None):
+    """Month-by-month expected inflows of all Active loans, summed per month (and per group_by column)"""
+    loans = data['loans']
+    active = (loans['Status'] == 'Active').to_numpy()
+    amounts = typed_view(data, 'loans')[active]
+    codes, groups = (pd.factorize(loans.loc[active, group_by].fillna('N/A')) if group_by
+                     else (np.zeros(int(active.sum()), dtype=int), np.array(['All'])))
+
+    metrics = ['Payment', 'Interest', 'Principal', 'Outstanding']
+    totals = {m: np.zeros((len(groups), horizon)) for m in metrics + ['PayingLoans']}
+    for lo in range(0, len(amounts), LOAN_PROJECTION_CHUNK):
+        block = amounts.iloc[lo:lo + LOAN_PROJECTION_CHUNK]
+        flows = project_loan_cashflows(block['OutstandingAmount'], block['InterestRate'], block['EMI'], horizon)
+        flows['PayingLoans'] = flows['Payment'] > 0
+
+        # Per-group sums as one (groups x loans) @ (loans x months) product
+        membership = (codes[lo:lo + LOAN_PROJECTION_CHUNK] == np.arange(len(groups))[:, None]).astype(float)
+        for m in totals:
+            totals[m] += membership @ flows[m]
+
+    months = pd.period_range(pd.Timestamp(get_date()).to_period('M') + 1, periods=horizon, freq='M').astype(str)
+    projection = pd.DataFrame({
+        'Group': np.repeat(np.asarray(groups, dtype=object), horizon),
+        'Month': np.tile(np.asarray(months), len(groups)),
+        **{m: totals[m].ravel().round(2) for m in metrics},
+        'PayingLoans': totals['PayingLoans'].ravel().astype(int)
+    })
+    return projection if group_by else projection.drop(columns='Group')
+
+def report_loan_projection(data):
+    """Projected monthly EMI inflows of the active loan book, with a liquidity check"""
+    print(f"\n{Colors.CYAN}--- Loan Book Cash-Flow Projection ---{Colors.END}")
+    if not (data['loans']['Status'] == 'Active').any():
+        print("No active loans.")
+        return
+
+    horizon = input(f"Horizon in months [{LOAN_PROJECTION_MONTHS}]: ").strip()
+    horizon = int(horizon) if horizon.isdigit() and int(horizon) > 0 else LOAN_PROJECTION_MONTHS
+    need = input("Liquidity need to cover (₹, blank to skip): ").strip().replace(',', '')
+
+    projection = project_loan_book(data, horizon)
+    projection['Cumulative'] = projection['Payment'].cumsum()
+    print(f"\n{'Month':<8} {'Inflow':>16} {'Interest':>14} {'Principal':>16} {'Outstanding':>18} {'Loans':>7}")
+    print("-" * 84)
+    for _, row in projection.iterrows():
+        print(f"{row['Month']:<8} ₹{row['Payment']:>15,.2f} ₹{row['Interest']:>13,.2f} "
+              f"₹{row['Principal']:>15,.2f} ₹{row['Outstanding']:>17,.2f} {row['PayingLoans']:>7}")
+    print("-" * 84)
+    print(f"{'Total':<8} ₹{projection['Payment'].sum():>15,.2f} ₹{projection['Interest'].sum():>13,.2f} "
+          f"₹{projection['Principal'].sum():>15,.2f}")
+
+    by_type = project_loan_book(data, horizon, group_by='LoanType').groupby('Group')[['Payment', 'Interest']].sum()
+    print(f"\nBy Loan Type ({horizon} months):")
+    for loan_type, row in by_type.sort_values('Payment', ascending=False).iterrows():
+        print(f"  {loan_type:<16} ₹{row['Payment']:>16,.2f}  (interest ₹{row['Interest']:,.2f})")
+
+    if need:
+        try:
+            need = float(need)
+        except ValueError:
+            print(f"{Colors.RED}Invalid amount{Colors.END}")
+            return
+        covered = projection[projection['Cumulative'] >= need]
+        if covered.empty:
+            print(f"\n{Colors.YELLOW}Projected inflows cover only ₹{projection['Cumulative'].iloc[-1]:,.2f} "
+                  f"of ₹{need:,.2f} within {horizon} months{Colors.END}")
+        else:
+            print(f"\n{Colors.GREEN}✓ ₹{need:,.2f} is covered by loan inflows by {covered.iloc[0]['Month']}{Colors.END}")
+
 def view_audit_trail(data):
     """View system audit trail"""
     print(f"\n{Colors.CYAN}--- Audit Trail ---{Colors.END}")
@@ -1523,6 +3214,17 @@ def view_audit_trail(data):
         details = str(log['Details'])[:48] if log['Details'] else ''
         print(f"{str(log['Timestamp']):<20} {str(log['Action']):<20} {details:<50} {str(log['Status']):<10}")
 
+# When set, charts are written to this file instead of opening a window
+_chart_target = {'path': None}
+
+def show_chart():
+    """Show the current figure, or save and close it when rendering headless"""
+    if _chart_target['path']:
+        plt.savefig(_chart_target['path'], bbox_inches='tight')
+        plt.close('all')
+    else:
+        plt.show()
+
 def visualize_account_distribution(data):
     print(f"\n{Colors.CYAN}--- Generating Account Distribution Chart ---{Colors.END}")
     if data['accounts'].empty:
@@ -1540,7 +3242,7 @@ def visualize_account_distribution(data):
         plt.axis('equal')
         
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {e}{Colors.END}")
 
@@ -1567,7 +3269,7 @@ def visualize_loan_status(data):
         
         plt.tight_layout()
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {e}{Colors.END}")
 
@@ -1580,41 +3282,13 @@ def visualize_monthly_transactions(data):
         return
     
     try:
-        # Convert date and group by month
-        txns = data['transactions'].copy()
-        
-        # Ensure Amount is numeric
-        if 'Amount' in txns.columns:
-            txns['Amount'] = pd.to_numeric(txns['Amount'], errors='coerce')
-        else:
-            print("No Amount column found in transactions.")
-            return
-        
-        # Parse dates - handle multiple date formats
-        if 'Date' in txns.columns:
-            txns['Date'] = pd.to_datetime(txns['Date'], errors='coerce')
-        else:
-            print("No Date column found in transactions.")
-            return
-        
-        # Remove rows with invalid dates or amounts
-        txns = txns.dropna(subset=['Date', 'Amount'])
-        
-        if txns.empty:
-            print("No valid transaction data to visualize.")
-            return
-        
-        # Extract month and sum by month
-        txns['Month'] = txns['Date'].dt.to_period('M')
-        monthly = txns.groupby('Month')['Amount'].sum().sort_index()
+        # Monthly totals come straight from the rollup table
+        monthly = data['monthly_rollup'].groupby('Month')['Amount'].sum().sort_index()
         
         if monthly.empty or len(monthly) == 0:
             print("No data available for monthly trend chart.")
             return
         
-        # Convert period index to string for plotting
-        monthly.index = monthly.index.astype(str)
-        
         plt.figure(figsize=(12, 6))
         plt.plot(range(len(monthly)), monthly.values, marker='o', linewidth=2, markersize=8, color='#2E86AB')
         plt.title('Monthly Transaction Volume', fontsize=14, fontweight='bold')
@@ -1625,7 +3299,7 @@ def visualize_monthly_transactions(data):
         plt.tight_layout()
         
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {str(e)}{Colors.END}")
 
@@ -1638,9 +3312,8 @@ def visualize_customer_growth(data):
         return
     
     try:
-        customers = data['customers'].copy()
-        customers['Month'] = pd.to_datetime(customers['RegistrationDate']).dt.to_period('M').astype(str)
-        monthly_new = customers.groupby('Month').size().cumsum()
+        months = typed_view(data, 'customers')['RegistrationDate'].dropna().dt.strftime('%Y-%m')
+        monthly_new = months.groupby(months).size().cumsum()
         
         plt.figure(figsize=(12, 6))
         plt.plot(monthly_new.index, monthly_new.values, marker='o', linewidth=2, markersize=8, color='#2ecc71')
@@ -1653,10 +3326,114 @@ def visualize_customer_growth(data):
         plt.tight_layout()
         
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {e}{Colors.END}")
 
+# --- Credit Scoring (batch + cache) ---
+
+# Scoring factors per customer, computed in bulk. Invalidation just marks a
+# customer stale; stale or unseen customers are recomputed on the next read.
+# Account age is applied at read time so cached factors never expire by date.
+_credit_cache = {'factors': None, 'stale': set()}
+
+def compute_credit_factors(data, customer_ids=None):
+    """Scoring inputs for many customers via grouped aggregates and joins"""
+    # Boolean masks line typed views up by position, so duplicate index labels are harmless
+    in_scope = (data['customers']['CustomerID'].isin(customer_ids).values if customer_ids is not None
+                else np.ones(len(data['customers']), dtype=bool))
+    customers = data['customers'][in_scope]
+    ids = customers['CustomerID']
+    owned = data['accounts']['CustomerID'].isin(ids).values
+    accounts = data['accounts'][owned]
+    loans = data['loans'][data['loans']['CustomerID'].isin(ids)]
+    balances = pd.Series(typed_view(data, 'accounts')['Balance'].values[owned])
+
+    owner = accounts.drop_duplicates('AccountNumber').set_index('AccountNumber')['CustomerID']
+    txn_owner = data['transactions']['AccountNumber'].map(owner).dropna()
+
+    factors = pd.DataFrame({
+        'RegistrationDate': typed_view(data, 'customers')['RegistrationDate'].values[in_scope],
+        'TotalBalance': ids.map(balances.groupby(accounts['CustomerID'].values).sum()).values,
+        'TotalTransactions': ids.map(txn_owner.value_counts().add(
+            archive_carry()['Count'].groupby(owner).sum(), fill_value=0)).values,
+        'NumLoans': ids.map(loans['CustomerID'].value_counts()).values,
+        'DefaultedLoans': ids.map(loans.loc[loans['Status'] == 'Defaulted', 'CustomerID'].value_counts()).values
+    }, index=pd.Index(ids.values, name='CustomerID'))
+    return factors.fillna({'TotalBalance': 0, 'TotalTransactions': 0, 'NumLoans': 0, 'DefaultedLoans': 0})
+
+def score_credit_factors(factors):
+    """Both credit scores from cached factors (account age measured today)"""
+    age_days = (pd.Timestamp(get_date()) - factors['RegistrationDate']).dt.days.fillna(0).astype(int)
+    scores = factors.assign(AccountAgeDays=age_days)
+    scores['CreditScore'] = get_credit_score_vectorized(
+        age_days, factors['TotalTransactions'].astype(int), factors['TotalBalance'], factors['DefaultedLoans'].astype(int))
+    scores['DashboardScore'] = calculate_credit_score_vectorized(
+        factors['TotalBalance'], factors['NumLoans'].astype(int), factors['TotalTransactions'].astype(int))
+    return scores
+
+def get_credit_scores(data, customer_ids=None):
+    """Scores for the given customers (all when None), recomputing only stale/unseen ones"""
+    factors = _credit_cache['factors']
+    if factors is None:
+        # Cold cache: a single-customer lookup scores just that customer
+        factors = compute_credit_factors(data, customer_ids)
+        _credit_cache['stale'].clear()
+    else:
+        wanted = data['customers']['CustomerID'] if customer_ids is None else pd.Series(customer_ids)
+        refresh = set(wanted[~wanted.isin(factors.index)]) | _credit_cache['stale']
+        if refresh:
+            fresh = compute_credit_factors(data, list(refresh))
+            factors = pd.concat([factors.drop(index=list(refresh), errors='ignore'), fresh])
+            _credit_cache['stale'].clear()
+    _credit_cache['factors'] = factors
+
+    if customer_ids is not None:
+        factors = factors[factors.index.isin(customer_ids)]
+    return score_credit_factors(factors)
+
+def invalidate_credit_scores(customer_ids):
+    """Mark customers whose accounts, loans or transactions changed as stale"""
+    if _credit_cache['factors'] is not None:
+        _credit_cache['stale'].update(customer_ids)
+
+def invalidate_credit_scores_on_post(data, txns):
+    """Posting hook: invalidate the owners of every account in the batch"""
+    if _credit_cache['factors'] is not None:
+        accounts = data['accounts']
+        owners = accounts.loc[accounts['AccountNumber'].isin(txns['AccountNumber'].unique()), 'CustomerID']
+        invalidate_credit_scores(owners.unique())
+    return data
+
+register_posting_hook(invalidate_credit_scores_on_post)
+
+def credit_rating(score):
+    """Rating band for a credit score"""
+    if score >= 750:
+        return "Excellent"
+    elif score >= 650:
+        return "Good"
+    elif score >= 550:
+        return "Fair"
+    return "Poor"
+
+def refresh_credit_scores(data):
+    """Score every customer in one pass and show the rating distribution"""
+    print(f"\n{Colors.CYAN}--- Batch Credit Scoring ---{Colors.END}")
+    if data['customers'].empty:
+        print("No customers.")
+        return data
+
+    _credit_cache['factors'] = None
+    scores = get_credit_scores(data)
+    ratings = scores['CreditScore'].map(credit_rating).value_counts()
+
+    print(f"Customers Scored: {len(scores)}")
+    print(f"Average Score:    {scores['CreditScore'].mean():.0f}")
+    for rating in ['Excellent', 'Good', 'Fair', 'Poor']:
+        print(f"  {rating:<10} {int(ratings.get(rating, 0)):>8}")
+    return data
+
 def customer_credit_score(data):
     """Calculate and display customer credit score"""
     print(f"\n{Colors.CYAN}--- Customer Credit Score ---{Colors.END}")
@@ -1668,37 +3445,16 @@ def customer_credit_score(data):
         print("Customer not found.")
         return
     
-    # Calculate factors
-    reg_date = datetime.strptime(customer.iloc[0]['RegistrationDate'], '%Y-%m-%d')
-    account_age = (datetime.now() - reg_date).days
-    
-    accounts = data['accounts'][data['accounts']['CustomerID'] == cust_id]
-    total_balance = accounts['Balance'].sum() if not accounts.empty else 0
-    
-    acc_nums = accounts['AccountNumber'].tolist()
-    total_txns = len(data['transactions'][data['transactions']['AccountNumber'].isin(acc_nums)]) if not data['transactions'].empty else 0
-    
-    # Check for defaulted loans
-    defaults = 0
-    if not data['loans'].empty:
-        cust_loans = data['loans'][data['loans']['CustomerID'] == cust_id]
-        defaults = len(cust_loans[cust_loans['Status'] == 'Defaulted'])
-    
-    score = get_credit_score(account_age, total_txns, total_balance, defaults)
+    factors = get_credit_scores(data, [cust_id]).iloc[0]
+    account_age = int(factors['AccountAgeDays'])
+    total_txns = int(factors['TotalTransactions'])
+    total_balance = factors['TotalBalance']
+    defaults = int(factors['DefaultedLoans'])
+    score = int(factors['CreditScore'])
     
     # Determine rating
-    if score >= 750:
-        rating = "Excellent"
-        color = Colors.GREEN
-    elif score >= 650:
-        rating = "Good"
-        color = Colors.BLUE
-    elif score >= 550:
-        rating = "Fair"
-        color = Colors.YELLOW
-    else:
-        rating = "Poor"
-        color = Colors.RED
+    rating = credit_rating(score)
+    color = {'Excellent': Colors.GREEN, 'Good': Colors.BLUE, 'Fair': Colors.YELLOW}.get(rating, Colors.RED)
     
     print(f"\n{'='*50}")
     print(f"Customer: {customer.iloc[0]['Name']}")
@@ -1725,15 +3481,10 @@ def visualize_balance_distribution(data):
         return
     
     try:
-        # Merge accounts with customer names
-        acc_cust = data['accounts'].merge(
-            data['customers'][['CustomerID', 'Name']], 
-            on='CustomerID', 
-            how='left'
-        )
-        
-        # Group by customer
-        cust_balances = acc_cust.groupby('Name')['Balance'].sum().sort_values(ascending=True)
+        # Group balances by customer name
+        names = data['customers'].drop_duplicates('CustomerID').set_index('CustomerID')['Name']
+        owner = data['accounts']['CustomerID'].map(names)
+        cust_balances = typed_view(data, 'accounts')['Balance'].groupby(owner).sum().sort_values(ascending=True)
         
         fig, axes = plt.subplots(1, 2, figsize=(14, 6))
         
@@ -1755,7 +3506,7 @@ def visualize_balance_distribution(data):
         
         plt.tight_layout()
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {str(e)}{Colors.END}")
 
@@ -1763,13 +3514,15 @@ def visualize_transaction_types(data):
     """Visualize transaction types breakdown"""
     print(f"\n{Colors.CYAN}--- Transaction Types Analysis ---{Colors.END}")
     
-    if data['transactions'].empty:
+    if data['monthly_rollup'].empty:
         print("No transaction data to visualize.")
         return
     
     try:
-        # Group by transaction type
-        txn_types = data['transactions']['TransactionType'].value_counts()
+        # Group by transaction type (rollups include archived months)
+        rollup = typed_view(data, 'monthly_rollup')
+        by_type = rollup[['Count', 'Amount']].groupby(data['monthly_rollup']['TransactionType']).sum()
+        txn_types = by_type['Count'].sort_values(ascending=False)
         
         fig, axes = plt.subplots(1, 2, figsize=(14, 6))
         
@@ -1780,7 +3533,7 @@ def visualize_transaction_types(data):
         axes[0].set_title('Transaction Types by Count', fontweight='bold')
         
         # Bar chart of total amounts by type
-        txn_amounts = data['transactions'].groupby('TransactionType')['Amount'].sum().sort_values(ascending=False)
+        txn_amounts = by_type['Amount'].sort_values(ascending=False)
         axes[1].bar(range(len(txn_amounts)), txn_amounts.values, color='#2ECC71')
         axes[1].set_xticks(range(len(txn_amounts)))
         axes[1].set_xticklabels(txn_amounts.index, rotation=45, ha='right')
@@ -1790,7 +3543,7 @@ def visualize_transaction_types(data):
         
         plt.tight_layout()
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {str(e)}{Colors.END}")
 
@@ -1803,7 +3556,8 @@ def visualize_loan_emi_analysis(data):
         return
     
     try:
-        loans = data['loans'].copy()
+        loans = data['loans']
+        amounts = typed_view(data, 'loans')
         
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
         
@@ -1817,8 +3571,8 @@ def visualize_loan_emi_analysis(data):
         loan_names = loans['LoanID'].tolist()
         x = range(len(loan_names))
         width = 0.35
-        principal = loans['PrincipalAmount'].astype(float).tolist()
-        outstanding = loans['OutstandingAmount'].astype(float).tolist()
+        principal = amounts['PrincipalAmount'].tolist()
+        outstanding = amounts['OutstandingAmount'].tolist()
         
         axes[0, 1].bar([i - width/2 for i in x], principal, width, label='Principal', color='#3498DB')
         axes[0, 1].bar([i + width/2 for i in x], outstanding, width, label='Outstanding', color='#E74C3C')
@@ -1830,7 +3584,7 @@ def visualize_loan_emi_analysis(data):
         axes[0, 1].yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'₹{x/100000:.1f}L'))
         
         # 3. EMI by Loan
-        emi_values = loans['EMI'].astype(float).tolist()
+        emi_values = amounts['EMI'].tolist()
         axes[1, 0].bar(loan_names, emi_values, color='#9B59B6')
         axes[1, 0].set_ylabel('Monthly EMI (₹)')
         axes[1, 0].set_title('Monthly EMI by Loan', fontweight='bold')
@@ -1847,7 +3601,7 @@ def visualize_loan_emi_analysis(data):
         
         plt.tight_layout()
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {str(e)}{Colors.END}")
 
@@ -1860,20 +3614,15 @@ def visualize_daily_activity(data):
         return
     
     try:
-        txns = data['transactions'].copy()
-        txns['Date'] = pd.to_datetime(txns['Date'], errors='coerce')
-        txns = txns.dropna(subset=['Date'])
-        
-        if txns.empty:
+        if data['daily_rollup'].empty:
             print("No valid date data to visualize.")
             return
         
-        # Group by date
-        daily = txns.groupby(txns['Date'].dt.date).agg({
-            'Amount': ['sum', 'count']
-        }).reset_index()
-        daily.columns = ['Date', 'TotalAmount', 'TxnCount']
-        daily = daily.sort_values('Date')
+        # Daily totals come straight from the rollup table
+        rollup = typed_view(data, 'daily_rollup')
+        daily = rollup.groupby('Date').agg(
+            TotalAmount=('Amount', 'sum'), TxnCount=('Count', 'sum')
+        ).reset_index().sort_values('Date')
         
         fig, axes = plt.subplots(2, 1, figsize=(14, 8))
         
@@ -1896,7 +3645,7 @@ def visualize_daily_activity(data):
         
         plt.tight_layout()
         print("Displaying chart window...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating chart: {str(e)}{Colors.END}")
 
@@ -1918,11 +3667,8 @@ def visualize_comprehensive_dashboard(data):
         # 2. Customer Registration Timeline (Top Middle)
         ax2 = fig.add_subplot(2, 3, 2)
         if not data['customers'].empty:
-            cust = data['customers'].copy()
-            cust['RegDate'] = pd.to_datetime(cust['RegistrationDate'], errors='coerce')
-            cust = cust.dropna(subset=['RegDate']).sort_values('RegDate')
-            cust['CumCount'] = range(1, len(cust) + 1)
-            ax2.plot(cust['RegDate'], cust['CumCount'], marker='o', color='#9B59B6')
+            reg_dates = typed_view(data, 'customers')['RegistrationDate'].dropna().sort_values()
+            ax2.plot(reg_dates.values, range(1, len(reg_dates) + 1), marker='o', color='#9B59B6')
             ax2.set_xlabel('Date')
             ax2.set_ylabel('Total Customers')
             ax2.tick_params(axis='x', rotation=45)
@@ -1930,8 +3676,8 @@ def visualize_comprehensive_dashboard(data):
         
         # 3. Balance Summary (Top Right)
         ax3 = fig.add_subplot(2, 3, 3)
-        total_balance = data['accounts']['Balance'].sum() if not data['accounts'].empty else 0
-        total_loans = data['loans']['OutstandingAmount'].sum() if not data['loans'].empty else 0
+        total_balance = typed_view(data, 'accounts')['Balance'].sum() if not data['accounts'].empty else 0
+        total_loans = typed_view(data, 'loans')['OutstandingAmount'].sum() if not data['loans'].empty else 0
         net_worth = total_balance - total_loans
         categories = ['Total Deposits', 'Loan Outstanding', 'Net Position']
         values = [total_balance, total_loans, net_worth]
@@ -1943,15 +3689,9 @@ def visualize_comprehensive_dashboard(data):
         
         # 4. Transaction Trend (Bottom Left)
         ax4 = fig.add_subplot(2, 3, 4)
-        if not data['transactions'].empty:
-            txns = data['transactions'].copy()
-            txns['Date'] = pd.to_datetime(txns['Date'], errors='coerce')
-            txns['Amount'] = pd.to_numeric(txns['Amount'], errors='coerce')
-            txns = txns.dropna(subset=['Date', 'Amount'])
-            if not txns.empty:
-                txns['Month'] = txns['Date'].dt.to_period('M')
-                monthly = txns.groupby('Month')['Amount'].sum().sort_index()
-                monthly.index = monthly.index.astype(str)
+        if not data['monthly_rollup'].empty:
+            monthly = data['monthly_rollup'].groupby('Month')['Amount'].sum().sort_index()
+            if not monthly.empty:
                 ax4.bar(range(len(monthly)), monthly.values, color='#1ABC9C')
                 ax4.set_xticks(range(len(monthly)))
                 ax4.set_xticklabels(monthly.index, rotation=45)
@@ -1971,7 +3711,7 @@ def visualize_comprehensive_dashboard(data):
         # 6. Top Customers by Balance (Bottom Right)
         ax6 = fig.add_subplot(2, 3, 6)
         if not data['accounts'].empty:
-            cust_bal = data['accounts'].groupby('CustomerID')['Balance'].sum().nlargest(5)
+            cust_bal = typed_view(data, 'accounts')['Balance'].groupby(data['accounts']['CustomerID']).sum().nlargest(5)
             cust_names = []
             for cid in cust_bal.index:
                 cust = data['customers'][data['customers']['CustomerID'] == cid]
@@ -1984,7 +3724,7 @@ def visualize_comprehensive_dashboard(data):
         plt.suptitle('COREBANK ANALYTICS DASHBOARD', fontsize=16, fontweight='bold', y=1.02)
         plt.tight_layout()
         print("Displaying comprehensive dashboard...")
-        plt.show()
+        show_chart()
     except Exception as e:
         print(f"{Colors.RED}Error generating dashboard: {str(e)}{Colors.END}")
 
@@ -2062,7 +3802,7 @@ def export_database_summary(data):
     print(f"{'═'*60}{Colors.END}")
     print(f"  Total Customers:     {len(data['customers'])}")
     print(f"  Total Accounts:      {len(data['accounts'])}")
-    print(f"  Total Transactions:  {len(data['transactions'])}")
+    print(f"  Total Transactions:  {len(data['transactions']) + archived_row_count()} ({archived_row_count()} archived)")
     print(f"  Total Loans:         {len(data['loans'])}")
     print(f"  Total Cards:         {len(data['cards'])}")
     print(f"  Total Cheques:       {len(data['cheques'])}")
@@ -2071,6 +3811,293 @@ def export_database_summary(data):
     total_records = sum(len(data[t]) for t in data)
     print(f"\n  {Colors.BOLD}GRAND TOTAL: {total_records} records{Colors.END}")
 
+# ==========================================
+# SECTION 8C: HEADLESS CHART RENDERING
+# ==========================================
+
+# Chart name -> (render function, tables it reads). The table list drives the
+# cache key, so a chart is only redrawn when one of its inputs changes.
+CHARTS = {
+    'account_distribution': (visualize_account_distribution, ['accounts']),
+    'loan_status': (visualize_loan_status, ['loans']),
+    'monthly_transactions': (visualize_monthly_transactions, ['transactions', 'monthly_rollup']),
+    'customer_growth': (visualize_customer_growth, ['customers']),
+    'balance_distribution': (visualize_balance_distribution, ['accounts', 'customers']),
+    'transaction_types': (visualize_transaction_types, ['monthly_rollup']),
+    'loan_emi_analysis': (visualize_loan_emi_analysis, ['loans']),
+    'daily_activity': (visualize_daily_activity, ['transactions', 'daily_rollup']),
+    'dashboard': (visualize_comprehensive_dashboard, ['accounts', 'customers', 'loans', 'monthly_rollup'])
+}
+
+# Table hashes are memoised like typed views: a table is rehashed only when it
+# is replaced, its row count changes or touch_tables() bumps its version, so
+# a render with unchanged inputs costs a dict lookup per table. The hash
+# itself keeps the manifest valid across restarts.
+_chart_table_hashes = {}
+
+def table_version(data, table):
+    """Content hash of a table (columns + row values), reused while the table is unchanged"""
+    df = data[table]
+    version = _table_versions.get(table, 0)
+    entry = _chart_table_hashes.get(table)
+    if entry and entry['source']() is df and entry['rows'] == len(df) and entry['version'] == version:
+        return entry['hash']
+
+    digest = hashlib.sha256(','.join(map(str, df.columns)).encode())
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    _chart_table_hashes[table] = {'source': weakref.ref(df), 'rows': len(df), 'version': version,
+                                  'hash': digest.hexdigest()}
+    return digest.hexdigest()
+
+def chart_version(name, fmt, table_versions):
+    """Data-version key for one chart in one format"""
+    tables = CHARTS[name][1]
+    key = '|'.join([name, fmt] + [table_versions[t] for t in tables])
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+def load_chart_manifest():
+    """Cache manifest of previously rendered charts"""
+    path = os.path.join(CHART_DIR, 'manifest.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def save_chart_manifest(manifest):
+    """Persist the chart cache manifest"""
+    with open(os.path.join(CHART_DIR, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+_worker_data = {}
+
+def init_chart_worker(data):
+    """Pool initializer: non-interactive backend, quiet stdout, shared tables"""
+    plt.switch_backend('Agg')
+    sys.stdout = open(os.devnull, 'w')
+    _worker_data['data'] = data
+
+def render_chart(name, path):
+    """Render one chart to a file inside a worker; returns (name, path, ok)"""
+    _chart_target['path'] = path
+    try:
+        CHARTS[name][0](_worker_data['data'])
+    finally:
+        _chart_target['path'] = None
+        plt.close('all')
+    return name, path, os.path.exists(path)
+
+def render_charts(data, names=None, formats=None, workers=CHART_WORKERS):
+    """Render charts to CHART_DIR across a process pool, skipping unchanged ones"""
+    names = names or list(CHARTS)
+    formats = formats or CHART_FORMATS
+    os.makedirs(CHART_DIR, exist_ok=True)
+    manifest = load_chart_manifest()
+
+    tables = {t for name in names for t in CHARTS[name][1]}
+    versions = {t: table_version(data, t) for t in tables}
+
+    jobs, cached = {}, []
+    for name in names:
+        for fmt in formats:
+            key = chart_version(name, fmt, versions)
+            path = os.path.join(CHART_DIR, f"{name}_{key}.{fmt}")
+            entry = manifest.get(f"{name}.{fmt}")
+            if entry and entry['key'] == key and os.path.exists(entry['path']):
+                cached.append(entry['path'])
+            else:
+                jobs[(name, fmt)] = (key, path)
+
+    rendered, failed = [], []
+    if jobs:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Only the tables the pending charts read are shipped to the workers
+        needed = {t for name, _ in jobs for t in CHARTS[name][1]}
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs))),
+                                 initializer=init_chart_worker,
+                                 initargs=({t: data[t] for t in needed},)) as pool:
+            futures = {pool.submit(render_chart, name, path): (name, fmt)
+                       for (name, fmt), (key, path) in jobs.items()}
+            for future in as_completed(futures):
+                name, fmt = futures[future]
+                key, path = jobs[(name, fmt)]
+                try:
+                    ok = future.result()[2]
+                except Exception:
+                    ok = False
+                if not ok:
+                    failed.append(f"{name}.{fmt}")
+                    continue
+                old = manifest.get(f"{name}.{fmt}")
+                if old and old['path'] != path and os.path.exists(old['path']):
+                    os.remove(old['path'])
+                manifest[f"{name}.{fmt}"] = {'key': key, 'path': path, 'rendered': get_timestamp()}
+                rendered.append(path)
+        save_chart_manifest(manifest)
+
+    return {'rendered': sorted(rendered), 'cached': sorted(cached), 'failed': sorted(failed)}
+
+def render_charts_menu(data):
+    """Prompt for charts/format and render them headless"""
+    print(f"\n{Colors.CYAN}--- Render Charts to Files ---{Colors.END}")
+    names = list(CHARTS)
+    for i, name in enumerate(names, 1):
+        print(f"{i}. {name}")
+    picks = input("Charts (comma-separated numbers, blank for all): ").strip()
+    fmt = input(f"Format ({'/'.join(CHART_FORMATS)}/both) [png]: ").strip().lower() or 'png'
+
+    try:
+        selected = [names[int(x) - 1] for x in picks.split(',')] if picks else names
+    except (ValueError, IndexError):
+        print(f"{Colors.RED}Invalid chart selection{Colors.END}")
+        return
+    formats = CHART_FORMATS if fmt == 'both' else [fmt]
+    if any(f not in CHART_FORMATS for f in formats):
+        print(f"{Colors.RED}Invalid format{Colors.END}")
+        return
+
+    print_charts_result(render_charts(data, selected, formats))
+
+def print_charts_result(result):
+    """Summary of a headless render run"""
+    print(f"\n{Colors.GREEN}Rendered: {len(result['rendered'])}  Cached: {len(result['cached'])}{Colors.END}")
+    for path in result['rendered']:
+        print(f"  + {path}")
+    for path in result['cached']:
+        print(f"  = {path}")
+    if result['failed']:
+        print(f"{Colors.YELLOW}Skipped (no data or error): {', '.join(result['failed'])}{Colors.END}")
+
+# ==========================================
+# SECTION 8D: BACKGROUND REPORTS (SNAPSHOT ISOLATED)
+# ==========================================
+
+def render_all_charts(data):
+    """Render every chart headless (background report entry point)"""
+    plt.switch_backend('Agg')
+    print_charts_result(render_charts(data))
+
+# Menu key -> (title, report function, prompts). Prompts are answered in the
+# foreground and replayed to the report's input() calls inside the worker.
+BACKGROUND_REPORTS = {
+    '1': ('Bank Financial Summary', report_bank_summary, []),
+    '2': ('Daily Transactions Summary', report_daily_transactions, []),
+    '3': ('Loan Portfolio Analysis', report_loan_portfolio, []),
+    '4': ('Database Summary (All Tables)', export_database_summary, []),
+    '5': ('Month-End Balance Snapshot', report_balance_snapshot, ['Month (YYYY-MM, blank for current)']),
+    '6': ('Render All Charts to Files', render_all_charts, []),
+    '7': ('Loan Book Cash-Flow Projection', report_loan_projection,
+          [f"Horizon in months (blank for {LOAN_PROJECTION_MONTHS})", 'Liquidity need (₹, blank to skip)'])
+}
+
+_report_jobs = []
+
+def snapshot_context():
+    """Process start method for report workers: forkserver where available, else spawn.
+
+    Both pickle the tables at start(), on the calling thread, so the worker gets
+    one instant's state while postings carry on. fork is avoided: copying a
+    process that has the save-writer thread running can deadlock on a lock the
+    writer held (and warns on Python 3.12+).
+    """
+    import multiprocessing
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+def run_report_job(key, answers, path, header, data):
+    """Worker body: run one report against the snapshot, writing its output to path"""
+    import builtins
+    # Patching input()/stdout process-wide is intentional: this process exists
+    # only to run this one report, and the reports print and prompt directly
+    replies = iter(answers)
+    builtins.input = lambda prompt='': next(replies, '')
+    with open(path, 'w', encoding='utf-8') as out:
+        sys.stdout = sys.stderr = out
+        rebuild_transaction_timeline(data)
+        rebuild_bank_totals(data)
+        print(header)
+        BACKGROUND_REPORTS[key][1](data)
+
+def job_status(job):
+    """Running / Done / Failed for a background report"""
+    if job['process'].is_alive():
+        return 'Running'
+    job['process'].join()
+    if job['finished'] is None:
+        job['finished'] = get_timestamp()
+    return 'Done' if job['process'].exitcode == 0 else 'Failed'
+
+def submit_background_report(data, key, answers=()):
+    """Start a report in a worker process against the current state; returns the job"""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    title = BACKGROUND_REPORTS[key][0]
+    job_id = len(_report_jobs) + 1
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(REPORT_DIR, f"report_{stamp}_{job_id}_{key}.txt")
+    seq = ledger_head(data)
+    header = f"{title} -- snapshot as of {get_timestamp()} (ledger head {seq})"
+
+    process = snapshot_context().Process(target=run_report_job, args=(key, list(answers), path, header, data))
+    process.start()
+    job = {'id': job_id, 'title': title, 'process': process, 'path': path, 'seq': seq,
+           'started': get_timestamp(), 'finished': None}
+    _report_jobs.append(job)
+    return job
+
+def wait_for_reports(timeout=None):
+    """Block until background reports finish (used before exit)"""
+    for job in _report_jobs:
+        job['process'].join(timeout)
+
+def show_report_output(job):
+    """Print a finished job's captured output"""
+    with open(job['path'], encoding='utf-8') as f:
+        print(f.read())
+
+def background_reports_menu(data):
+    """Queue reports on a snapshot and collect their output while tellers keep posting"""
+    while True:
+        print(f"\n{Colors.CYAN}--- Background Reports (Snapshot) ---{Colors.END}")
+        if _report_jobs:
+            print(f"\n{'ID':<4} {'Report':<32} {'Ledger Head':>11} {'Started':<20} {'Status':<8}")
+            print("-" * 79)
+            for job in _report_jobs:
+                status = job_status(job)
+                color = {'Done': Colors.GREEN, 'Failed': Colors.RED}.get(status, Colors.YELLOW)
+                print(f"{job['id']:<4} {job['title']:<32} {job['seq']:>11} {job['started']:<20} {color}{status:<8}{Colors.END}")
+        print("\n1. Start Report")
+        print("2. View Output")
+        print("3. Back")
+        choice = input("Select: ").strip()
+
+        if choice == '1':
+            for key, (title, _, _) in BACKGROUND_REPORTS.items():
+                print(f"  {key}. {title}")
+            key = input("Report: ").strip()
+            if key not in BACKGROUND_REPORTS:
+                print(f"{Colors.RED}Invalid report{Colors.END}")
+                continue
+            answers = [input(f"{prompt}: ").strip() for prompt in BACKGROUND_REPORTS[key][2]]
+            job = submit_background_report(data, key, answers)
+            print(f"{Colors.GREEN}✓ Job {job['id']} started on snapshot at ledger head {job['seq']}{Colors.END}")
+        elif choice == '2':
+            job_id = input("Job ID: ").strip()
+            job = next((j for j in _report_jobs if str(j['id']) == job_id), None)
+            if job is None:
+                print(f"{Colors.RED}No such job{Colors.END}")
+            elif job_status(job) == 'Running':
+                print(f"{Colors.YELLOW}Job {job['id']} is still running{Colors.END}")
+            elif os.path.exists(job['path']):
+                show_report_output(job)
+            else:
+                print(f"{Colors.RED}Job {job['id']} produced no output{Colors.END}")
+        elif choice == '3':
+            break
+        else:
+            print("Invalid option.")
+
 def generate_reports(data):
     while True:
         print(f"\n{Colors.BOLD}{Colors.BLUE}=== REPORTS & ANALYTICS ==={Colors.END}")
@@ -2093,7 +4120,11 @@ def generate_reports(data):
         print("15. Loan EMI Analysis (4 Charts)")
         print("16. Daily Activity Timeline")
         print("17. Comprehensive Dashboard (6 Charts)")
-        print(f"\n18. Back to Main Menu")
+        print("18. Render Charts to Files (Headless)")
+        print("19. Month-End Balance Snapshot (AMB Check)")
+        print("20. Background Reports (Snapshot)")
+        print("21. Loan Book Cash-Flow Projection")
+        print(f"\n22. Back to Main Menu")
         
         choice = input("\nSelect Report: ").strip()
         
@@ -2114,7 +4145,11 @@ def generate_reports(data):
         elif choice == '15': visualize_loan_emi_analysis(data)
         elif choice == '16': visualize_daily_activity(data)
         elif choice == '17': visualize_comprehensive_dashboard(data)
-        elif choice == '18': break
+        elif choice == '18': render_charts_menu(data)
+        elif choice == '19': report_balance_snapshot(data)
+        elif choice == '20': background_reports_menu(data)
+        elif choice == '21': report_loan_projection(data)
+        elif choice == '22': break
         else: print("Invalid option.")
 
 # ==========================================
@@ -2126,11 +4161,10 @@ def dashboard(data):
     print(f"║       COREBANK MANAGEMENT SYSTEM         ║")
     print(f"╚══════════════════════════════════════════╝{Colors.END}")
     print(f"\n{Colors.CYAN}Quick Stats:{Colors.END}")
-    print(f"  Customers: {len(data['customers']):<8} Accounts: {len(data['accounts']):<8} Cards: {len(data['cards'])}")
-    total_balance = data['accounts']['Balance'].sum() if not data['accounts'].empty else 0
-    total_loans = data['loans']['OutstandingAmount'].sum() if not data['loans'].empty else 0
-    print(f"  Balance:   ₹{total_balance:,.2f}")
-    print(f"  Loans:     {len(data['loans']):<8} Outstanding: ₹{total_loans:,.2f}")
+    totals = get_bank_totals(data)
+    print(f"  Customers: {totals['Customers']:<8} Accounts: {totals['Accounts']:<8} Cards: {totals['Cards']}")
+    print(f"  Balance:   ₹{totals['TotalDeposits']:,.2f}")
+    print(f"  Loans:     {totals['Loans']:<8} Outstanding: ₹{totals['OutstandingLoans']:,.2f}")
     print(f"  Time:      {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{Colors.CYAN}{'─'*44}{Colors.END}")
 
@@ -2142,7 +4176,8 @@ def loan_management_menu(data):
         print("2. Pay Loan EMI")
         print("3. View Loan Details")
         print("4. View All Loans")
-        print("5. Back to Main Menu")
+        print("5. Amortization Schedule")
+        print("6. Back to Main Menu")
         
         choice = input("\nSelect: ").strip()
         
@@ -2154,10 +4189,11 @@ def loan_management_menu(data):
                 print("No loans found.")
             else:
                 print(data['loans'][['LoanID', 'CustomerID', 'LoanType', 'PrincipalAmount', 'EMI', 'OutstandingAmount', 'Status']].to_string(index=False))
-        elif choice == '5': break
+        elif choice == '5': view_amortization_schedule(data)
+        elif choice == '6': break
         else: print("Invalid option.")
         
-        save_data(data)
+        request_save(data)
     
     return data
 
@@ -2165,6 +4201,131 @@ def loan_management_menu(data):
 # SECTION 9A: ADVANCED FEATURES
 # ==========================================
 
+# --- Statement Engine ---
+
+def build_statements(data, start, end, accounts=None):
+    """Per-account opening/closing balances and running-balance lines for [start, end].
+
+    Balances are anchored to the current account balance and rolled back
+    through the ledger, so closing = balance - net movement after `end`.
+    """
+    accs = data['accounts'].drop_duplicates('AccountNumber')
+    if accounts is not None:
+        accs = accs[accs['AccountNumber'].isin(accounts)]
+    txns = ledger_since(data, start)
+    txns = txns[txns['AccountNumber'].isin(accs['AccountNumber'])]
+
+    # Legacy-format dates are normalised to YYYY-MM-DD before the range test
+    day = parse_dates(txns['Date']).dt.strftime('%Y-%m-%d')
+    dated = day.notna()
+    signed = signed_amounts(txns)
+    in_range = dated & (day >= start) & (day <= end)
+    after = dated & (day > end)
+
+    def per_account(mask, values):
+        return values[mask].groupby(txns.loc[mask, 'AccountNumber']).sum()
+
+    summary = accs[['AccountNumber', 'CustomerID', 'AccountType']].reset_index(drop=True)
+    names = data['customers'].drop_duplicates('CustomerID').set_index('CustomerID')['Name']
+    summary['Name'] = summary['CustomerID'].map(names).fillna('N/A')
+    balance = pd.to_numeric(accs['Balance'], errors='coerce').fillna(0).values
+    acc_nums = summary['AccountNumber']
+
+    summary['Closing'] = balance - acc_nums.map(per_account(after, signed)).fillna(0)
+    summary['Credits'] = acc_nums.map(per_account(in_range, signed.clip(lower=0))).fillna(0)
+    summary['Debits'] = acc_nums.map(per_account(in_range, -signed.clip(upper=0))).fillna(0)
+    summary['Opening'] = summary['Closing'] - summary['Credits'] + summary['Debits']
+    summary['Transactions'] = acc_nums.map(txns.loc[in_range, 'AccountNumber'].value_counts()).fillna(0).astype(int)
+
+    lines = txns.loc[in_range, ['AccountNumber', 'TransactionID', 'Date', 'Time', 'TransactionType', 'Remarks', 'DebitCredit']].copy()
+    lines['Date'] = day[in_range]
+    lines['Time'] = lines['Time'].fillna('').astype(str)
+    lines['Signed'] = signed[in_range]
+    # Stable sort keeps posting order for same-second entries
+    lines = lines.sort_values(['AccountNumber', 'Date', 'Time'], kind='mergesort')
+    opening = summary.set_index('AccountNumber')['Opening']
+    lines['Balance'] = lines['AccountNumber'].map(opening) + lines.groupby('AccountNumber')['Signed'].cumsum()
+    return summary, lines.reset_index(drop=True)
+
+def format_statement_text(acc, lines, start, end):
+    """Fixed-width printable statement for one account"""
+    out = ['=' * 96, f"{'COREBANK ACCOUNT STATEMENT':^96}", '=' * 96,
+           f"Account Holder: {acc['Name']}",
+           f"Account Number: {acc['AccountNumber']}    Account Type: {acc['AccountType']}",
+           f"Period:         {start} to {end}    Generated: {get_timestamp()}",
+           '-' * 96,
+           f"{'Date':<11}{'Time':<9}{'Transaction':<12}{'Type':<18}{'Debit':>14}{'Credit':>14}{'Balance':>18}",
+           '-' * 96,
+           f"{start:<11}{'':<9}{'':<12}{'Opening Balance':<18}{'':>14}{'':>14}{acc['Opening']:>18,.2f}"]
+    for t in lines.itertuples(index=False):
+        debit = f"{-t.Signed:,.2f}" if t.Signed < 0 else ''
+        credit = f"{t.Signed:,.2f}" if t.Signed > 0 else ''
+        out.append(f"{t.Date:<11}{t.Time[:8]:<9}{str(t.TransactionID):<12}{str(t.TransactionType)[:17]:<18}"
+                   f"{debit:>14}{credit:>14}{t.Balance:>18,.2f}")
+    out += [f"{end:<11}{'':<9}{'':<12}{'Closing Balance':<18}{'':>14}{'':>14}{acc['Closing']:>18,.2f}",
+            '-' * 96,
+            f"Total Debits: {acc['Debits']:,.2f}    Total Credits: {acc['Credits']:,.2f}    Transactions: {acc['Transactions']}",
+            '=' * 96]
+    return '\n'.join(out) + '\n'
+
+def statement_frame(acc, lines, start, end):
+    """CSV layout: opening row, one row per transaction, closing row"""
+    body = pd.DataFrame({
+        'Date': lines['Date'], 'Time': lines['Time'], 'TransactionID': lines['TransactionID'],
+        'TransactionType': lines['TransactionType'], 'Remarks': lines['Remarks'],
+        'Debit': (-lines['Signed']).clip(lower=0), 'Credit': lines['Signed'].clip(lower=0),
+        'Balance': lines['Balance'].round(2)
+    })
+    opening = pd.DataFrame([{'Date': start, 'TransactionType': 'Opening Balance', 'Balance': round(acc['Opening'], 2)}])
+    closing = pd.DataFrame([{'Date': end, 'TransactionType': 'Closing Balance', 'Balance': round(acc['Closing'], 2)}])
+    return pd.concat([opening, body, closing], ignore_index=True)
+
+def write_statements(batch, start, end, fmt, out_dir):
+    """Worker task: write one file per account in the batch; returns paths written"""
+    paths = []
+    for acc, lines in batch:
+        path = os.path.join(out_dir, f"{acc['AccountNumber']}.{fmt}")
+        if fmt == 'csv':
+            statement_frame(acc, lines, start, end).to_csv(path, index=False)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(format_statement_text(acc, lines, start, end))
+        paths.append(path)
+    return paths
+
+def export_statements(data, start, end, accounts=None, fmt='csv', workers=CHART_WORKERS, batch_size=500):
+    """Write statements for many accounts to STATEMENT_DIR/<start>_<end>/ via a worker pool"""
+    summary, lines = build_statements(data, start, end, accounts)
+    out_dir = os.path.join(STATEMENT_DIR, f"{start}_{end}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    by_account = dict(tuple(lines.groupby('AccountNumber', sort=False)))
+    empty = lines.iloc[0:0]
+    items = [(acc, by_account.get(acc['AccountNumber'], empty)) for acc in summary.to_dict('records')]
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+    paths = []
+    if workers <= 1 or len(batches) <= 1:
+        for batch in batches:
+            paths += write_statements(batch, start, end, fmt, out_dir)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            futures = [pool.submit(write_statements, batch, start, end, fmt, out_dir) for batch in batches]
+            for future in futures:
+                paths += future.result()
+    return summary, paths
+
+def read_date_range():
+    """Prompt for a statement period, defaulting to month-to-date"""
+    today = get_date()
+    start = input(f"From (YYYY-MM-DD) [{today[:8]}01]: ").strip() or f"{today[:8]}01"
+    end = input(f"To   (YYYY-MM-DD) [{today}]: ").strip() or today
+    if not (validate_date_format(start) and validate_date_format(end)) or start > end:
+        print(f"{Colors.RED}Invalid date range{Colors.END}")
+        return None, None
+    return start, end
+
 def generate_account_statement(data):
     """Generate detailed account statement"""
     print(f"\n{Colors.CYAN}--- Account Statement ---{Colors.END}")
@@ -2176,43 +4337,68 @@ def generate_account_statement(data):
         print(f"{Colors.RED}Account not found{Colors.END}")
         return
     
+    start, end = read_date_range()
+    if start is None:
+        return
+    
     acc = account.iloc[0]
-    customer_id = acc['CustomerID']
-    customer = data['customers'][data['customers']['CustomerID'] == customer_id]
+    summary, lines = build_statements(data, start, end, [acc_num])
+    stmt = summary.iloc[0]
     
     print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}")
     print(f"{'COREBANK ACCOUNT STATEMENT':^60}")
     print(f"{'='*60}{Colors.END}\n")
     
-    print(f"Account Holder: {customer.iloc[0]['Name']}")
+    print(f"Account Holder: {stmt['Name']}")
     print(f"Account Number: {acc_num}")
     print(f"Account Type: {acc['AccountType']}")
-    print(f"Statement Date: {get_date()}")
+    print(f"Statement Period: {start} to {end}")
     print(f"\n{Colors.CYAN}Account Summary:{Colors.END}")
-    print(f"  Opening Balance: ₹{acc['Balance']:,.2f}")
+    print(f"  Opening Balance: ₹{stmt['Opening']:,.2f}")
+    print(f"  Total Credits:   ₹{stmt['Credits']:,.2f}")
+    print(f"  Total Debits:    ₹{stmt['Debits']:,.2f}")
+    print(f"  Closing Balance: ₹{stmt['Closing']:,.2f}")
     print(f"  Current Balance: ₹{acc['Balance']:,.2f}")
     print(f"  Interest Rate: {acc['InterestRate']:.2f}%")
     print(f"  Minimum Balance: ₹{acc['MinBalance']:,.2f}")
     print(f"  Status: {acc['Status']}")
     
-    # Get last 10 transactions
-    trans = data['transactions'][data['transactions']['AccountNumber'] == acc_num]
-    if not trans.empty:
-        trans_sorted = trans.sort_values('Date', ascending=False).head(10)
-        print(f"\n{Colors.CYAN}Recent Transactions (Last 10):{Colors.END}")
+    if not lines.empty:
+        print(f"\n{Colors.CYAN}Transactions ({len(lines)}):{Colors.END}")
         print(f"{'-'*60}")
-        for idx, t in trans_sorted.iterrows():
-            txn_type = str(t.get('TransactionType', 'N/A') or 'N/A')
-            symbol = "+" if txn_type in ['Deposit', 'Credit', 'Cheque Credit', 'Transfer Credit'] else "-"
-            amount = float(t.get('Amount', 0) or 0)
-            # Handle both column naming conventions
-            balance = t.get('Balance_After') or t.get('BalanceAfter') or 0
-            balance = float(balance) if pd.notna(balance) else 0
-            date_str = str(t.get('Date', 'N/A') or 'N/A')[:10]
-            print(f"{date_str:12} {txn_type[:10]:10} {symbol}₹{abs(amount):>10,.2f} Balance: ₹{balance:>12,.2f}")
+        for t in lines.itertuples(index=False):
+            symbol = "+" if t.Signed >= 0 else "-"
+            print(f"{t.Date:12} {str(t.TransactionType)[:10]:10} {symbol}₹{abs(t.Signed):>10,.2f} Balance: ₹{t.Balance:>12,.2f}")
         print(f"{'-'*60}\n")
     else:
-        print(f"\n{Colors.YELLOW}No transactions found{Colors.END}\n")
+        print(f"\n{Colors.YELLOW}No transactions in this period{Colors.END}\n")
+    
+    fmt = input(f"Export to file? ({'/'.join(STATEMENT_FORMATS)}/n) [n]: ").strip().lower()
+    if fmt in STATEMENT_FORMATS:
+        _, paths = export_statements(data, start, end, [acc_num], fmt, workers=1)
+        print(f"{Colors.GREEN}✓ Statement saved: {paths[0]}{Colors.END}")
+
+def run_statement_batch(data):
+    """Month-end statement run for every account"""
+    print(f"\n{Colors.CYAN}--- Statement Run (All Accounts) ---{Colors.END}")
+    if data['accounts'].empty:
+        print("No accounts.")
+        return data
+    
+    start, end = read_date_range()
+    if start is None:
+        return data
+    fmt = input(f"Format ({'/'.join(STATEMENT_FORMATS)}) [csv]: ").strip().lower() or 'csv'
+    if fmt not in STATEMENT_FORMATS:
+        print(f"{Colors.RED}Invalid format{Colors.END}")
+        return data
+    
+    summary, paths = export_statements(data, start, end, fmt=fmt)
+    print(f"{Colors.GREEN}✓ {len(paths)} statements written to {os.path.join(STATEMENT_DIR, f'{start}_{end}')}{Colors.END}")
+    print(f"  Opening Total: ₹{summary['Opening'].sum():,.2f}")
+    print(f"  Closing Total: ₹{summary['Closing'].sum():,.2f}")
+    data = log_audit(data, 'STATEMENT_RUN', f"{len(paths)} statements {start} to {end} ({fmt})")
+    return data
 
 def calculate_account_interest(data):
     """Calculate interest accrued on accounts"""
@@ -2277,6 +4463,7 @@ def view_customer_financial_dashboard(data):
     # Get transactions count
     account_nums = accounts['AccountNumber'].tolist() if not accounts.empty else []
     trans = data['transactions'][data['transactions']['AccountNumber'].isin(account_nums)]
+    archived_txns = int(archive_carry()['Count'].reindex(account_nums).fillna(0).sum())
     
     print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}")
     print(f"{'FINANCIAL DASHBOARD':^60}")
@@ -2293,7 +4480,7 @@ def view_customer_financial_dashboard(data):
     print(f"  Total Loans: {len(loans)}")
     print(f"  Total Outstanding: ₹{total_loans:,.2f}")
     print(f"  Cards Issued: {len(cards)}")
-    print(f"  Total Transactions: {len(trans)}")
+    print(f"  Total Transactions: {len(trans) + archived_txns}")
     
     net_worth = total_balance - total_loans
     print(f"\n{Colors.CYAN}Net Worth:{Colors.END}")
@@ -2313,21 +4500,69 @@ def view_customer_financial_dashboard(data):
             print(f"  {status_color}{acc['AccountNumber']:10} {acc['AccountType']:10} ₹{acc['Balance']:>12,.2f} {acc['Status']}{Colors.END}")
     
     # Credit score
-    credit_score = calculate_credit_score(total_balance, len(loans), len(trans))
+    credit_score = int(get_credit_scores(data, [cust_id]).iloc[0]['DashboardScore'])
     print(f"\n{Colors.CYAN}Credit Score: {Colors.BOLD}{credit_score}{Colors.END}")
-    if credit_score >= 750:
-        rating = "Excellent"
-    elif credit_score >= 650:
-        rating = "Good"
-    elif credit_score >= 550:
-        rating = "Fair"
-    else:
-        rating = "Poor"
-    print(f"Rating: {rating}")
+    print(f"Rating: {credit_rating(credit_score)}")
+
+def build_loan_offer_grid(amounts, tenures, loan_types=None):
+    """EMI/total cost for every (loan type x amount x tenure) cell, rates from LOAN_RATES"""
+    loan_types = list(loan_types or LOAN_RATES.keys())
+    rates = np.array([LOAN_RATES[t] for t in loan_types], dtype=float)
+    type_idx, amount_grid, tenure_grid = np.meshgrid(
+        np.arange(len(loan_types)), np.asarray(amounts, dtype=float),
+        np.asarray(tenures, dtype=int), indexing='ij')
+    type_idx, amount_grid, tenure_grid = type_idx.ravel(), amount_grid.ravel(), tenure_grid.ravel()
+
+    emi = calculate_emi_vectorized(amount_grid, rates[type_idx], tenure_grid)
+    total = emi * tenure_grid
+    return pd.DataFrame({
+        'LoanType': np.asarray(loan_types)[type_idx],
+        'Rate': rates[type_idx],
+        'Amount': amount_grid,
+        'Tenure': tenure_grid,
+        'EMI': emi,
+        'TotalPayable': total.round(2),
+        'TotalInterest': (total - amount_grid).round(2)
+    })
+
+def cheapest_loan_offers(grid, max_emi=None, min_amount=None, top=10, sort_by='TotalInterest'):
+    """Offers with EMI <= max_emi (and amount >= min_amount), cheapest first"""
+    offers = grid
+    if max_emi is not None:
+        offers = offers[offers['EMI'] <= max_emi]
+    if min_amount is not None:
+        offers = offers[offers['Amount'] >= min_amount]
+    return offers.sort_values([sort_by, 'EMI'], kind='stable').head(top)
+
+def loan_offer_heatmap(grid, loan_type, value='EMI'):
+    """Amount x Tenure pivot of one loan type (heatmap data)"""
+    return grid[grid['LoanType'] == loan_type].pivot(index='Amount', columns='Tenure', values=value)
+
+def read_number_range(prompt, default):
+    """Read 'start end step' from the user; blank or invalid input keeps the default range"""
+    raw = input(f"{prompt} [start end step, default {' '.join(str(v) for v in default)}]: ").strip()
+    start, end, step = default
+    if raw:
+        try:
+            values = [float(v) for v in raw.split()]
+        except ValueError:
+            values = []
+        if len(values) == 3 and np.isfinite(values).all() and values[2] > 0 and values[1] >= values[0]:
+            start, end, step = values
+        else:
+            print(f"{Colors.RED}Invalid range (need start <= end and step > 0), using default{Colors.END}")
+    return np.arange(start, end + step / 2, step)
 
 def compare_loan_offers(data):
     """Compare different loan types and EMI"""
     print(f"\n{Colors.CYAN}--- Loan Comparison Tool ---{Colors.END}")
+    print("1. Quick Compare (one amount & tenure)")
+    print("2. Offer Grid Explorer (amounts x tenures x types)")
+    mode = input("Select: ").strip()
+    
+    if mode == '2':
+        explore_loan_offers()
+        return
     
     amount = float(input("Loan Amount (₹): ").strip())
     tenure = int(input("Tenure (months): ").strip())
@@ -2336,30 +4571,736 @@ def compare_loan_offers(data):
     print(f"Amount: ₹{amount:,.2f}")
     print(f"Tenure: {tenure} months ({tenure/12:.1f} years)\n")
     
-    loan_types = {
-        'Home Loan': 8.5,
-        'Personal Loan': 12.0,
-        'Car Loan': 9.5,
-        'Education Loan': 7.5,
-        'Business Loan': 11.0
-    }
-    
     print(f"{'Loan Type':<20} {'Interest':<12} {'Monthly EMI':<15} {'Total Amount':<15} {'Total Interest':<15}")
     print(f"{'-'*77}")
     
-    for loan_type, rate in loan_types.items():
-        emi = calculate_emi(amount, rate, tenure)
-        total = emi * tenure
-        interest = total - amount
-        print(f"{loan_type:<20} {rate:>6.2f}% {emi:>14,.2f} {total:>14,.2f} {interest:>14,.2f}")
+    for _, offer in build_loan_offer_grid([amount], [tenure]).iterrows():
+        print(f"{offer['LoanType']:<20} {offer['Rate']:>6.2f}% {offer['EMI']:>14,.2f} {offer['TotalPayable']:>14,.2f} {offer['TotalInterest']:>14,.2f}")
+
+def explore_loan_offers():
+    """Evaluate a full offer grid and answer 'cheapest option under EMI X'"""
+    amounts = read_number_range("Loan amounts (₹)", (100000, 5000000, 50000))
+    tenures = read_number_range("Tenures (months)", (12, 360, 6)).astype(int)
+    grid = build_loan_offer_grid(amounts, tenures)
+    print(f"\nEvaluated {len(grid):,} offers ({len(LOAN_RATES)} types x {len(amounts)} amounts x {len(tenures)} tenures)")
+    
+    max_emi = input("Maximum affordable EMI (₹, blank for any): ").strip()
+    min_amount = input("Minimum amount needed (₹, blank for any): ").strip()
+    offers = cheapest_loan_offers(grid,
+                                  max_emi=float(max_emi) if max_emi else None,
+                                  min_amount=float(min_amount) if min_amount else None)
+    
+    if offers.empty:
+        print(f"{Colors.YELLOW}No offer fits those limits.{Colors.END}")
+        return
+    
+    print(f"\n{Colors.BOLD}Cheapest Offers (by total interest):{Colors.END}")
+    print(offers.to_string(index=False, formatters={
+        'Amount': '₹{:,.0f}'.format, 'EMI': '₹{:,.2f}'.format,
+        'TotalPayable': '₹{:,.2f}'.format, 'TotalInterest': '₹{:,.2f}'.format}))
+
+# ==========================================
+# SECTION 9C: END-OF-DAY BATCH JOBS
+# ==========================================
+
+def parse_dates(series):
+    """Parse a date column into datetimes (invalid/blank -> NaT).
+
+    YYYY-MM-DD takes the fast fixed-format path; only rows that fail it are
+    retried with flexible parsing, so legacy or non-ISO dates still count.
+    """
+    parsed = pd.to_datetime(series, format='%Y-%m-%d', errors='coerce')
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        legacy = series[retry].astype(str).str.strip()
+        legacy = legacy[legacy.ne('') & legacy.ne('nan')]
+        if not legacy.empty:
+            parsed.loc[legacy.index] = pd.to_datetime(legacy, format='mixed', errors='coerce')
+    return parsed
+
+def read_run_date():
+    """Prompt for a batch run date, defaulting to today"""
+    run_date = input("Run date (YYYY-MM-DD, blank for today): ").strip()
+    if run_date and not validate_date_format(run_date):
+        print(f"{Colors.RED}Invalid date, using today{Colors.END}")
+        return None
+    return run_date or None
+
+def accrue_interest(accounts, run_date):
+    """Vectorized simple interest accrued since LastInterestCredited for every account.
+
+    Legacy rows without a stamp fall back to OpeningDate, then RegistrationDate.
+    Returns (days, interest) Series aligned with the accounts index.
+    """
+    last = parse_dates(accounts['LastInterestCredited'])
+    for fallback in ['OpeningDate', 'RegistrationDate']:
+        if fallback in accounts.columns:
+            last = last.fillna(parse_dates(accounts[fallback]))
+
+    days = (pd.Timestamp(run_date) - last).dt.days
+    balance = pd.to_numeric(accounts['Balance'], errors='coerce').fillna(0)
+    rate = pd.to_numeric(accounts['InterestRate'], errors='coerce').fillna(0)
+
+    # Same formula as calculate_simple_interest: (P x R x T) / 100
+    interest = (balance * rate * (days / 365) / 100).round(2)
+    return days, interest
+
+def run_interest_credit(data, run_date=None):
+    """Credit accrued interest to every eligible Savings/FD account in one pass.
+
+    Safe to re-run: accounts already stamped with run_date accrue zero days.
+    """
+    print(f"\n{Colors.CYAN}--- End-of-Day Interest Credit ---{Colors.END}")
+    run_date = run_date or get_date()
+    accounts = data['accounts']
+
+    if accounts.empty:
+        print("No accounts found.")
+        return data
+
+    days, interest = accrue_interest(accounts, run_date)
+    eligible = accounts['Status'].eq('Active') & accounts['AccountType'].isin(INTEREST_ACCOUNT_TYPES)
+    unstamped = eligible & days.isna()
+    due = eligible & (days > 0)
+    credit = due & (interest > 0)
+
+    balance = pd.to_numeric(accounts['Balance'], errors='coerce').fillna(0)
+    new_balance = balance + interest.where(credit, 0)
+
+    txns = pd.DataFrame({
+        'AccountNumber': accounts.loc[credit, 'AccountNumber'].values,
+        'TransactionType': 'Interest Credit',
+        'Amount': interest[credit].values,
+        'DebitCredit': 'Credit',
+        'Balance_After': new_balance[credit].round(2).values,
+        'Date': run_date,
+        'Time': datetime.now().strftime("%H:%M:%S"),
+        'Remarks': ('Interest for ' + days[credit].astype(int).astype(str) + ' days @ '
+                    + accounts.loc[credit, 'InterestRate'].astype(str) + '%').values
+    })
+
+    # Accounts with no usable stamp start accruing from today
+    data['accounts'].loc[due | unstamped, 'LastInterestCredited'] = run_date
+    data = post_transactions(data, txns)
+
+    total_interest = interest[credit].sum()
+    print(f"Run Date:           {run_date}")
+    print(f"Eligible Accounts:  {int(eligible.sum())}")
+    print(f"Accounts Credited:  {int(credit.sum())}")
+    print(f"Total Interest:     ₹{total_interest:,.2f}")
+    if not credit.any():
+        print(f"{Colors.YELLOW}Nothing to credit (already run for {run_date}?){Colors.END}")
+    else:
+        print(f"{Colors.GREEN}✓ Interest credited{Colors.END}")
+
+    data = log_audit(data, 'INTEREST_CREDITED', f'₹{total_interest:,.2f} to {int(credit.sum())} accounts for {run_date}')
+    return data
+
+def first_valid_date(df, columns):
+    """Row-wise first parseable date across candidate columns (legacy schema support)"""
+    result = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    for col in columns:
+        if col in df.columns:
+            result = result.fillna(parse_dates(df[col]))
+    return result
+
+def check_debits(data, run, account_col, amount_col):
+    """Vectorized affordability check for a batch of debits against account balances.
+
+    Debits sharing an account are taken smallest-first; each must leave the
+    account at or above MinBalance, and once one fails every later debit on
+    that account fails too. Adds Balance, MinBalance, Balance_After and
+    Reason ('' when the debit can go through) columns.
+    """
+    accounts = data['accounts'].drop_duplicates('AccountNumber').set_index('AccountNumber')
+    run['Balance'] = run[account_col].map(accounts['Balance']).astype(float)
+    run['MinBalance'] = run[account_col].map(accounts['MinBalance']).astype(float).fillna(0)
+    account_status = run[account_col].map(accounts['Status'])
+
+    run = run.sort_values([account_col, amount_col], kind='stable')
+    cumulative = run.groupby(account_col)[amount_col].cumsum()
+    run['Balance_After'] = (run['Balance'] - cumulative).round(2)
+
+    run['Reason'] = ''
+    run.loc[run['Balance_After'] < run['MinBalance'], 'Reason'] = 'Insufficient balance'
+    run.loc[account_status.reindex(run.index).ne('Active'), 'Reason'] = 'Account inactive'
+    run.loc[run['Balance'].isna(), 'Reason'] = 'Account not found'
+
+    blocked = run['Reason'].ne('').groupby(run[account_col]).cummax()
+    run.loc[blocked & run['Reason'].eq(''), 'Reason'] = 'Insufficient balance'
+    return run
+
+def apply_balance_changes(data, deltas):
+    """Add a Series of net balance changes (indexed by AccountNumber) to accounts"""
+    rows = data['accounts']['AccountNumber'].isin(deltas.index)
+    data['accounts'].loc[rows, 'Balance'] = (
+        data['accounts'].loc[rows, 'Balance']
+        + data['accounts'].loc[rows, 'AccountNumber'].map(deltas)
+    ).round(2)
+    touch_tables('accounts')
+    return data
+
+def compute_emi_run(data, run_date):
+    """Work out the EMI auto-debit for every Active loan due on run_date.
+
+    A loan is due once a month, on the day-of-month it started (clamped to
+    month end), starting the month after disbursal and only if no successful
+    payment was recorded in run_date's month. Returns (debits, failures).
+    """
+    loans = data['loans']
+    if loans.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    run_ts = pd.Timestamp(run_date)
+    run_month = run_ts.to_period('M')
+
+    start = first_valid_date(loans, ['StartDate', 'DisbursementDate', 'ApprovalDate'])
+    anchor_day = np.minimum(start.dt.day, run_ts.days_in_month)
+
+    payments = data['loan_payments']
+    if not payments.empty:
+        paid = payments[payments['Status'] == 'Success']
+        paid_on = first_valid_date(paid, ['PaymentDate', 'Date'])
+        last_paid = paid_on.groupby(paid['LoanID']).max()
+        last_paid_month = loans['LoanID'].map(last_paid).dt.to_period('M')
+        paid_this_month = last_paid_month == run_month
+    else:
+        paid_this_month = pd.Series(False, index=loans.index)
+
+    due = (loans['Status'].eq('Active')
+           & (start.dt.to_period('M') < run_month)
+           & (run_ts.day >= anchor_day)
+           & ~paid_this_month.fillna(False).astype(bool))
+    loans = loans[due]
+    if loans.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    # Same split as pay_loan_emi
+    emi = pd.to_numeric(loans['EMI'], errors='coerce').fillna(0)
+    outstanding = pd.to_numeric(loans['OutstandingAmount'], errors='coerce').fillna(0)
+    monthly_rate = pd.to_numeric(loans['InterestRate'], errors='coerce').fillna(0) / (12 * 100)
+    interest_part = outstanding * monthly_rate
+    principal_part = np.minimum(emi - interest_part, outstanding)
+
+    run = pd.DataFrame({
+        'LoanID': loans['LoanID'],
+        'LinkedAccount': loans['LinkedAccount'].fillna('').astype(str).str.strip(),
+        'InterestPart': interest_part.round(2),
+        'PrincipalPart': principal_part.round(2),
+        'AmountPaid': (interest_part + principal_part).round(2),
+        'OutstandingAfter': (outstanding - principal_part).round(2).clip(lower=0)
+    })
+
+    # An EMI at or below the month's interest would grow the loan: never debit it
+    short = run[principal_part <= 0].assign(Reason='EMI below interest due')
+    run = check_debits(data, run[principal_part > 0], 'LinkedAccount', 'AmountPaid')
+
+    debits = run[run['Reason'] == ''].drop(columns=['Reason'])
+    failures = pd.concat([run[run['Reason'] != ''], short])
+    failures = failures.reindex(columns=['LoanID', 'LinkedAccount', 'AmountPaid', 'Balance', 'MinBalance', 'Reason'])
+    return debits, failures
+
+def run_emi_autodebit(data, run_date=None):
+    """Auto-debit EMIs for all due loans from their linked accounts in bulk"""
+    print(f"\n{Colors.CYAN}--- EMI Auto-Debit Run ---{Colors.END}")
+    run_date = run_date or get_date()
+
+    debits, failures = compute_emi_run(data, run_date)
+    if debits.empty and failures.empty:
+        print(f"No EMIs due on {run_date}.")
+        return data
+
+    if not debits.empty:
+        now = datetime.now().strftime("%H:%M:%S")
+
+        payments = pd.DataFrame({
+            'PaymentID': generate_ids('PAY', len(data['loan_payments']) + 1, len(debits)),
+            'LoanID': debits['LoanID'].values,
+            'PaymentDate': run_date,
+            'AmountPaid': debits['AmountPaid'].values,
+            'PrincipalPart': debits['PrincipalPart'].values,
+            'InterestPart': debits['InterestPart'].values,
+            'OutstandingAfter': debits['OutstandingAfter'].values,
+            'PaymentMethod': 'Auto-Debit',
+            'Status': 'Success'
+        })
+        data['loan_payments'] = pd.concat([data['loan_payments'], payments], ignore_index=True)
+
+        txns = pd.DataFrame({
+            'AccountNumber': debits['LinkedAccount'].values,
+            'TransactionType': 'EMI Payment',
+            'Amount': debits['AmountPaid'].values,
+            'DebitCredit': 'Debit',
+            'Balance_After': debits['Balance_After'].values,
+            'Date': run_date,
+            'Time': now,
+            'Remarks': ('EMI auto-debit for ' + debits['LoanID']).values
+        })
+        data = post_transactions(data, txns)
+
+        # Balances follow from the posting; update outstanding per loan
+        data['loans'].loc[debits.index, 'OutstandingAmount'] = debits['OutstandingAfter']
+        closed = debits.index[debits['OutstandingAfter'] <= 0]
+        data['loans'].loc[closed, 'Status'] = 'Closed'
+        invalidate_credit_scores(data['loans'].loc[debits.index, 'CustomerID'].unique())
+        touch_tables('loans')
+    else:
+        closed = []
+
+    print(f"Run Date:        {run_date}")
+    print(f"EMIs Collected:  {len(debits)}  (₹{debits['AmountPaid'].sum() if not debits.empty else 0:,.2f})")
+    print(f"Loans Closed:    {len(closed)}")
+    print(f"Failed Debits:   {len(failures)}")
+
+    if not failures.empty:
+        print(f"\n{Colors.RED}Failed Debits:{Colors.END}")
+        print(failures.to_string(index=False))
+        data = log_audit(data, 'EMI_AUTODEBIT_FAILED',
+                         f"{len(failures)} EMIs failed on {run_date}: {', '.join(failures['LoanID'].astype(str).head(20))}",
+                         status='Failed')
+
+    data = log_audit(data, 'EMI_AUTODEBIT', f'{len(debits)} EMIs collected on {run_date}')
+    return data
+
+def run_cheque_clearing(data, run_date=None):
+    """Clearing cycle: settle every queued cheque due on or before run_date.
+
+    Bounces are decided per issuer account against opening balances, then
+    debits and credits are netted per account and posted in bulk.
+    """
+    print(f"\n{Colors.CYAN}--- Cheque Clearing Cycle ---{Colors.END}")
+    run_date = run_date or get_date()
+
+    cheques = data['cheques']
+    queued = cheques[(cheques['Status'] == 'In Clearing')
+                     & (parse_dates(cheques['ClearanceDate']) <= pd.Timestamp(run_date))]
+    if queued.empty:
+        print(f"No cheques due for clearing on {run_date}.")
+        return data
+
+    run = pd.DataFrame({
+        'ChequeNumber': queued['ChequeNumber'].astype(str),
+        'AccountNumber': queued['AccountNumber'].astype(str),
+        'DepositAccount': queued['DepositAccount'].fillna('').astype(str),
+        'Amount': pd.to_numeric(queued['Amount'], errors='coerce').fillna(0)
+    })
+    run = check_debits(data, run, 'AccountNumber', 'Amount')
+    deposit_ok = run['DepositAccount'].isin(data['accounts']['AccountNumber'])
+    run.loc[~deposit_ok & run['Reason'].eq(''), 'Reason'] = 'Deposit account not found'
+
+    cleared = run[run['Reason'] == '']
+    bounced = run[run['Reason'] != '']
+
+    data['cheques'].loc[cleared.index, 'Status'] = 'Cleared'
+    data['cheques'].loc[cleared.index, 'ClearanceDate'] = run_date
+    data['cheques'].loc[bounced.index, 'Status'] = 'Bounced'
+    data['cheques'].loc[bounced.index, 'Remarks'] = bounced['Reason'].replace('Insufficient balance', 'Insufficient funds')
+
+    if not cleared.empty:
+        postings = pd.concat([
+            pd.DataFrame({
+                'AccountNumber': cleared['AccountNumber'],
+                'TransactionType': 'Cheque Debit',
+                'Amount': cleared['Amount'],
+                'DebitCredit': 'Debit',
+                'Signed': -cleared['Amount'],
+                'Remarks': 'Cheque ' + cleared['ChequeNumber'] + ' cleared'
+            }),
+            pd.DataFrame({
+                'AccountNumber': cleared['DepositAccount'],
+                'TransactionType': 'Cheque Credit',
+                'Amount': cleared['Amount'],
+                'DebitCredit': 'Credit',
+                'Signed': cleared['Amount'],
+                'Remarks': 'Cheque ' + cleared['ChequeNumber'] + ' deposited'
+            })
+        ], ignore_index=True)
+
+        # Running balance per account: opening balance plus this cycle's postings
+        opening = data['accounts'].drop_duplicates('AccountNumber').set_index('AccountNumber')['Balance']
+        postings = postings.sort_values(['AccountNumber', 'DebitCredit'], ascending=[True, False], kind='stable')
+        postings['Balance_After'] = (postings['AccountNumber'].map(opening)
+                                     + postings.groupby('AccountNumber')['Signed'].cumsum()).round(2)
+        postings['Date'] = run_date
+        postings['Time'] = datetime.now().strftime("%H:%M:%S")
+
+        data = post_transactions(data, postings.drop(columns=['Signed']))
+
+    print(f"Run Date:   {run_date}")
+    print(f"Processed:  {len(run)}")
+    print(f"Cleared:    {len(cleared)}  (₹{cleared['Amount'].sum():,.2f})")
+    print(f"Bounced:    {len(bounced)}")
+    if not bounced.empty:
+        print(f"\n{Colors.RED}Bounced Cheques:{Colors.END}")
+        print(bounced[['ChequeNumber', 'AccountNumber', 'Amount', 'Reason']].to_string(index=False))
+        data = log_audit(data, 'CHEQUE_BOUNCED', f"{len(bounced)} cheques bounced on {run_date}", status='Failed')
+
+    data = log_audit(data, 'CHEQUE_CLEARED', f'{len(cleared)} cheques for ₹{cleared["Amount"].sum():,.2f} on {run_date}')
+    return data
+
+def reconcile_ledger(data):
+    """Recompute balances and running Balance_After from the ledger in one pass.
+
+    Returns a frame with one row per account that disagrees with its ledger:
+    stored vs ledger balance, plus the first transaction (in time order)
+    whose recorded Balance_After departs from the recomputed running balance.
+    """
+    idx = balance_index(data)
+    tl = _txn_timeline
+    ledger = data['transactions']
+    acc, order = tl['acc'], tl['acc_pos']
+
+    # Running balance per account: global prefix sum minus the block's start
+    starts = np.flatnonzero(np.r_[True, acc[1:] != acc[:-1]]) if len(acc) else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(acc)]
+    # Archived months enter as a per-account carry-in ahead of the hot rows;
+    # their Balance_After values are frozen and not re-checked
+    carry = archive_carry()['Net']
+    carried = pd.Series(acc[starts]).map(carry).fillna(0).values
+    running = idx['cum'][1:] - idx['cum'][starts][idx['codes']] + carried[idx['codes']]
+    ledger_totals = pd.Series(idx['cum'][ends] - idx['cum'][starts] + carried, index=acc[starts])
+    ledger_totals = ledger_totals.add(carry[~carry.index.isin(ledger_totals.index)], fill_value=0)
+
+    recorded = pd.to_numeric(ledger['Balance_After'], errors='coerce')
+    legacy = recorded.isna()
+    if 'BalanceAfter' in ledger.columns:
+        recorded = recorded.fillna(pd.to_numeric(ledger['BalanceAfter'], errors='coerce'))
+    recorded, legacy = recorded.values[order], legacy.values[order] & ~np.isnan(recorded.values[order])
+
+    diverged = ~np.isnan(recorded) & (np.abs(running - recorded) > RECON_TOLERANCE)
+    first_codes, first_at = np.unique(idx['codes'][diverged], return_index=True)
+    first = np.flatnonzero(diverged)[first_at]
+    first_rows = ledger.iloc[order[first]]
+    divergence = pd.DataFrame({
+        'FirstDivergentTxn': first_rows['TransactionID'].values,
+        'DivergentDate': first_rows['Date'].astype(str).str[:10].values,
+        'Expected': running[first], 'Recorded': recorded[first],
+        'Source': np.where(legacy[first], 'BalanceAfter (legacy)', 'Balance_After'),
+        'DivergentRows': np.bincount(idx['codes'][diverged], minlength=len(starts))[first_codes]
+    }, index=acc[starts][first_codes])
+
+    accs = data['accounts'].drop_duplicates('AccountNumber').set_index('AccountNumber')
+    balances = pd.to_numeric(accs['Balance'], errors='coerce').fillna(0)
+    accounts = balances.index.union(ledger_totals.index)
+    report = pd.DataFrame({'Balance': balances.reindex(accounts).fillna(0),
+                           'LedgerBalance': ledger_totals.reindex(accounts).fillna(0)})
+    report['Difference'] = report['Balance'] - report['LedgerBalance']
+    report = report.join(divergence)
+    report['DivergentRows'] = report['DivergentRows'].fillna(0).astype(int)
+
+    bad = (report['Difference'].abs() > RECON_TOLERANCE) | report['FirstDivergentTxn'].notna()
+    report = report[bad]
+    report.index.name = 'AccountNumber'
+    return report.reset_index()
+
+def run_reconciliation(data):
+    """Nightly ledger reconciliation: report and save every discrepancy"""
+    print(f"\n{Colors.CYAN}--- Ledger Reconciliation ---{Colors.END}")
+    if data['accounts'].empty:
+        print("No accounts.")
+        return data
+    
+    report = reconcile_ledger(data)
+    accounts = data['accounts']['AccountNumber'].nunique()
+    print(f"Accounts Checked:     {accounts}")
+    print(f"Transactions Checked: {len(data['transactions'])}")
+    if report.empty:
+        print(f"{Colors.GREEN}✓ Every balance and Balance_After agrees with the ledger{Colors.END}")
+        return log_audit(data, 'RECONCILIATION', f"{accounts} accounts, 0 discrepancies")
+    
+    print(f"{Colors.YELLOW}Discrepancies:        {len(report)} accounts, {report['DivergentRows'].sum()} rows{Colors.END}")
+    print(f"\n{'Account':<12} {'Balance':>16} {'Ledger':>16} {'Difference':>14}  {'First Divergent':<16}")
+    print("-" * 80)
+    for row in report.head(50).itertuples(index=False):
+        first = f"{row.FirstDivergentTxn} {row.DivergentDate}" if pd.notna(row.FirstDivergentTxn) else 'after last txn'
+        print(f"{row.AccountNumber:<12} ₹{row.Balance:>14,.2f} ₹{row.LedgerBalance:>14,.2f} ₹{row.Difference:>12,.2f}  {first}")
+    if len(report) > 50:
+        print(f"  ... and {len(report) - 50} more accounts")
+    
+    os.makedirs(RECON_DIR, exist_ok=True)
+    path = os.path.join(RECON_DIR, f"reconciliation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    report.to_csv(path, index=False)
+    print(f"\nFull report: {path}")
+    return log_audit(data, 'RECONCILIATION', f"{accounts} accounts, {len(report)} discrepancies", 'Flagged')
+
+_integrity_keys = {}
+
+def init_integrity_worker(key_sets):
+    """Pool initializer: hashed lookup index for every referenced key column"""
+    _integrity_keys.clear()
+    _integrity_keys.update({name: pd.Index(values) for name, values in key_sets.items()})
+
+def key_present(values):
+    """Mask of key values that are set (not null and not blank)"""
+    values = pd.Series(values)
+    return (values.notna() & (values != '')).values
+
+def find_missing_keys(key_set, values):
+    """Worker task: positions of set values absent from a key set"""
+    missing = key_present(values) & (_integrity_keys[key_set].get_indexer(values) == -1)
+    return np.flatnonzero(missing)
+
+def find_duplicate_keys(values):
+    """Worker task: positions of set values that occur more than once"""
+    return np.flatnonzero(pd.Series(values).duplicated(keep=False).values & key_present(values))
+
+def check_integrity(data, workers=INTEGRITY_WORKERS):
+    """All key checks as vectorized set-membership lookups across a process pool.
+
+    Covers dangling foreign keys, orphaned parents and duplicate primary
+    keys. Returns (summary, violations): one summary row per check and one
+    violation row per offending record.
+    """
+    checks = ([('Dangling', t, c, rt, rc) for t, c, rt, rc in FOREIGN_KEYS]
+              + [('Orphan', t, c, rt, rc) for t, c, rt, rc in ORPHAN_CHECKS]
+              + [('Duplicate', t, c, None, None) for t, c in PRIMARY_KEYS.items()])
+    key_sets = {f"{rt}.{rc}": pd.unique(data[rt][rc][key_present(data[rt][rc])])
+                for kind, _, _, rt, rc in checks if kind != 'Duplicate'}
+    # Accounts whose entries are all archived still have a ledger
+    key_sets['transactions.AccountNumber'] = pd.unique(np.concatenate(
+        [key_sets['transactions.AccountNumber'], archive_carry().index.values.astype(object)]))
+
+    # Large columns are split so one big membership check still spreads over every core
+    tasks = []
+    for n, (kind, table, column, ref_table, ref_column) in enumerate(checks):
+        values = data[table][column].values
+        if kind == 'Duplicate':
+            tasks.append((n, 0, find_duplicate_keys, (values,)))
+            continue
+        for start in range(0, max(len(values), 1), INTEGRITY_CHUNK):
+            tasks.append((n, start, find_missing_keys, (f"{ref_table}.{ref_column}", values[start:start + INTEGRITY_CHUNK])))
+
+    if workers <= 1 or sum(len(data[t][c]) for _, t, c, _, _ in checks) < INTEGRITY_CHUNK:
+        init_integrity_worker(key_sets)
+        found = [func(*args) for _, _, func, args in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_integrity_worker,
+                                 initargs=(key_sets,)) as pool:
+            futures = [pool.submit(func, *args) for _, _, func, args in tasks]
+            found = [future.result() for future in futures]
+
+    positions = {n: [] for n in range(len(checks))}
+    for (n, start, _, _), hits in zip(tasks, found):
+        positions[n].append(hits + start)
+
+    summary, violations = [], []
+    for n, (kind, table, column, ref_table, ref_column) in enumerate(checks):
+        hits = np.concatenate(positions[n])
+        rows = data[table].iloc[hits]
+        check = f"{table}.{column} unique" if kind == 'Duplicate' else f"{table}.{column} -> {ref_table}.{ref_column}"
+        summary.append({'Check': check, 'Kind': kind, 'Rows': len(data[table]),
+                        'Nulls': int((~key_present(data[table][column])).sum()) if kind != 'Orphan' else 0,
+                        'Violations': len(hits), 'DistinctValues': rows[column].nunique()})
+        if len(hits):
+            violations.append(pd.DataFrame({'Check': check, 'Kind': kind,
+                                            'RecordKey': rows[PRIMARY_KEYS[table]].values,
+                                            'Value': rows[column].values}))
+
+    columns = ['Check', 'Kind', 'RecordKey', 'Value']
+    violations = pd.concat(violations, ignore_index=True) if violations else pd.DataFrame(columns=columns)
+    return pd.DataFrame(summary), violations
+
+def run_integrity_check(data):
+    """Referential-integrity report: dangling references, orphans, duplicate keys"""
+    print(f"\n{Colors.CYAN}--- Referential Integrity Check ---{Colors.END}")
+    start = time.perf_counter()
+    summary, violations = check_integrity(data)
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n{'Check':<52} {'Kind':<10} {'Rows':>10} {'Nulls':>8} {'Issues':>8}")
+    print("-" * 92)
+    for row in summary.itertuples(index=False):
+        color = Colors.RED if row.Violations and row.Kind != 'Orphan' else Colors.YELLOW if row.Violations else ''
+        end = Colors.END if color else ''
+        print(f"{color}{row.Check:<52} {row.Kind:<10} {row.Rows:>10} {row.Nulls:>8} {row.Violations:>8}{end}")
+    print("-" * 92)
+    print(f"Checked in {elapsed:.2f}s")
+    
+    if violations.empty:
+        print(f"{Colors.GREEN}✓ No integrity violations{Colors.END}")
+        return log_audit(data, 'INTEGRITY_CHECK', f"{len(summary)} checks, 0 violations")
+    
+    os.makedirs(RECON_DIR, exist_ok=True)
+    path = os.path.join(RECON_DIR, f"integrity_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    violations.to_csv(path, index=False)
+    print(f"{Colors.YELLOW}{len(violations)} violations written to {path}{Colors.END}")
+    return log_audit(data, 'INTEGRITY_CHECK', f"{len(summary)} checks, {len(violations)} violations", 'Flagged')
+
+def manage_checkpoints(data):
+    """List balance checkpoints, write one now, or audit one against the event log"""
+    print(f"\n{Colors.CYAN}--- Balance Checkpoints ---{Colors.END}")
+    index = checkpoint_index()
+    print(f"Ledger head: {ledger_head(data)}    Auto checkpoint every {CHECKPOINT_EVERY} postings")
+    print(f"\n{'Seq':>10} {'Timestamp':<20} {'Note':<10} {'Accounts':>9} {'Total Balance':>20}")
+    print("-" * 73)
+    for c in index:
+        print(f"{c['seq']:>10} {c['timestamp']:<20} {c['note']:<10} {c['accounts']:>9} ₹{c['total']:>18,.2f}")
+    
+    choice = input("\nSeq to audit, 'n' for a new checkpoint, blank to go back: ").strip().lower()
+    if choice == 'n':
+        # Only checkpoint what is on disk
+        request_save(data)
+        if not flush_saves():
+            print(f"{Colors.RED}✗ Save failed; checkpoint not written{Colors.END}")
+            return data
+        entry = write_checkpoint(data, note='manual')
+        print(f"{Colors.GREEN}✓ Checkpoint written at seq {entry['seq']}{Colors.END}")
+        return log_audit(data, 'CHECKPOINT', f"Balance checkpoint at seq {entry['seq']}")
+    entry = next((c for c in index if str(c['seq']) == choice), None)
+    if entry is None:
+        return data
+    
+    # Replaying the previous checkpoint's postings must land exactly on this one
+    position = index.index(entry)
+    snapshot = checkpoint_balances(entry)
+    if position > 0:
+        replayed = replay_balances(data, index[position - 1], upto=entry['seq']).reindex(snapshot.index).fillna(0)
+        mismatched = ((replayed - snapshot).abs() > 0.005).sum()
+        if mismatched:
+            print(f"{Colors.RED}✗ {mismatched} balances differ from a replay of seq {index[position - 1]['seq']}..{entry['seq']}{Colors.END}")
+        else:
+            print(f"{Colors.GREEN}✓ Consistent with the event log since seq {index[position - 1]['seq']}{Colors.END}")
+    
+    acc_num = input("Account Number (blank to skip): ").strip()
+    if acc_num:
+        if acc_num in snapshot.index:
+            print(f"Balance of {acc_num} at seq {entry['seq']} ({entry['timestamp']}): ₹{snapshot[acc_num]:,.2f}")
+        else:
+            print(f"{acc_num} did not exist at seq {entry['seq']}")
+    return data
+
+def batch_operations_menu(data):
+    """End-of-Day Batch Jobs Sub-Menu"""
+    while True:
+        print(f"\n{Colors.BOLD}{Colors.BLUE}=== END-OF-DAY BATCH JOBS ==={Colors.END}")
+        print("1. Credit Interest (Savings/FD)")
+        print("2. EMI Auto-Debit (Active Loans)")
+        print("3. Cheque Clearing Cycle")
+        print("4. AML Backfill Scan")
+        print("5. Refresh Credit Scores (All Customers)")
+        print("6. Verify Bank Aggregates")
+        print("7. Startup Report")
+        print("8. Statement Run (All Accounts)")
+        print("9. Reconcile Ledger")
+        print("10. Referential Integrity Check")
+        print("11. Archive Old Transactions")
+        print("12. Balance Checkpoints (Event Log)")
+        print("13. Save Writer Status")
+        print("14. Back to Main Menu")
+
+        choice = input("\nSelect: ").strip()
+
+        if choice == '1': data = run_interest_credit(data, read_run_date())
+        elif choice == '2': data = run_emi_autodebit(data, read_run_date())
+        elif choice == '3': data = run_cheque_clearing(data, read_run_date())
+        elif choice == '4': data = run_aml_backfill(data)
+        elif choice == '5': data = refresh_credit_scores(data)
+        elif choice == '6': verify_bank_totals(data)
+        elif choice == '7': startup_report(data)
+        elif choice == '8': data = run_statement_batch(data)
+        elif choice == '9': data = run_reconciliation(data)
+        elif choice == '10': data = run_integrity_check(data)
+        elif choice == '11':
+            data = archive_transactions(data)  # saves itself: the trimmed ledger is its commit point
+            continue
+        elif choice == '12': data = manage_checkpoints(data)
+        elif choice == '13': show_writer_status(data)
+        elif choice == '14': break
+        else: print("Invalid option.")
+
+        request_save(data)
+
+    return data
 
 # ==========================================
 # SECTION 9B: MENUS & MAIN LOOP
 # ==========================================
 
+# --- Startup Profiling ---
+
+_startup_timings = {}
+
+def mark_startup(phase):
+    """Record seconds since launch at the end of a startup phase"""
+    _startup_timings.setdefault(phase, time.perf_counter() - _STARTUP_T0)
+
+def import_time_report(top=10):
+    """Per-module cold import cost of this program, measured in a fresh interpreter"""
+    import subprocess
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    code = f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); import {module}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True)
+
+    # -X importtime lists children before their parent, indented two spaces per level
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() != module:
+            rows = []
+        elif depth == 1:
+            rows.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(rows, key=lambda r: -r[1])[:top]
+
+def startup_report(data=None):
+    """Show this session's startup phases and the per-module import cost"""
+    print(f"\n{Colors.CYAN}--- Startup Report ---{Colors.END}")
+    print(f"\n{'Phase':<20} {'Elapsed (s)':>12}")
+    print(f"{'-'*33}")
+    for phase, elapsed in _startup_timings.items():
+        print(f"{phase:<20} {elapsed:>12.3f}")
+
+    total = _startup_timings.get('first_prompt')
+    if total is not None:
+        color = Colors.GREEN if total <= STARTUP_BUDGET else Colors.RED
+        print(f"\nCold start to first prompt: {color}{total:.3f}s{Colors.END} (budget {STARTUP_BUDGET:.1f}s)")
+
+    print(f"\n{'Module':<30} {'Import (s)':>12}")
+    print(f"{'-'*43}")
+    for name, seconds in import_time_report():
+        print(f"{name:<30} {seconds:>12.3f}")
+
+    for name, seconds in _lazy_import_times.items():
+        print(f"{name:<30} {seconds:>12.3f}  (deferred, loaded on first use)")
+    if not _lazy_import_times:
+        print(f"{Colors.GREEN}matplotlib not loaded this session (deferred until a chart is drawn){Colors.END}")
+    return data
+
+def warm_runtime_state(data):
+    """Rebuild in-memory counters, windows and aggregates from freshly loaded tables"""
+    data = reconcile_archive(data)
+    data = recover_balances(data)
+    if not rollups_in_sync(data):
+        rebuild_rollups(data)
+    rebuild_transaction_timeline(data)
+    rebuild_daily_usage(data)
+    rebuild_aml_state(data)
+    rebuild_bank_totals(data)
+    return data
+
 def main():
+    mark_startup('imports')
     initialize_data()
     data = load_data()
+    mark_startup('load_data')
+    data = warm_runtime_state(data)
+    mark_startup('warm_state')
+    
+    if '--startup-report' in sys.argv[1:]:
+        mark_startup('first_prompt')
+        startup_report(data)
+        return
+    
+    # Headless: python bank_management_system.py --render-charts [png|svg]
+    if '--render-charts' in sys.argv[1:]:
+        formats = [f for f in sys.argv[1:] if f in CHART_FORMATS] or CHART_FORMATS
+        plt.switch_backend('Agg')
+        print_charts_result(render_charts(data, formats=formats))
+        return
     
     print(f"\n{Colors.BOLD}{Colors.GREEN}")
     print("╔═══════════════════════════════════════════════════════════╗")
@@ -2394,8 +5335,10 @@ def main():
         print("  15. Reports & Analytics")
         print("  16. Backup Data")
         print("  17. Search Customer")
-        print(f"\n  18. Exit")
+        print("  18. End-of-Day Batch Jobs")
+        print(f"\n  19. Exit")
         
+        mark_startup('first_prompt')
         choice = input(f"\n{Colors.BOLD}Select Option: {Colors.END}").strip()
         
         if choice == '1': data = add_customer(data)
@@ -2415,14 +5358,19 @@ def main():
         elif choice == '15': generate_reports(data)
         elif choice == '16': backup_data()
         elif choice == '17': search_customer(data)
-        elif choice == '18': 
-            save_data(data)
+        elif choice == '18': data = batch_operations_menu(data)
+        elif choice == '19': 
+            request_save(data)
+            flush_saves()
+            if any(job['process'].is_alive() for job in _report_jobs):
+                print(f"{Colors.YELLOW}Waiting for background reports to finish...{Colors.END}")
+                wait_for_reports()
             print(f"\n{Colors.GREEN}Thank you for using CoreBank. Goodbye!{Colors.END}")
             break
         else:
             print(f"{Colors.RED}Invalid option. Please try again.{Colors.END}")
             
-        save_data(data)
+        request_save(data)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,52 @@
+import importlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def bms(tmp_path, monkeypatch):
+    """Fresh copy of the module (clean in-memory state) working in a temp directory"""
+    monkeypatch.chdir(tmp_path)
+    import bank_management_system
+    module = importlib.reload(bank_management_system)
+    module.TYPED_VIEW_CHECK = True
+    yield module
+    module.flush_saves(10)
+
+
+def make_customers(bms, ids):
+    rows = [{'CustomerID': cid, 'Name': f'Customer {cid}', 'RegistrationDate': '2024-01-15',
+             'Status': 'Active', 'KYC_Status': 'Verified'} for cid in ids]
+    return pd.DataFrame(rows).reindex(columns=bms.SCHEMAS['customers'])
+
+
+def make_accounts(bms, owners):
+    rows = [{'AccountNumber': acc, 'CustomerID': cid, 'AccountType': 'Savings', 'Balance': 0.0,
+             'MinBalance': 0.0, 'InterestRate': 4.0, 'OpeningDate': '2024-01-15', 'Status': 'Active'}
+            for acc, cid in owners.items()]
+    return pd.DataFrame(rows).reindex(columns=bms.SCHEMAS['accounts'])
+
+
+def posting(acc, amount, debit_credit='Credit', date='2024-02-01', time='10:00:00', kind='Deposit'):
+    return {'AccountNumber': acc, 'TransactionType': kind, 'Amount': float(amount),
+            'DebitCredit': debit_credit, 'Date': date, 'Time': time, 'Remarks': 'test', 'Status': 'Success'}
+
+
+@pytest.fixture
+def bank(bms):
+    """A small bank: three customers, three accounts, funded by opening postings"""
+    bms.initialize_data()
+    data = bms.warm_runtime_state(bms.load_data())
+    data['customers'] = make_customers(bms, ['C001', 'C002', 'C003'])
+    data['accounts'] = make_accounts(bms, {'A001': 'C001', 'A002': 'C002', 'A003': 'C003'})
+    bms.rebuild_bank_totals(data)
+    return bms.post_transactions(data, pd.DataFrame([
+        posting('A001', 50000, kind='Account Opening', date='2024-01-15'),
+        posting('A002', 20000, kind='Account Opening', date='2024-01-15'),
+        posting('A003', 5000, kind='Account Opening', date='2024-01-15'),
+    ]))
@@ -0,0 +1,72 @@
+import pandas as pd
+
+from conftest import posting
+
+
+def aml_alerts(data):
+    audit = data['audit']
+    return audit.loc[audit['Action'] == 'AML_ALERT', 'Details'].tolist()
+
+
+def test_large_posting_is_flagged_once_by_hook_and_backfill(bms, bank):
+    threshold = bms.LARGE_TRANSACTION_THRESHOLD
+    data = bms.post_transactions(bank, pd.DataFrame([posting('A002', threshold, date='2024-03-01')]))
+    flagged = [d for d in aml_alerts(data) if d.startswith('[LARGE_TRANSACTION]')]
+    assert len(flagged) == 1
+
+    # The backfill recognises the alert the hook already raised
+    data = bms.run_aml_backfill(data)
+    assert [d for d in aml_alerts(data) if d.startswith('[LARGE_TRANSACTION]')] == flagged
+
+
+def test_rules_accept_scalar_and_series_features(bms):
+    features = {'Amount': bms.LARGE_TRANSACTION_THRESHOLD, 'IsDebit': False, 'Near': False,
+                'NewCounterparty': False, 'CreditTotal': 0.0, 'DebitTotal': 0.0,
+                'NearCount': 0, 'NewCounterparties': 0}
+    frame = pd.DataFrame([features, dict(features, Amount=1.0)])
+    for name, rule in bms.AML_RULES.items():
+        assert list(rule(frame)) == [bool(rule(features)), bool(rule(dict(features, Amount=1.0)))], name
+
+
+FEATURES = ['Amount', 'IsDebit', 'Near', 'NewCounterparty', 'CreditTotal', 'DebitTotal', 'NearCount', 'NewCounterparties']
+
+
+def transfer(acc, amount, to, time, date='2024-03-01'):
+    return dict(posting(acc, amount, 'Debit', date=date, time=time, kind='Transfer'), Remarks=f'Transfer to {to}')
+
+
+def test_backdated_postings_match_backfill_features(bms, bank, monkeypatch):
+    streamed = []
+    stream = bms.stream_aml_features
+
+    def recorded(data, txns):
+        streamed.append(stream(data, txns))
+        return streamed[-1]
+
+    monkeypatch.setattr(bms, 'stream_aml_features', recorded)
+
+    batches = [
+        [posting('A002', 95000, date='2024-03-01', time='10:00:00'),
+         posting('A002', 95000, date='2024-03-01', time='11:00:00'),
+         transfer('A001', 1000, 'ACC0001', '10:00:00'),
+         transfer('A001', 1000, 'ACC0002', '11:00:00')],
+        # Older than each account's newest entry, and out of order within the batch
+        [posting('A002', 95000, date='2024-03-01', time='09:00:00'),
+         transfer('A001', 1000, 'ACC0002', '12:00:00'),
+         transfer('A001', 1000, 'ACC0001', '08:00:00'),
+         posting('A003', 500, date='2024-03-02')],
+        [posting('A002', 95000, date='2024-03-01', time='13:00:00'),
+         transfer('A001', 1000, 'ACC0003', '13:00:00')],
+    ]
+    data = bank
+    for batch in batches:
+        data = bms.post_transactions(data, pd.DataFrame(batch))
+        features = streamed[-1].set_index('TransactionID')
+        backfill = bms.compute_aml_features(bms.prepare_aml_frame(data['transactions'])).set_index('TransactionID')
+        assert len(features) == len(batch)
+        for column in FEATURES:
+            assert features[column].tolist() == backfill.loc[features.index, column].tolist(), column
+
+    # The backdated deposit is the first near-threshold one of the day, not the third
+    structuring = [d for d in aml_alerts(data) if d.startswith('[STRUCTURING]')]
+    assert len(structuring) == 1
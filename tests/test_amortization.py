@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+
+LOANS = [(500000, 8.5, 240), (250000, 12.0, 36), (90000, 0.0, 12), (1200000, 7.0, 1), (75000.5, 9.75, 61)]
+
+
+@pytest.mark.parametrize('principal, rate, tenure', LOANS)
+def test_emi_vectorized_matches_scalar(bms, principal, rate, tenure):
+    assert bms.calculate_emi_vectorized([principal], [rate], [tenure])[0] == bms.calculate_emi(principal, rate, tenure)
+
+
+def test_matrix_matches_scalar_schedules(bms):
+    principal, rate, tenure = map(np.array, zip(*LOANS))
+    matrix = bms.calculate_amortization_matrix(principal, rate, tenure)
+    assert matrix['Mask'].sum(axis=1).tolist() == tenure.tolist()
+
+    for row, loan in enumerate(LOANS):
+        schedule = bms.calculate_amortization_schedule(*loan)
+        months = matrix['Mask'][row]
+        for column in ('EMI', 'Principal', 'Interest', 'Outstanding'):
+            assert matrix[column][row][months].tolist() == [m[column] for m in schedule]
+        assert not matrix['EMI'][row][~months].any()
+
+
+def test_invalid_loans_give_zero_rows(bms):
+    matrix = bms.calculate_amortization_matrix([0, -5, 1000], [8, 8, -1], [12, 12, 12])
+    assert not matrix['EMI'].any()
+
+
+def test_amortization_frame_is_long_format(bms):
+    frame = bms.amortization_frame([100000, 50000], [10, 10], [3, 2], loan_ids=['L1', 'L2'])
+    assert frame['LoanID'].tolist() == ['L1', 'L1', 'L1', 'L2', 'L2']
+    assert frame['Month'].tolist() == [1, 2, 3, 1, 2]
+    assert frame.groupby('LoanID')['Principal'].sum().round(0).tolist() == [100000, 50000]
@@ -0,0 +1,73 @@
+import importlib
+import os
+
+import pandas as pd
+
+from conftest import posting
+
+
+def seed_ledger(bms, bank):
+    """Old postings (archivable) on top of the 2024 openings, plus one recent posting"""
+    data = bms.post_transactions(bank, pd.DataFrame([
+        posting('A001', 700, 'Debit', date='2024-03-10', kind='Withdrawal'),
+        posting('A002', 250, date='2024-04-02'),
+    ]))
+    data = bms.post_transactions(data, pd.DataFrame([posting('A003', 40, date=bms.get_date())]))
+    bms.save_data(data)
+    return data
+
+
+def balances(data):
+    return data['accounts'].set_index('AccountNumber')['Balance'].astype(float).sort_index()
+
+
+def reload_from_disk(bms):
+    """Fresh process state: drop every in-memory cache and warm up from the files"""
+    bms = importlib.reload(bms)
+    return bms, bms.warm_runtime_state(bms.load_data())
+
+
+def test_archive_round_trip(bms, bank):
+    data = seed_ledger(bms, bank)
+    before = balances(data)
+    as_of = bms.balances_as_of_many(data, ['2024-01-31', '2024-03-31'])
+    head = bms.ledger_head(data)
+
+    data = bms.archive_transactions(data)
+    assert len(data['transactions']) == 1
+    assert bms.archived_row_count() == head - 1
+    assert 'pending' not in bms.archive_manifest()
+
+    bms, data = reload_from_disk(bms)
+    assert bms.ledger_head(data) == head
+    pd.testing.assert_series_equal(balances(data), before)
+    pd.testing.assert_frame_equal(bms.balances_as_of_many(data, ['2024-01-31', '2024-03-31']), as_of)
+    assert len(bms.ledger_since(data)) == head
+    assert set(bms.transactions_between(data, '2024-03-01', '2024-04-30')['AccountNumber']) == {'A001', 'A002'}
+    assert bms.rollups_in_sync(data)
+
+
+def test_interrupted_archive_does_not_double_count(bms, bank, monkeypatch):
+    data = seed_ledger(bms, bank)
+    before = balances(data)
+    head = bms.ledger_head(data)
+
+    # Partitions and manifest are written, but the trimmed ledger never reaches disk
+    with monkeypatch.context() as patch:
+        patch.setattr(bms, 'request_save', lambda data: None)
+        patch.setattr(bms, 'flush_saves', lambda timeout=None: False)
+        bms.archive_transactions(data)
+    assert bms.archive_manifest()['pending']['parts']
+
+    bms, data = reload_from_disk(bms)
+    assert len(data['transactions']) == 1
+    assert bms.ledger_head(data) == head
+    assert 'pending' not in bms.archive_manifest()
+    pd.testing.assert_series_equal(balances(data), before)
+    assert bms.reconcile_ledger(data).empty
+
+    # The recovered trim was saved, so the next start is clean
+    bms, data = reload_from_disk(bms)
+    assert len(data['transactions']) == 1
+    carries = [f for f in os.listdir(bms.ARCHIVE_DIR) if f.startswith('accounts')]
+    assert carries == [bms.archive_manifest()['carry']]
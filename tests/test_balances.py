@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import posting
+
+
+@pytest.fixture
+def busy(bms, bank):
+    """Two months of mixed postings across all three accounts"""
+    rng = np.random.default_rng(11)
+    rows = [posting(f'A00{rng.integers(1, 4)}', float(rng.integers(1, 900)),
+                    'Debit' if rng.random() < 0.4 else 'Credit',
+                    date=f'2024-{rng.integers(2, 4):02d}-{rng.integers(1, 29):02d}',
+                    time=f'{rng.integers(0, 24):02d}:{rng.integers(0, 60):02d}:00')
+            for _ in range(200)]
+    return bms.post_transactions(bank, pd.DataFrame(rows))
+
+
+def brute_force(data, when):
+    ledger = data['transactions']
+    stamps = pd.to_datetime(ledger['Date'] + ' ' + ledger['Time'])
+    amount = ledger['Amount'].astype(float)
+    signed = np.where(ledger['DebitCredit'] == 'Credit', amount, -amount)
+    before = stamps < pd.Timestamp(when) + pd.Timedelta(days=1)
+    return pd.Series(signed[before]).groupby(ledger.loc[before, 'AccountNumber'].values).sum()
+
+
+def test_many_dates_match_brute_force(bms, busy):
+    days = ['2024-01-14', '2024-01-15', '2024-02-10', '2024-02-29', '2024-03-28']
+    table = bms.balances_as_of_many(busy, days)
+    for day in days:
+        expected = brute_force(busy, day).reindex(table.index).fillna(0)
+        np.testing.assert_allclose(table[day].values, expected.values, atol=1e-6)
+
+
+def test_lookups_reuse_the_index(bms, busy):
+    bms.balance_as_of(busy, 'A001', '2024-02-15')
+    generation = bms._balance_index['generation']
+    for day in pd.date_range('2024-02-01', '2024-03-31').strftime('%Y-%m-%d'):
+        bms.balance_as_of(busy, 'A002', day)
+    assert bms._balance_index['generation'] == generation
+
+    data = bms.post_transactions(busy, pd.DataFrame([posting('A002', 5, date='2024-04-01')]))
+    assert bms.balance_as_of(data, 'A002', '2024-04-01') == pytest.approx(brute_force(data, '2024-04-01')['A002'])
+    assert bms._balance_index['generation'] != generation
+
+
+def test_average_balance_is_mean_of_daily_closes(bms, busy):
+    days = pd.date_range('2024-02-01', '2024-02-07').strftime('%Y-%m-%d')
+    expected = np.mean([brute_force(busy, d).get('A003', 0) for d in days])
+    assert bms.average_balances(busy, '2024-02-01', '2024-02-07', ['A003'])['A003'] == pytest.approx(expected)
+
+
+def test_unknown_account_has_no_balance(bms, busy):
+    assert bms.balance_as_of(busy, 'NOPE', '2024-02-01') is None
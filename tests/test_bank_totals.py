@@ -0,0 +1,49 @@
+import pandas as pd
+
+from conftest import make_customers, posting
+
+
+def test_posting_before_build_is_a_noop(bms, bank):
+    bms._bank_totals.clear()
+    bms.post_transactions(bank, pd.DataFrame([posting('A001', 100)]))
+    assert bms._bank_totals == {}
+
+    totals = bms.get_bank_totals(bank)
+    assert totals['TotalDeposits'] == 75100
+    assert totals['Customers'] == 3
+
+
+def test_postings_keep_store_equal_to_full_recompute(bms, bank):
+    data = bms.post_transactions(bank, pd.DataFrame([
+        posting('A001', 1200, 'Debit', kind='Withdrawal'),
+        posting('A002', 300),
+    ]))
+    expected = bms.compute_bank_totals(data)
+    totals = bms.get_bank_totals(data)
+    assert totals == expected
+
+
+def test_table_figures_need_no_bookkeeping(bms, bank):
+    bms.get_bank_totals(bank)
+    bank['customers'] = pd.concat([bank['customers'], make_customers(bms, ['C004'])], ignore_index=True)
+    bank['loans'] = pd.DataFrame([{'LoanID': 'L1', 'CustomerID': 'C001', 'OutstandingAmount': 900.0, 'Status': 'Active'},
+                                  {'LoanID': 'L2', 'CustomerID': 'C002', 'OutstandingAmount': 0.0, 'Status': 'Closed'}]
+                                 ).reindex(columns=bms.SCHEMAS['loans'])
+
+    totals = bms.get_bank_totals(bank)
+    assert totals['Customers'] == 4
+    assert totals['OutstandingLoans'] == 900
+    assert totals['LoanStatus'] == {'Active': 1, 'Closed': 1}
+
+    bank['loans'].loc[0, 'OutstandingAmount'] = 400.0
+    bms.touch_tables('loans')
+    assert bms.get_bank_totals(bank)['OutstandingLoans'] == 400
+
+
+def test_verify_rebuilds_after_a_direct_balance_write(bms, bank):
+    bms.get_bank_totals(bank)
+    bank['accounts'].loc[0, 'Balance'] += 999
+    bms.touch_tables('accounts')
+    assert not bms.verify_bank_totals(bank)
+    assert bms.get_bank_totals(bank)['TotalDeposits'] == 75999
+    assert bms.verify_bank_totals(bank)
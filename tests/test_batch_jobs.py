@@ -0,0 +1,36 @@
+import pandas as pd
+
+
+def add_loan(bms, data, loan_id, account, customer, emi, outstanding, rate, start='2024-01-10'):
+    loan = {'LoanID': loan_id, 'CustomerID': customer, 'LinkedAccount': account, 'LoanType': 'Personal Loan',
+            'PrincipalAmount': outstanding, 'InterestRate': rate, 'Tenure_Months': 24, 'EMI': emi,
+            'StartDate': start, 'OutstandingAmount': outstanding, 'Status': 'Active', 'ApprovalDate': start}
+    data['loans'] = pd.concat([data['loans'], pd.DataFrame([loan])], ignore_index=True)
+    bms.rebuild_bank_totals(data)
+    return data
+
+
+def test_emi_run_splits_like_pay_loan_emi(bms, bank):
+    data = add_loan(bms, bank, 'L001', 'A001', 'C001', emi=4707.35, outstanding=100000.0, rate=12.0)
+    debits, failures = bms.compute_emi_run(data, '2024-02-10')
+
+    assert failures.empty
+    row = debits.iloc[0]
+    assert row['InterestPart'] == 1000.0
+    assert row['PrincipalPart'] == 3707.35
+    assert row['AmountPaid'] == 4707.35
+
+
+def test_emi_run_rejects_emi_below_interest(bms, bank):
+    data = add_loan(bms, bank, 'L001', 'A001', 'C001', emi=500.0, outstanding=100000.0, rate=12.0)
+    data = add_loan(bms, data, 'L002', 'A001', 'C001', emi=4707.35, outstanding=100000.0, rate=12.0)
+    debits, failures = bms.compute_emi_run(data, '2024-02-10')
+
+    assert list(debits['LoanID']) == ['L002']
+    assert list(failures['LoanID']) == ['L001']
+    assert failures.iloc[0]['Reason'] == 'EMI below interest due'
+
+    data = bms.run_emi_autodebit(data, '2024-02-10')
+    outstanding = data['loans'].set_index('LoanID')['OutstandingAmount']
+    assert outstanding['L001'] == 100000.0
+    assert outstanding['L002'] < 100000.0
@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+import pytest
+
+from test_batch_jobs import add_loan
+
+
+NAMES = ['account_distribution', 'loan_status', 'loan_emi_analysis']
+
+
+@pytest.fixture
+def lending(bms, bank):
+    data = add_loan(bms, bank, 'L001', 'A001', 'C001', emi=4707.35, outstanding=100000.0, rate=12.0)
+    return add_loan(bms, data, 'L002', 'A002', 'C002', emi=2353.67, outstanding=50000.0, rate=12.0)
+
+
+def count_hashes(monkeypatch):
+    calls = []
+    hash_object = pd.util.hash_pandas_object
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return hash_object(*args, **kwargs)
+
+    monkeypatch.setattr(pd.util, 'hash_pandas_object', counted)
+    return calls
+
+
+def test_unchanged_charts_are_served_from_the_manifest(bms, lending, monkeypatch):
+    first = bms.render_charts(lending, NAMES, ['png'], workers=2)
+    assert len(first['rendered']) == len(NAMES) and not first['failed']
+
+    calls = count_hashes(monkeypatch)
+    second = bms.render_charts(lending, NAMES, ['png'], workers=2)
+    assert second['rendered'] == []
+    assert second['cached'] == first['rendered']
+    assert calls == []
+
+    # A version bump without a content change rehashes but still hits the cache
+    bms.touch_tables('accounts')
+    third = bms.render_charts(lending, NAMES, ['png'], workers=2)
+    assert third['cached'] == first['rendered'] and len(calls) == 1
+
+
+def test_changed_table_rerenders_only_dependent_charts(bms, lending):
+    first = bms.render_charts(lending, NAMES, ['png'], workers=2)
+
+    lending['loans'].loc[lending['loans']['LoanID'] == 'L002', 'OutstandingAmount'] = 40000.0
+    bms.touch_tables('loans')
+    second = bms.render_charts(lending, NAMES, ['png'], workers=2)
+
+    dependent = [n for n in NAMES if 'loans' in bms.CHARTS[n][1]]
+    assert sorted(os.path.basename(p).rsplit('_', 1)[0] for p in second['rendered']) == sorted(dependent)
+    assert [p for p in first['rendered'] if 'account_distribution' in p] == second['cached']
@@ -0,0 +1,58 @@
+import importlib
+
+import pandas as pd
+
+from conftest import posting
+
+
+def ledger_balances(bms, data):
+    ledger = data['transactions']
+    return bms.signed_amounts(ledger).groupby(ledger['AccountNumber']).sum()
+
+
+def test_checkpoints_follow_the_saved_ledger(bms, bank):
+    bms.CHECKPOINT_EVERY = 2
+    bms.request_save(bank)
+    assert bms.flush_saves(10)
+    assert bms.checkpoint_index()[-1]['seq'] == 3
+
+    # Posted but never saved: no checkpoint may describe these
+    data = bank
+    for amount in (100, 200, 300):
+        data = bms.post_transactions(data, pd.DataFrame([posting('A001', amount)]))
+    assert bms.checkpoint_index()[-1]['seq'] == 3
+
+    bms = importlib.reload(bms)
+    data = bms.warm_runtime_state(bms.load_data())
+    assert bms.ledger_head(data) == 3
+    assert all(c['seq'] <= 3 for c in bms.checkpoint_index())
+    stored = data['accounts'].set_index('AccountNumber')['Balance'].astype(float)
+    pd.testing.assert_series_equal(stored.sort_index(), ledger_balances(bms, data).sort_index(), check_names=False)
+    pd.testing.assert_series_equal(bms.replay_balances(data).sort_index(), stored.sort_index(), check_names=False)
+
+
+def test_checkpoint_ahead_of_ledger_is_discarded(bms, bank):
+    bms.request_save(bank)
+    assert bms.flush_saves(10)
+    ahead = bank['accounts'].assign(Balance=999999.0)
+    bms.write_checkpoint({'accounts': ahead}, note='periodic', seq=50)
+
+    bms = importlib.reload(bms)
+    data = bms.warm_runtime_state(bms.load_data())
+    assert [c['seq'] for c in bms.checkpoint_index()] == [0]
+    assert data['accounts'].set_index('AccountNumber')['Balance'].astype(float).to_dict() == {
+        'A001': 50000.0, 'A002': 20000.0, 'A003': 5000.0}
+
+
+def test_checkpoint_error_does_not_stop_the_writer(bms, bank, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(bms, 'write_checkpoint', fail)
+    bms.CHECKPOINT_EVERY = 1
+    bms.request_save(bank)
+    assert bms.flush_saves(10)
+
+    metrics = bms.writer_metrics()
+    assert metrics['checkpoint_errors'] == 1
+    assert metrics['errors'] == 0
+    assert bms._writer['thread'].is_alive()
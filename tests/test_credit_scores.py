@@ -0,0 +1,37 @@
+import pandas as pd
+
+from conftest import posting
+
+
+def test_cold_single_lookup_scores_only_that_customer(bms, bank):
+    one = bms.get_credit_scores(bank, ['C002'])
+    assert list(one.index) == ['C002']
+    assert list(bms._credit_cache['factors'].index) == ['C002']
+
+    # Later reads fill in the rest and agree with a from-scratch batch
+    cached = bms.get_credit_scores(bank).sort_index()
+    bms._credit_cache['factors'] = None
+    fresh = bms.get_credit_scores(bank).sort_index()
+    pd.testing.assert_frame_equal(cached, fresh)
+
+
+def test_posting_invalidates_owner_score(bms, bank):
+    before = bms.get_credit_scores(bank)
+    data = bms.post_transactions(bank, pd.DataFrame([posting('A003', 900000)]))
+    after = bms.get_credit_scores(data)
+    assert after.loc['C003', 'TotalBalance'] == before.loc['C003', 'TotalBalance'] + 900000
+    assert after.loc['C003', 'TotalTransactions'] == before.loc['C003', 'TotalTransactions'] + 1
+    assert after.loc['C001', 'TotalBalance'] == before.loc['C001', 'TotalBalance']
+
+
+def test_credit_rating_bands(bms):
+    assert [bms.credit_rating(s) for s in (800, 750, 700, 600, 549)] == \
+        ['Excellent', 'Excellent', 'Good', 'Fair', 'Poor']
+
+
+def test_factors_align_by_position_with_duplicate_index_labels(bms, bank):
+    expected = bms.compute_credit_factors(bank).sort_index()
+    bank['customers'].index = [0] * len(bank['customers'])
+    bank['accounts'].index = [7] * len(bank['accounts'])
+    bms.touch_tables('customers', 'accounts')
+    pd.testing.assert_frame_equal(bms.compute_credit_factors(bank).sort_index(), expected)
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from conftest import make_customers, posting
+from test_batch_jobs import add_loan
+
+
+def seed_violations(bms, data):
+    data['customers'] = pd.concat([data['customers'], make_customers(bms, ['C004'])], ignore_index=True)
+    stray = pd.DataFrame([{**posting('A999', 100.0), 'TransactionID': 'TXN09999'}])
+    data['transactions'] = pd.concat([data['transactions'], stray.reindex(columns=data['transactions'].columns)],
+                                     ignore_index=True)
+    data = add_loan(bms, data, 'L001', 'A001', 'C001', emi=4707.35, outstanding=100000.0, rate=12.0)
+    return add_loan(bms, data, 'L001', 'A002', 'C002', emi=4707.35, outstanding=50000.0, rate=12.0)
+
+
+def test_integrity_reports_each_violation(bms, bank):
+    data = seed_violations(bms, bank)
+    summary, violations = bms.check_integrity(data, workers=1)
+
+    found = summary.set_index('Check')['Violations']
+    assert found['transactions.AccountNumber -> accounts.AccountNumber'] == 1
+    assert found['customers.CustomerID -> accounts.CustomerID'] == 1
+    assert found['loans.LoanID unique'] == 2
+    assert summary['Violations'].sum() == 4
+
+    by_kind = violations.groupby('Kind')['Value'].apply(list)
+    assert by_kind['Dangling'] == ['A999']
+    assert by_kind['Orphan'] == ['C004']
+    assert by_kind['Duplicate'] == ['L001', 'L001']
+
+
+def test_integrity_pool_matches_in_process(bms, bank, monkeypatch):
+    data = seed_violations(bms, bank)
+    summary, violations = bms.check_integrity(data, workers=1)
+
+    monkeypatch.setattr(bms, 'INTEGRITY_CHUNK', 2)
+    pooled_summary, pooled_violations = bms.check_integrity(data, workers=2)
+
+    pd.testing.assert_frame_equal(pooled_summary, summary)
+    pd.testing.assert_frame_equal(pooled_violations, violations)
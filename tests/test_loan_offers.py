@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+
+AMOUNTS = [100000, 250000, 500000]
+TENURES = [12, 60, 240]
+
+
+def test_grid_emis_match_scalar_emi(bms):
+    grid = bms.build_loan_offer_grid(AMOUNTS, TENURES)
+    assert len(grid) == len(bms.LOAN_RATES) * len(AMOUNTS) * len(TENURES)
+
+    for offer in grid.itertuples(index=False):
+        assert offer.Rate == bms.LOAN_RATES[offer.LoanType]
+        emi = bms.calculate_emi(offer.Amount, offer.Rate, offer.Tenure)
+        assert offer.EMI == emi
+        assert offer.TotalPayable == round(emi * offer.Tenure, 2)
+        assert offer.TotalInterest == round(emi * offer.Tenure - offer.Amount, 2)
+
+
+def test_cheapest_offers_filter_and_order(bms):
+    grid = bms.build_loan_offer_grid(AMOUNTS, TENURES)
+    offers = bms.cheapest_loan_offers(grid, max_emi=10000, min_amount=250000, top=len(grid))
+
+    expected = grid[(grid['EMI'] <= 10000) & (grid['Amount'] >= 250000)]
+    assert not offers.empty
+    assert sorted(offers.index) == sorted(expected.index)
+    keys = list(zip(offers['TotalInterest'], offers['EMI']))
+    assert keys == sorted(keys)
+
+    assert bms.cheapest_loan_offers(grid, max_emi=1).empty
+    assert len(bms.cheapest_loan_offers(grid, top=5)) == 5
+
+
+def test_read_number_range_accepts_valid_input(bms, monkeypatch):
+    monkeypatch.setattr('builtins.input', lambda _: '100 300 100')
+    assert bms.read_number_range('Amounts', (1, 2, 1)).tolist() == [100, 200, 300]
+
+
+@pytest.mark.parametrize('raw', ['', '100 300 0', '300 100 50', 'a b c', '100 300', '100 300 -5', 'nan 300 10'])
+def test_read_number_range_falls_back_to_default(bms, monkeypatch, raw):
+    monkeypatch.setattr('builtins.input', lambda _: raw)
+    assert np.array_equal(bms.read_number_range('Amounts', (12, 36, 12)), [12, 24, 36])
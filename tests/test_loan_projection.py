@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def iterate(outstanding, annual_rate, emi, horizon):
+    """Month-by-month reference: the same split as pay_loan_emi, one loan at a time"""
+    rows = {'Payment': [], 'Interest': [], 'Principal': [], 'Outstanding': []}
+    rate = annual_rate / 1200
+    for _ in range(horizon):
+        interest = outstanding * rate
+        principal = min(emi - interest, outstanding) if outstanding > 0 else 0.0
+        interest = interest if outstanding > 0 else 0.0
+        outstanding -= principal
+        for key, value in zip(rows, (interest + principal, interest, principal, outstanding)):
+            rows[key].append(value)
+    return rows
+
+
+LOANS = [(100000.0, 12.0, 4707.35), (30000.0, 0.0, 2500.0), (4000.0, 9.0, 4707.35),
+         (250000.0, 8.5, 2169.56), (0.0, 10.0, 1000.0)]
+
+
+def test_closed_form_matches_iteration(bms):
+    outstanding, rate, emi = map(np.array, zip(*LOANS))
+    flows = bms.project_loan_cashflows(outstanding, rate, emi, 30)
+    for row, loan in enumerate(LOANS):
+        expected = iterate(*loan, 30)
+        for key, values in expected.items():
+            np.testing.assert_allclose(flows[key][row], values, rtol=1e-9, atol=1e-6)
+
+
+def test_loan_book_sums_active_loans_per_group(bms):
+    loans = pd.DataFrame([
+        {'LoanID': f'L{i}', 'LoanType': kind, 'OutstandingAmount': out, 'InterestRate': rate, 'EMI': emi,
+         'Status': status, 'Tenure_Months': 24}
+        for i, ((out, rate, emi), kind, status) in enumerate(zip(
+            LOANS, ['Home Loan', 'Car Loan', 'Home Loan', 'Car Loan', 'Home Loan'],
+            ['Active', 'Active', 'Active', 'Closed', 'Active']))
+    ]).reindex(columns=bms.SCHEMAS['loans'])
+    data = {'loans': loans}
+    bms.LOAN_PROJECTION_CHUNK = 2
+
+    book = bms.project_loan_book(data, 6)
+    expected = sum(np.array(iterate(*LOANS[i], 6)['Payment']) for i in (0, 1, 2, 4))
+    np.testing.assert_allclose(book['Payment'], expected.round(2), atol=0.011)
+    assert book['PayingLoans'].tolist()[0] == 3
+
+    by_type = bms.project_loan_book(data, 6, group_by='LoanType').groupby('Group')['Payment'].sum()
+    assert by_type['Car Loan'] == pytest.approx(sum(iterate(*LOANS[1], 6)['Payment']), abs=0.05)
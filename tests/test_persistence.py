@@ -0,0 +1,38 @@
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+from conftest import posting
+
+
+def test_save_writes_cache_matching_file(bms, bank):
+    assert bms.save_data(bank)
+    with open(bms.DB_FILE, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    assert bms.load_cached_state()['transactions'].shape[0] == len(bank['transactions'])
+
+    with open(bms.CACHE_FILE, 'rb') as f:
+        cached = pickle.load(f)
+    assert cached['fingerprint']['sha256'] == digest
+    assert 'Timestamp' not in cached['tables']['transactions'].columns
+    assert not os.path.exists(bms.DB_FILE + '.tmp')
+
+
+def test_cache_is_rejected_after_external_edit(bms, bank):
+    bms.save_data(bank)
+    with open(bms.DB_FILE, 'a') as f:
+        f.write('\n')
+    assert bms.load_cached_state() is None
+
+
+def test_cold_and_warm_load_agree(bms, bank):
+    data = bms.post_transactions(bank, pd.DataFrame([posting('A001', 10)]))
+    bms.save_data(data)
+    warm = bms.load_data()
+    os.remove(bms.CACHE_FILE)
+    cold = bms.load_data()
+    for table in ('accounts', 'transactions'):
+        pd.testing.assert_frame_equal(warm[table].reset_index(drop=True), cold[table].reset_index(drop=True),
+                                      check_dtype=False)
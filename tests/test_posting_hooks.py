@@ -0,0 +1,58 @@
+import copy
+
+import pandas as pd
+import pytest
+
+from conftest import posting
+
+
+@pytest.fixture
+def posted(bms, bank):
+    """Several batches through post_transactions, including today's limit-counted debits"""
+    today = bms.get_date()
+    data = bank
+    for batch in (
+        [posting('A001', 3000, 'Debit', date=today, kind='Withdrawal'),
+         posting('A002', 1500, 'Debit', date=today, kind='Fund Transfer'),
+         posting('A003', 1500, date=today, kind='Transfer Credit')],
+        [posting('A001', 250, date='2024-03-05'), posting('A002', 75.5, 'Debit', date='2024-03-06', kind='Withdrawal')],
+        [posting('A003', 999, date=today, time='23:59:59')],
+    ):
+        data = bms.post_transactions(data, pd.DataFrame(batch))
+    return data
+
+
+def test_ids_continue_the_ledger_sequence(bms, posted):
+    assert list(posted['transactions']['TransactionID']) == [f'TXN{i:05d}' for i in range(1, 10)]
+    assert bms.ledger_head(posted) == 9
+
+
+def test_incremental_state_matches_a_full_rebuild(bms, posted):
+    usage = copy.deepcopy(bms._daily_usage)
+    totals = bms.get_bank_totals(posted)
+    daily, monthly = posted['daily_rollup'], posted['monthly_rollup']
+    timeline = bms.transactions_between(posted)['TransactionID'].tolist()
+
+    bms.rebuild_daily_usage(posted)
+    assert bms._daily_usage == usage
+    assert bms.get_daily_usage('withdrawal', 'A001') == 3000
+    assert bms.get_daily_usage('transfer', 'A002') == 1500
+
+    expected = bms.compute_bank_totals(posted)
+    assert {k: totals[k] for k in ('TotalDeposits', 'CreditVolume', 'DebitVolume')} == \
+           {k: expected[k] for k in ('TotalDeposits', 'CreditVolume', 'DebitVolume')}
+
+    bms.rebuild_rollups(posted)
+    pd.testing.assert_frame_equal(daily.reset_index(drop=True), posted['daily_rollup'].reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(monthly.reset_index(drop=True), posted['monthly_rollup'].reset_index(drop=True), check_dtype=False)
+
+    bms.rebuild_transaction_timeline(posted)
+    assert bms.transactions_between(posted)['TransactionID'].tolist() == timeline
+
+
+def test_projected_balances_reconcile_with_the_ledger(bms, posted):
+    balances = posted['accounts'].set_index('AccountNumber')['Balance']
+    assert balances.to_dict() == {'A001': 47250.0, 'A002': 18424.5, 'A003': 7499.0}
+    assert bms.reconcile_ledger(posted).empty
+    pd.testing.assert_series_equal(bms.replay_balances(posted).sort_index(), balances.sort_index().astype(float),
+                                   check_names=False)
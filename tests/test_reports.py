@@ -0,0 +1,31 @@
+import pandas as pd
+
+from conftest import make_customers, posting
+
+
+def test_customer_balance_table_matches_per_customer_totals(bms, bank):
+    table = bms.build_customer_balance_table(bank).set_index('CustomerID')
+    assert table.loc['C001', 'TotalBalance'] == 50000
+    assert table.loc['C003', 'Accounts'] == 1
+    assert list(bms.build_customer_balance_table(bank, top=1)['CustomerID']) == ['C001']
+
+
+def test_customer_balance_table_tolerates_duplicate_customer_ids(bms, bank):
+    bank['customers'] = pd.concat([bank['customers'], make_customers(bms, ['C002'])], ignore_index=True)
+    table = bms.build_customer_balance_table(bank, sort_by='CustomerID', ascending=True)
+
+    assert list(table['CustomerID']) == ['C001', 'C002', 'C002', 'C003']
+    assert list(table.loc[table['CustomerID'] == 'C002', 'TotalBalance']) == [20000, 20000]
+
+
+def test_background_report_runs_on_a_snapshot(bms, bank):
+    assert bms.snapshot_context().get_start_method() != 'fork'
+    job = bms.submit_background_report(bank, '1')
+    bms.post_transactions(bank, pd.DataFrame([posting('A001', 12345)]))
+    bms.wait_for_reports(60)
+
+    assert bms.job_status(job) == 'Done'
+    with open(job['path'], encoding='utf-8') as f:
+        output = f.read()
+    assert 'ledger head 3' in output
+    assert '75,000.00' in output
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from conftest import posting
+
+
+def test_posting_hook_keeps_rollups_in_sync(bms, bank):
+    data = bms.post_transactions(bank, pd.DataFrame([
+        posting('A001', 700, 'Debit', date='2024-02-03', kind='Withdrawal'),
+        posting('A002', 250, date='2024-03-04'),
+    ]))
+    assert bms.rollups_in_sync(data)
+
+    incremental = {t: data[t].sort_values(list(data[t].columns[:3])).reset_index(drop=True)
+                   for t in bms.ROLLUP_KEYS}
+    bms.rebuild_rollups(data)
+    for table, frame in incremental.items():
+        rebuilt = data[table].sort_values(list(frame.columns[:3])).reset_index(drop=True)
+        pd.testing.assert_frame_equal(frame, rebuilt, check_dtype=False)
+
+
+def test_wrong_amounts_with_right_counts_are_out_of_sync(bms, bank):
+    assert bms.rollups_in_sync(bank)
+    bank['daily_rollup'] = bank['daily_rollup'].assign(Amount=bank['daily_rollup']['Amount'] + 1)
+    assert not bms.rollups_in_sync(bank)
+
+
+def test_legacy_dates_are_rolled_up(bms, bank):
+    legacy = pd.DataFrame([posting('A003', 40, date='2024/02/05'), posting('A003', 60, date='2024-02-05 09:30')])
+    data = bms.post_transactions(bank, legacy)
+    assert bms.rollups_in_sync(data)
+
+    day = data['daily_rollup']
+    assert day.loc[day['Date'] == '2024-02-05', 'Amount'].sum() == 100
+    assert list(bms.parse_dates(pd.Series(['2024-02-05', '05 Feb 2024', '', None])).dt.day.fillna(0)) == [5, 5, 0, 0]
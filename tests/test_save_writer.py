@@ -0,0 +1,58 @@
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import posting
+
+
+def saved_balances(bms):
+    tables = pd.read_csv(bms.DB_FILE).set_index('Table')['Data']
+    rows = [r for r in json.loads(tables['accounts']).values() if isinstance(r, dict)]
+    return {r['AccountNumber']: r['Balance'] for r in rows}
+
+
+def test_burst_of_saves_is_coalesced(bms, bank):
+    data = bank
+    for amount in range(1, 21):
+        data = bms.post_transactions(data, pd.DataFrame([posting('A002', amount)]))
+        bms.request_save(data)
+    assert bms.flush_saves(10)
+
+    metrics = bms.writer_metrics()
+    assert metrics['requests'] == 20
+    assert metrics['writes'] < metrics['requests']
+    assert metrics['writes'] + metrics['coalesced'] == metrics['requests']
+    assert saved_balances(bms)['A002'] == 20000 + sum(range(1, 21))
+
+
+def test_snapshot_is_frozen_at_request_time(bms, bank, monkeypatch):
+    monkeypatch.setattr(bms, 'SAVE_COALESCE_SECONDS', 0.5)
+    bms.request_save(bank)
+    bank['accounts'].loc[bank['accounts']['AccountNumber'] == 'A001', 'Balance'] = 1.0
+    assert bms.flush_saves(10)
+    assert saved_balances(bms)['A001'] == 50000
+
+
+def test_failed_write_is_not_reported_durable(bms, bank, monkeypatch):
+    monkeypatch.setattr(bms, 'save_data', lambda data: False)
+    bms.request_save(bank)
+    assert not bms.flush_saves(10)
+    assert bms.writer_metrics()['errors'] == 1
+
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_flush_returns_when_the_writer_raises(bms, bank, monkeypatch):
+    def explode(data):
+        raise RuntimeError('boom')
+    with monkeypatch.context() as patch:
+        patch.setattr(bms, 'save_data', explode)
+        bms.request_save(bank)
+        assert bms.flush_saves() is False
+        bms._writer['thread'].join(5)
+        assert not bms._writer['thread'].is_alive()
+
+    # The next request restarts the writer and saves normally
+    bms.request_save(bank)
+    assert bms.flush_saves(10)
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import posting
+
+
+START, END = '2024-02-01', '2024-02-29'
+
+
+@pytest.fixture
+def ledger(bms, bank):
+    data = bms.post_transactions(bank, pd.DataFrame([
+        posting('A001', 2000, 'Debit', date='2024-02-05', kind='Withdrawal'),
+        posting('A001', 3000, date='2024/02/20'),
+        posting('A002', 750, 'Debit', date='2024-02-29', time='23:59:59', kind='Withdrawal'),
+        posting('A001', 400, date='2024-03-10'),
+        posting('A002', 1000, date='2024-03-01'),
+    ]))
+    return data
+
+
+def test_statement_balances_follow_the_ledger(bms, ledger):
+    summary, lines = bms.build_statements(ledger, START, END)
+    summary = summary.set_index('AccountNumber')
+
+    for acc, row in summary.iterrows():
+        assert row['Opening'] + row['Credits'] - row['Debits'] == pytest.approx(row['Closing'])
+        assert row['Opening'] == pytest.approx(bms.balance_as_of(ledger, acc, '2024-01-31'))
+        assert row['Closing'] == pytest.approx(bms.balance_as_of(ledger, acc, END))
+
+    # The legacy-format row is dated inside the period
+    assert summary.loc['A001', ['Credits', 'Debits', 'Transactions']].tolist() == [3000, 2000, 2]
+    assert summary.loc['A003', 'Transactions'] == 0
+
+    a001 = lines[lines['AccountNumber'] == 'A001']
+    assert a001['Date'].tolist() == ['2024-02-05', '2024-02-20']
+    assert a001['Balance'].tolist() == [48000, 51000]
+
+
+def test_export_statements_csv(bms, ledger):
+    summary, paths = bms.export_statements(ledger, START, END, fmt='csv', workers=1)
+    assert sorted(os.path.basename(p) for p in paths) == ['A001.csv', 'A002.csv', 'A003.csv']
+
+    frame = pd.read_csv(os.path.join(bms.STATEMENT_DIR, f"{START}_{END}", 'A001.csv'))
+    assert frame['TransactionType'].tolist() == ['Opening Balance', 'Withdrawal', 'Deposit', 'Closing Balance']
+    assert frame['Balance'].tolist() == [50000, 48000, 51000, 51000]
+    assert frame['Debit'].sum() == 2000 and frame['Credit'].sum() == 3000
+
+
+def test_export_statements_txt(bms, ledger):
+    _, paths = bms.export_statements(ledger, START, END, accounts=['A002'], fmt='txt', workers=1)
+    assert [os.path.basename(p) for p in paths] == ['A002.txt']
+
+    with open(paths[0], encoding='utf-8') as f:
+        text = f.read()
+    assert 'Account Number: A002' in text
+    assert 'Opening Balance' in text and '20,000.00' in text
+    assert 'Closing Balance' in text and '19,250.00' in text
+    assert 'Total Debits: 750.00    Total Credits: 0.00    Transactions: 1' in text
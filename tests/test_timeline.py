@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import posting
+
+
+def post_spread(bms, data, count=60):
+    """Postings spread over March, deliberately out of time order"""
+    rng = np.random.default_rng(7)
+    days = rng.integers(1, 29, count)
+    rows = [posting(f'A00{1 + i % 3}', 10 + i, 'Debit' if i % 4 == 0 else 'Credit',
+                    date=f'2024-03-{d:02d}', time=f'{i % 24:02d}:00:00')
+            for i, d in enumerate(days)]
+    for row in rows:
+        data = bms.post_transactions(data, pd.DataFrame([row]))
+    return data
+
+
+def brute_between(data, start, end, account=None):
+    ledger = data['transactions']
+    stamps = pd.to_datetime(ledger['Date'] + ' ' + ledger['Time'])
+    keep = (stamps >= pd.Timestamp(start)) & (stamps < pd.Timestamp(end) + pd.Timedelta(days=1))
+    if account is not None:
+        keep &= ledger['AccountNumber'] == account
+    return set(ledger.loc[keep, 'TransactionID'])
+
+
+@pytest.mark.parametrize('tail_limit', [4096, 5])
+def test_range_queries_match_a_scan(bms, bank, tail_limit):
+    bms.TIMELINE_TAIL_LIMIT = tail_limit
+    data = post_spread(bms, bank)
+    for account in (None, 'A002'):
+        rows = bms.transactions_between(data, '2024-03-05', '2024-03-20', account)
+        assert set(rows['TransactionID']) == brute_between(data, '2024-03-05', '2024-03-20', account)
+        assert rows['Timestamp'].is_monotonic_increasing
+
+
+def test_posting_queues_instead_of_inserting(bms, bank):
+    data = post_spread(bms, bank, count=10)
+    assert bms._txn_timeline['merged'] < bms._txn_timeline['rows']
+    bms.current_timeline(data, merged=True)
+    assert bms._txn_timeline['merged'] == bms._txn_timeline['rows']
+    assert np.all(np.diff(bms._txn_timeline['ts']) >= 0)
+
+
+def test_in_place_date_edit_is_picked_up_after_touch(bms, bank):
+    data = post_spread(bms, bank, count=10)
+    data['transactions'].loc[0, 'Date'] = '2023-06-01'
+    bms.touch_tables('transactions')
+    rows = bms.transactions_between(data, '2023-06-01', '2023-06-01')
+    assert list(rows['TransactionID']) == [data['transactions'].loc[0, 'TransactionID']]
+
+
+def test_balance_as_of_matches_brute_force(bms, bank):
+    data = post_spread(bms, bank)
+    ledger = data['transactions']
+    stamps = pd.to_datetime(ledger['Date'] + ' ' + ledger['Time'])
+    signed = np.where(ledger['DebitCredit'] == 'Credit', ledger['Amount'], -ledger['Amount'])
+    for when in ('2024-01-31', '2024-03-10', '2024-03-10 05:00:00', '2024-12-31'):
+        bound = pd.Timestamp(when) + (pd.Timedelta(days=1) if len(when) == 10 else pd.Timedelta(1, unit='ns'))
+        for account in ('A001', 'A002', 'A003'):
+            mask = (ledger['AccountNumber'] == account) & (stamps < bound)
+            assert bms.balance_as_of(data, account, when) == pytest.approx(signed[mask].sum())
@@ -0,0 +1,31 @@
+import gc
+
+import pandas as pd
+import pytest
+
+from conftest import posting
+
+
+def test_postings_refresh_projected_balances(bms, bank):
+    assert bms.typed_view(bank, 'accounts')['Balance'].sum() == 75000
+    data = bms.post_transactions(bank, pd.DataFrame([posting('A001', 500)]))
+    assert bms.typed_view(data, 'accounts')['Balance'].sum() == 75500
+
+
+def test_untouched_in_place_edit_is_caught_in_check_mode(bms, bank):
+    bms.typed_view(bank, 'loans')
+    bms.typed_view(bank, 'accounts')
+    bank['accounts'].loc[0, 'Balance'] = 1.0
+    with pytest.raises(AssertionError, match="touch_tables\\('accounts'\\)"):
+        bms.typed_view(bank, 'accounts')
+
+    bms.touch_tables('accounts')
+    assert bms.typed_view(bank, 'accounts')['Balance'].iloc[0] == 1.0
+
+
+def test_replaced_table_is_not_retained(bms, bank):
+    bms.typed_view(bank, 'transactions')
+    ref = bms._typed_views['transactions']['source']
+    bank = bms.post_transactions(bank, pd.DataFrame([posting('A002', 10)]))
+    gc.collect()
+    assert ref() is None